@@ -1,6 +1,6 @@
 import streamlit as st
 from components.authentication import authentication
-from components.dashboard import dashboard
+from scripts.metrics import start_exporters
 
 # Page configuration
 st.set_page_config(
@@ -10,6 +10,9 @@ st.set_page_config(
 )
 
 if __name__ == "__main__":
+    # Metrics endpoint / textfile exporter (only when METRICS_ENABLED=1, started once per server process)
+    start_exporters()
+    
     # Initialize session variables for the stepper if needed
     if 'current_step' not in st.session_state:
         st.session_state['current_step'] = 0
@@ -18,6 +21,9 @@ if __name__ == "__main__":
     
     # Check login status and show appropriate page
     if st.session_state.get('logged_in', False):
+        # The dashboard (pipeline steps, results, reports, MongoDB) is only imported once logged in,
+        # so the login page renders without loading the heavy libraries
+        from components.dashboard import dashboard
         dashboard()
     else:
         authentication()
\ No newline at end of file
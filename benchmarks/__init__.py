@@ -0,0 +1 @@
+#mesures de performance du pipeline sur des génomes synthétiques (voir benchmarks/run_benchmarks.py)
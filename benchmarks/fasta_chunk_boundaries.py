@@ -0,0 +1,67 @@
+#vérifier que la validation en flux d'un FASTA ne dépend pas du découpage en blocs : le fichier (fins de
+#ligne LF puis CRLF) est coupé à chaque position et validé en deux blocs en mode strict ; le rapport et
+#la sortie normalisée doivent être identiques à ceux du fichier validé en un seul bloc
+#(une fin de ligne CRLF coupée entre deux blocs ne doit pas compter le \r dans la longueur de la ligne)
+#
+#usage (depuis la racine du projet) :
+#   python -m benchmarks.fasta_chunk_boundaries
+#le script se termine avec le code 1 si un découpage donne un résultat différent
+import argparse
+import io
+import random
+import sys
+
+from scripts.fasta_validation import FastaValidator
+
+
+#FASTA de plusieurs records en lignes de line_width bases (dernière ligne plus courte)
+def build_fasta(records=3, length=317, line_width=60, newline="\n", seed=0):
+    rng = random.Random(seed)
+    lines = []
+    for number in range(records):
+        lines.append(f">record{number + 1} synthetic")
+        sequence = "".join(rng.choice("ACGTN") for _ in range(length))
+        lines.extend(sequence[i:i + line_width] for i in range(0, length, line_width))
+    return (newline.join(lines) + newline).encode()
+
+
+#valider data découpé en blocs, renvoie (rapport, sortie normalisée)
+def validate_chunks(chunks):
+    output = io.BytesIO()
+    validator = FastaValidator(output, header=None, strict=True)
+    for chunk in chunks:
+        validator.feed(chunk)
+    return validator.close(), output.getvalue()
+
+
+#couper data à chaque position, renvoie les positions dont le résultat diffère du fichier entier
+def check_splits(data):
+    expected = validate_chunks([data])
+    return [offset for offset in range(1, len(data)) if validate_chunks([data[:offset], data[offset:]]) != expected]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Validation FASTA indépendante du découpage en blocs")
+    parser.add_argument("--records", type=int, default=3, help="Nombre de records")
+    parser.add_argument("--length", type=int, default=317, help="Longueur de chaque record")
+    args = parser.parse_args()
+
+    failed = False
+    for label, newline in (("LF", "\n"), ("CRLF", "\r\n")):
+        data = build_fasta(args.records, args.length, newline=newline)
+        report, _ = validate_chunks([data])
+        failures = check_splits(data)
+        print(f"**{label} : {len(data) - 1} découpages, {len(failures)} échec(s)")
+        if report.errors or report.warnings:
+            print(f"**{label} : rapport inattendu pour le fichier entier {report.errors + report.warnings}")
+            failed = True
+        if failures:
+            print(f"**{label} : positions en échec {failures[:10]}")
+            failed = True
+
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
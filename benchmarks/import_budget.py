@@ -0,0 +1,94 @@
+#vérifier le temps de démarrage de l'application : `import app` (page de connexion) est mesuré avec
+#python -X importtime dans un processus neuf, et doit rester sous le budget sans charger les
+#bibliothèques lourdes, importées seulement par les pages qui les utilisent
+#
+#usage (depuis la racine du projet) :
+#   python -m benchmarks.import_budget
+#   python -m benchmarks.import_budget --budget 0.8 --output benchmarks/results/imports.json
+#le script se termine avec le code 1 si le budget est dépassé ou si un module interdit est importé
+import argparse
+import json
+import os
+import re
+import subprocess
+import sys
+from datetime import datetime
+
+PROJECT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+RESULTS_DIR = os.path.join(PROJECT_DIR, "benchmarks", "results")
+
+DEFAULT_BUDGET = 1.0
+# bibliothèques qui ne doivent pas être chargées pour afficher la page de connexion
+# (numpy et PIL sont chargés par streamlit lui-même pour l'icône de la page)
+FORBIDDEN_MODULES = ("pandas", "Bio", "py3Dmol", "PyPDF2", "reportlab", "pymongo")
+# une base injoignable échoue vite : le démarrage ne doit de toute façon pas s'y connecter
+OFFLINE_MONGODB_URI = "mongodb://127.0.0.1:1/?serverSelectionTimeoutMS=200"
+
+# "import time:       self [us] | cumulative | imported package"
+IMPORTTIME_LINE = re.compile(r"^import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)$")
+
+
+#lancer `python -X importtime -c "import <module>"` et renvoyer les lignes (module, propre, cumulé, profondeur)
+def measure_imports(module="app"):
+    env = {**os.environ, "MONGODB_URI": OFFLINE_MONGODB_URI}
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=PROJECT_DIR, env=env, capture_output=True, text=True
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f"import {module} a échoué :\n{result.stderr[-2000:]}")
+    imports = []
+    for line in result.stderr.splitlines():
+        match = IMPORTTIME_LINE.match(line)
+        if match:
+            self_us, cumulative_us, indent, name = match.groups()
+            imports.append((name, int(self_us) / 1e6, int(cumulative_us) / 1e6, (len(indent) - 1) // 2))
+    return imports
+
+
+#résumé : temps total (somme des imports de premier niveau), imports les plus lents, modules interdits chargés
+def check_budget(imports, budget=DEFAULT_BUDGET, forbidden=FORBIDDEN_MODULES, slowest=15):
+    total = sum(cumulative for _, _, cumulative, depth in imports if depth == 0)
+    loaded = {name for name, _, _, _ in imports}
+    forbidden_loaded = sorted(module for module in forbidden
+                              if module in loaded or any(name.startswith(module + ".") for name in loaded))
+    ranked = sorted(imports, key=lambda entry: entry[1], reverse=True)[:slowest]
+    return {
+        "total_seconds": round(total, 4),
+        "budget_seconds": budget,
+        "forbidden_loaded": forbidden_loaded,
+        "slowest_imports": [{"module": name, "self_seconds": round(self_s, 4), "cumulative_seconds": round(cumulative, 4)}
+                            for name, self_s, cumulative, _ in ranked],
+        "passed": total <= budget and not forbidden_loaded
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Budget de temps d'import de l'application GeneVision")
+    parser.add_argument("--module", type=str, default="app", help="Module importé (depuis la racine du projet)")
+    parser.add_argument("--budget", type=float, default=DEFAULT_BUDGET, help="Temps d'import maximal (s)")
+    parser.add_argument("--output", type=str, default=None, help="Fichier JSON de sortie")
+    args = parser.parse_args()
+
+    report = check_budget(measure_imports(args.module), args.budget)
+    report["module"] = args.module
+    report["created"] = datetime.now().isoformat(timespec="seconds")
+
+    for entry in report["slowest_imports"]:
+        print(f"   {entry['module']:<48}{entry['self_seconds']:8.4f} s")
+    print(f"**import {args.module} : {report['total_seconds']:.3f} s (budget {args.budget:.3f} s)")
+    for module in report["forbidden_loaded"]:
+        print(f"**Module lourd importé au démarrage : {module}")
+
+    output = args.output or os.path.join(RESULTS_DIR, f"imports_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    print(f"**Résultats enregistrés dans {output}")
+
+    if not report["passed"]:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,256 @@
+#mesurer le temps de chaque étape du pipeline sur des génomes synthétiques de tailles croissantes
+#les outils externes (AUGUSTUS, DeepGOPlus, QuickGO, LLM, ESMFold) sont remplacés par les sorties
+#et services simulés de benchmarks/synthetic.py : seul le code Python du projet est mesuré
+#
+#usage (depuis la racine du projet) :
+#   python -m benchmarks.run_benchmarks --sizes 100000 1000000 5000000 --repeat 3
+#   python -m benchmarks.run_benchmarks --baseline benchmarks/results/reference.json
+#le résultat est écrit en JSON (une entrée par taille et par étape) ; avec --baseline, le script
+#se termine avec le code 1 si une étape est plus lente que la référence au-delà de --tolerance
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+import pandas as pd
+
+PROJECT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# protein_model.py importe ses voisins directement (il est lancé comme script par le pipeline)
+sys.path.insert(0, os.path.join(PROJECT_DIR, "scripts"))
+
+import protein_model  # noqa: E402
+from benchmarks.synthetic import FakeQuickGO, fake_esmfold, fake_llm_resume, generate_dataset  # noqa: E402
+from components.results_loader import ResultPaths, parse_results_bundle, records_to_fasta, results_signature  # noqa: E402
+from scripts.annotations_go import extract_annotation  # noqa: E402
+from scripts.functions_go import add_go_functions  # noqa: E402
+from scripts.model_confidence import confidence_bands, load_plddt  # noqa: E402
+from scripts.predict_genes import extract_gene_sequences, extract_prediction, write_fasta, write_protein_fasta  # noqa: E402
+from scripts.rapport_results import build_genevision_report, build_html_report, build_json_report  # noqa: E402
+
+STAGES = (
+    "extract_prediction",
+    "extract_gene_sequences",
+    "write_gene_fasta",
+    "extract_annotation",
+    "go_lookup",
+    "structure_prediction",
+    "results_loading",
+    "report_pdf",
+    "report_html",
+    "report_json"
+)
+DEFAULT_SIZES = (100_000, 1_000_000, 5_000_000)
+RESULTS_DIR = os.path.join(PROJECT_DIR, "benchmarks", "results")
+
+
+#données du rapport construites à partir du bundle, comme collect_report_data dans results_finals.py
+def report_data_from_bundle(bundle):
+    report_data = {
+        'metadata': {
+            'report_filename': 'genevision_benchmark_report.pdf',
+            'date': datetime.now().strftime("%B %d, %Y"),
+            'user': 'benchmark'
+        },
+        'tools': {
+            'gene_prediction': 'AUGUSTUS (synthetic)',
+            'functional_annotation': 'DeepGOPlus (synthetic)',
+            'structural_modeling': 'ESMFold (synthetic)'
+        },
+        'sequence_data': {
+            'gene_count': len(bundle.gene_records or ()),
+            'protein_count': len(bundle.protein_records or ()),
+            'sequence_length': int(bundle.input_stats.lengths.sum()) if bundle.input_stats else 0,
+            'input_gc_content': round(bundle.input_stats.overall_gc, 2) if bundle.input_stats else 0.0
+        },
+        'sequence_contents': {
+            'input_sequence': records_to_fasta(bundle.input_records),
+            'predicted_genes': records_to_fasta(bundle.gene_records),
+            'protein_sequences': records_to_fasta(bundle.protein_records)
+        },
+        'genes': [],
+        'structure_confidence': []
+    }
+    if bundle.annotations is not None:
+        for _, row in bundle.annotations.iterrows():
+            report_data['genes'].append({
+                'id': row.get('Gene ID', 'Unknown'),
+                'position': row.get('Position', 'Unknown'),
+                'score': f"{row.get('Confidence Score', 0):.2f}",
+                'function': row.get('Top GO Term Name', 'Unknown'),
+                'Top GO Term': row.get('Top GO Term', 'Unknown'),
+                'Top GO Term Description': row.get('Top GO Term Description', 'No description available')
+            })
+    for model in bundle.structures or ():
+        plddt = load_plddt(model.path)
+        if len(plddt):
+            report_data['structure_confidence'].append({
+                'protein_id': model.protein_id,
+                'mean_plddt': model.summary['mean_plddt'],
+                'plddt': plddt.astype(float).tolist(),
+                'bands': confidence_bands(plddt)
+            })
+    return report_data
+
+
+#exécuter toutes les étapes une fois sur le jeu de données, renvoie {étape: secondes}
+#chaque étape lit les fichiers écrits par la précédente, comme dans le pipeline
+def run_pipeline(dataset, work_dir, stages, go_latency=0.0):
+    predicted_genes_fasta = os.path.join(work_dir, "predicted_genes.fasta")
+    protein_sequences_fasta = os.path.join(work_dir, "protein_sequences.fasta")
+    final_annotations_csv = os.path.join(work_dir, "final_annotations.csv")
+    models_dir = os.path.join(work_dir, "pdb_models")
+    shutil.rmtree(models_dir, ignore_errors=True)
+    timings = {}
+
+    def timed(stage, fn, *args, **kwargs):
+        started = time.perf_counter()
+        result = fn(*args, **kwargs)
+        if stage in stages:
+            timings[stage] = time.perf_counter() - started
+        return result
+
+    genes, proteins = timed("extract_prediction", extract_prediction, dataset.augustus_gff)
+    gene_sequences = timed("extract_gene_sequences", extract_gene_sequences, dataset.input_fasta, genes)
+
+    def write_gene_fasta():
+        write_fasta(predicted_genes_fasta, gene_sequences)
+        write_protein_fasta(protein_sequences_fasta, proteins)
+    timed("write_gene_fasta", write_gene_fasta)
+
+    def annotate():
+        extract_annotation(dataset.deepgoplus_tsv, predicted_genes_fasta).to_csv(final_annotations_csv, index=False)
+    timed("extract_annotation", annotate)
+
+    def go_lookup():
+        df = add_go_functions(pd.read_csv(final_annotations_csv), FakeQuickGO(go_latency), fake_llm_resume)
+        df.to_csv(final_annotations_csv, index=False)
+    timed("go_lookup", go_lookup)
+
+    def structure_prediction():
+        # ESMFold remplacé, pas de limite de longueur (le placeholder gene1.txt n'est pas utilisé)
+        original = protein_model.predict_structure
+        protein_model.predict_structure = fake_esmfold
+        try:
+            with contextlib.redirect_stdout(io.StringIO()):
+                protein_model.process_fasta(protein_sequences_fasta, models_dir, max_length=10 ** 9)
+        finally:
+            protein_model.predict_structure = original
+    timed("structure_prediction", structure_prediction)
+
+    paths = ResultPaths(dataset.input_fasta, predicted_genes_fasta, protein_sequences_fasta,
+                        final_annotations_csv, models_dir)
+
+    def results_loading():
+        results_signature(paths)
+        return parse_results_bundle(paths)
+    bundle = timed("results_loading", results_loading)
+
+    report_data = report_data_from_bundle(bundle)
+    timed("report_pdf", build_genevision_report, report_data, os.path.join(work_dir, "report.pdf"))
+    timed("report_html", build_html_report, report_data, os.path.join(work_dir, "report.html"))
+    timed("report_json", build_json_report, report_data, os.path.join(work_dir, "report.json"))
+    return timings
+
+
+#mesurer toutes les tailles : une entrée par (taille, étape) avec les temps de chaque répétition
+def run_benchmarks(sizes, genes_per_mb=100.0, repeat=3, stages=STAGES, go_latency=0.0, seed=0, log=print):
+    results = []
+    for size in sizes:
+        work_dir = tempfile.mkdtemp(prefix=f"genevision_bench_{size}_")
+        try:
+            dataset = generate_dataset(work_dir, size, genes_per_mb, seed)
+            log(f"** {size:,} bp, {dataset.gene_count} genes")
+            runs = [run_pipeline(dataset, work_dir, stages, go_latency) for _ in range(repeat)]
+            for stage in stages:
+                seconds = [run[stage] for run in runs]
+                results.append({
+                    "stage": stage,
+                    "sequence_length": size,
+                    "gene_count": dataset.gene_count,
+                    "runs": [round(value, 6) for value in seconds],
+                    "min_seconds": round(min(seconds), 6),
+                    "median_seconds": round(statistics.median(seconds), 6)
+                })
+                log(f"   {stage:<24}{min(seconds):10.4f} s")
+        finally:
+            shutil.rmtree(work_dir, ignore_errors=True)
+    return results
+
+
+#étapes plus lentes que la référence (même étape, même taille) au-delà de tolerance
+#la comparaison se fait sur le temps minimal, le moins sensible au bruit de la machine
+def find_regressions(results, baseline, tolerance=1.25, min_seconds=0.005):
+    reference = {(entry["stage"], entry["sequence_length"]): entry for entry in baseline["results"]}
+    regressions = []
+    for entry in results:
+        previous = reference.get((entry["stage"], entry["sequence_length"]))
+        if not previous or max(entry["min_seconds"], previous["min_seconds"]) < min_seconds:
+            continue
+        ratio = entry["min_seconds"] / max(previous["min_seconds"], 1e-9)
+        if ratio > tolerance:
+            regressions.append({
+                "stage": entry["stage"],
+                "sequence_length": entry["sequence_length"],
+                "baseline_seconds": previous["min_seconds"],
+                "seconds": entry["min_seconds"],
+                "ratio": round(ratio, 2)
+            })
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmarks du pipeline GeneVision sur des génomes synthétiques")
+    parser.add_argument("--sizes", type=lambda value: int(float(value)), nargs="+", default=list(DEFAULT_SIZES),
+                        help="Tailles des génomes synthétiques en pb (ex: 1e6)")
+    parser.add_argument("--genes-per-mb", type=float, default=100.0, help="Densité de gènes (gènes par mégabase)")
+    parser.add_argument("--repeat", type=int, default=3, help="Nombre de répétitions par taille")
+    parser.add_argument("--stages", nargs="+", choices=STAGES, default=list(STAGES), help="Étapes à mesurer")
+    parser.add_argument("--go-latency", type=float, default=0.0, help="Latence simulée de QuickGO par appel (s)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", type=str, default=None, help="Fichier JSON de sortie")
+    parser.add_argument("--baseline", type=str, default=None, help="Résultats JSON de référence à comparer")
+    parser.add_argument("--tolerance", type=float, default=1.25, help="Ralentissement toléré par rapport à la référence")
+    args = parser.parse_args()
+
+    results = run_benchmarks(args.sizes, args.genes_per_mb, args.repeat, tuple(args.stages), args.go_latency, args.seed)
+    report = {
+        "created": datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "config": {
+            "sizes": args.sizes,
+            "genes_per_mb": args.genes_per_mb,
+            "repeat": args.repeat,
+            "go_latency": args.go_latency,
+            "seed": args.seed
+        },
+        "results": results
+    }
+
+    output = args.output or os.path.join(RESULTS_DIR, f"benchmark_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    print(f"**Résultats enregistrés dans {output}")
+
+    if args.baseline:
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            regressions = find_regressions(results, json.load(f), args.tolerance)
+        for regression in regressions:
+            print(f"**Régression {regression['stage']} ({regression['sequence_length']:,} bp) : "
+                  f"{regression['baseline_seconds']:.4f} s -> {regression['seconds']:.4f} s (x{regression['ratio']})")
+        if regressions:
+            sys.exit(1)
+        print("**Aucune régression par rapport à la référence")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,205 @@
+#données synthétiques pour les benchmarks : génome FASTA de taille et densité de gènes choisies,
+#sorties simulées des outils externes (GFF AUGUSTUS, TSV DeepGOPlus) et remplaçants de QuickGO,
+#du LLM et d'ESMFold qui répondent sans réseau, de façon déterministe
+import math
+import os
+import time
+import zlib
+from dataclasses import dataclass
+from typing import Tuple
+
+import numpy as np
+
+NUCLEOTIDES = np.frombuffer(b"ACGT", dtype=np.uint8)
+AMINO_ACIDS = np.frombuffer(b"ACDEFGHIKLMNPQRSTVWY", dtype=np.uint8)
+# nom de la séquence insérée par l'utilisateur (voir app.py)
+SEQUENCE_NAME = "input_sequence"
+FASTA_LINE_WIDTH = 60
+# AUGUSTUS écrit la protéine sur des lignes commentées d'environ 100 acides aminés
+GFF_PROTEIN_LINE_WIDTH = 100
+# nombre de termes GO distincts tirés pour les annotations DeepGOPlus
+GO_TERM_POOL = 2000
+
+
+# code à trois lettres des acides aminés (fichiers PDB)
+THREE_LETTER = {
+    "A": "ALA", "C": "CYS", "D": "ASP", "E": "GLU", "F": "PHE", "G": "GLY", "H": "HIS", "I": "ILE",
+    "K": "LYS", "L": "LEU", "M": "MET", "N": "ASN", "P": "PRO", "Q": "GLN", "R": "ARG", "S": "SER",
+    "T": "THR", "V": "VAL", "W": "TRP", "Y": "TYR"
+}
+
+
+@dataclass(frozen=True)
+class SyntheticGene:
+    gene_id: str
+    # exons codants (début, fin) en coordonnées 1-based inclusives, triés
+    cds: Tuple[Tuple[int, int], ...]
+    protein: str
+
+    @property
+    def start(self):
+        return self.cds[0][0]
+
+    @property
+    def end(self):
+        return self.cds[-1][1]
+
+
+@dataclass(frozen=True)
+class SyntheticDataset:
+    sequence_length: int
+    genes_per_mb: float
+    input_fasta: str
+    augustus_gff: str
+    deepgoplus_tsv: str
+    gene_count: int
+
+
+#séquence aléatoire de longueur length (bytes ASCII ACGT)
+def random_genome(length, rng):
+    return NUCLEOTIDES[rng.integers(0, 4, size=length)].tobytes()
+
+
+def random_protein(length, rng):
+    return "M" + AMINO_ACIDS[rng.integers(0, len(AMINO_ACIDS), size=max(length - 1, 0))].tobytes().decode("ascii")
+
+
+#gènes répartis sans chevauchement : genes_per_mb gènes par mégabase, 1 à 10 exons de 50 à 300 pb
+def synthetic_genes(sequence_length, genes_per_mb, rng):
+    gene_count = int(round(sequence_length * genes_per_mb / 1_000_000))
+    if gene_count == 0:
+        return []
+    slot = sequence_length // gene_count
+    genes = []
+    for i in range(gene_count):
+        slot_start = i * slot + 1
+        exon_count = int(rng.integers(1, 11))
+        exons = []
+        position = slot_start + int(rng.integers(0, max(slot // 10, 1)))
+        for _ in range(exon_count):
+            length = int(rng.integers(50, 301))
+            if position + length >= slot_start + slot:
+                break
+            exons.append((position, position + length - 1))
+            # intron avant l'exon suivant
+            position += length + int(rng.integers(50, 500))
+        if not exons:
+            continue
+        coding_length = sum(end - start + 1 for start, end in exons)
+        genes.append(SyntheticGene(f"g{len(genes) + 1}", tuple(exons), random_protein(max(coding_length // 3 - 1, 1), rng)))
+    return genes
+
+
+def write_fasta_sequence(path, name, sequence, width=FASTA_LINE_WIDTH):
+    with open(path, "wb") as f:
+        f.write(f">{name}\n".encode("ascii"))
+        for i in range(0, len(sequence), width):
+            f.write(sequence[i:i + width])
+            f.write(b"\n")
+
+
+#sortie GFF au format AUGUSTUS (commentaires "# start gene", protéine commentée, "# end gene")
+def write_augustus_gff(path, genes, sequence_length):
+    with open(path, "w") as f:
+        f.write("# This output was generated with AUGUSTUS (version 3.5.0).\n")
+        f.write(f"# ----- prediction on sequence number 1 (length = {sequence_length}, name = {SEQUENCE_NAME}) -----\n")
+        f.write("#\n# Predicted genes for sequence number 1 on both strands\n")
+        for gene in genes:
+            attributes = f'transcript_id "{gene.gene_id}.t1"; gene_id "{gene.gene_id}";'
+            f.write(f"# start gene {gene.gene_id}\n")
+            f.write(f"{SEQUENCE_NAME}\tAUGUSTUS\tgene\t{gene.start}\t{gene.end}\t1\t+\t.\t{gene.gene_id}\n")
+            f.write(f"{SEQUENCE_NAME}\tAUGUSTUS\ttranscript\t{gene.start}\t{gene.end}\t.\t+\t.\t{gene.gene_id}.t1\n")
+            f.write(f"{SEQUENCE_NAME}\tAUGUSTUS\tstart_codon\t{gene.start}\t{gene.start + 2}\t.\t+\t0\t{attributes}\n")
+            for start, end in gene.cds:
+                f.write(f"{SEQUENCE_NAME}\tAUGUSTUS\tCDS\t{start}\t{end}\t.\t+\t0\t{attributes}\n")
+            f.write(f"{SEQUENCE_NAME}\tAUGUSTUS\tstop_codon\t{gene.end - 2}\t{gene.end}\t.\t+\t0\t{attributes}\n")
+            lines = [gene.protein[i:i + GFF_PROTEIN_LINE_WIDTH] for i in range(0, len(gene.protein), GFF_PROTEIN_LINE_WIDTH)]
+            lines[-1] += "]"
+            f.write(f"# protein sequence = [{lines[0]}\n")
+            for line in lines[1:]:
+                f.write(f"# {line}\n")
+            f.write("# Evidence for and against this transcript:\n")
+            f.write("# % of transcript supported by hints (any source): 0\n")
+            f.write(f"# end gene {gene.gene_id}\n")
+        f.write("###\n")
+
+
+def go_term_id(index):
+    return f"GO:{index:07d}"
+
+
+#sortie DeepGOPlus : une ligne par gène, "identifiant<TAB>GO:xxxxxxx|score<TAB>..."
+#les identifiants sont ceux produits par extract_prediction (gene1, gene2, ...)
+#même nombre de termes sur chaque ligne : extract_annotation lit le TSV comme un tableau rectangulaire
+def write_deepgoplus_tsv(path, gene_count, rng, terms_per_gene=100):
+    with open(path, "w") as f:
+        for i in range(gene_count):
+            terms = np.sort(rng.choice(GO_TERM_POOL, size=terms_per_gene, replace=False))
+            scores = rng.uniform(0.1, 1.0, size=terms_per_gene)
+            fields = "\t".join(f"{go_term_id(term)}|{score:.3f}" for term, score in zip(terms, scores))
+            f.write(f"gene{i + 1}\t{fields}\n")
+
+
+#générer un jeu de données complet dans output_dir
+def generate_dataset(output_dir, sequence_length, genes_per_mb=100.0, seed=0):
+    os.makedirs(output_dir, exist_ok=True)
+    rng = np.random.default_rng(seed)
+    genes = synthetic_genes(sequence_length, genes_per_mb, rng)
+
+    dataset = SyntheticDataset(
+        sequence_length=sequence_length,
+        genes_per_mb=genes_per_mb,
+        input_fasta=os.path.join(output_dir, "input_sequences.fasta"),
+        augustus_gff=os.path.join(output_dir, "augustus_output.gff"),
+        deepgoplus_tsv=os.path.join(output_dir, "deepgoplus_output.tsv"),
+        gene_count=len(genes)
+    )
+    write_fasta_sequence(dataset.input_fasta, SEQUENCE_NAME, random_genome(sequence_length, rng))
+    write_augustus_gff(dataset.augustus_gff, genes, sequence_length)
+    write_deepgoplus_tsv(dataset.deepgoplus_tsv, len(genes), rng)
+    return dataset
+
+
+#remplaçant de l'API QuickGO (scripts/functions_go.search_go_info) : nom et définition déterministes
+#latency (secondes) simule le temps de réponse du service pour chaque appel
+class FakeQuickGO:
+    def __init__(self, latency=0.0):
+        self.latency = latency
+        self.calls = 0
+
+    def __call__(self, go_id):
+        self.calls += 1
+        if self.latency:
+            time.sleep(self.latency)
+        number = go_id.split(":")[-1]
+        return (f"synthetic process {number}",
+                f"The chemical reactions and pathways involving synthetic entity {number}, "
+                f"as defined for benchmarking purposes.")
+
+
+#remplaçant du résumé LLM (scripts/llm_gemini_resume.run_llm_resume) : début de la description
+def fake_llm_resume(description):
+    return description.split(",")[0] + "."
+
+
+#remplaçant d'ESMFold (scripts/protein_model.predict_structure) : squelette N, CA, C, O le long
+#d'une hélice, pLDDT entre 0 et 1 dans les B-factors comme l'API ESMAtlas
+def fake_esmfold(sequence, max_retries=3, wait_time=5):
+    lines = []
+    atom_number = 1
+    seed = zlib.crc32(sequence.encode("ascii"))
+    rng = np.random.default_rng(seed)
+    plddt = np.clip(rng.normal(0.75, 0.15, size=len(sequence)), 0.2, 0.98)
+    for i, residue in enumerate(sequence):
+        angle = i * 100.0 * math.pi / 180.0
+        x, y, z = 2.3 * math.cos(angle), 2.3 * math.sin(angle), 1.5 * i
+        for offset, atom in enumerate(("N", "CA", "C", "O")):
+            lines.append(
+                f"ATOM  {atom_number:5d}  {atom:<3s} {THREE_LETTER.get(residue, 'UNK')} A{i + 1:4d}    "
+                f"{x + 0.5 * offset:8.3f}{y:8.3f}{z + 0.3 * offset:8.3f}  1.00{plddt[i]:6.2f}           {atom[0]}"
+            )
+            atom_number += 1
+    lines.append("TER")
+    lines.append("END")
+    return "\n".join(lines) + "\n"
+
@@ -10,8 +10,12 @@ from scripts.database import (
     update_user_profile,
     reset_user_password,
     log_activity,
+    remove_user_profile_photo,
     users_col
 )
+from scripts.profile_photos import store_profile_photo
+from components.session_cache import get_session_user, invalidate_session_user
+from components.profile_photo import profile_photo_html
 
 
 def display_profile_page():
@@ -24,7 +28,7 @@ def display_profile_page():
         return
     
     user_id = st.session_state['user_id']
-    user = get_user_by_id(user_id)
+    user = get_session_user(user_id)
     
     if not user:
         st.error("User not found.")
@@ -88,33 +92,7 @@ def display_profile_photo_section(user, user_id):
         # Display current profile photo with circular styling
         st.markdown('<div class="profile-photo-container">', unsafe_allow_html=True)
         
-        if 'profile_photo' in user and user['profile_photo']:
-            try:
-                photo_data = base64.b64decode(user['profile_photo'])
-                image = Image.open(io.BytesIO(photo_data))
-                
-                # Save the image to a bytes buffer
-                buffered = io.BytesIO()
-                image.save(buffered, format="PNG")
-                img_str = base64.b64encode(buffered.getvalue()).decode()
-                
-                # Display the image with circular CSS
-                st.markdown(f"""
-                <img src="data:image/png;base64,{img_str}" class="profile-circular-image" alt="Profile Photo">
-                """, unsafe_allow_html=True)
-            except Exception as e:
-                st.error(f"Error displaying profile photo: {str(e)}")
-                # Use a better default profile icon with circular shape
-                st.markdown("""
-                <img src="https://cdn.pixabay.com/photo/2015/10/05/22/37/blank-profile-picture-973460_960_720.png" 
-                     class="profile-circular-image" alt="Default Profile">
-                """, unsafe_allow_html=True)
-        else:
-            # Use a better default profile icon with circular shape
-            st.markdown("""
-            <img src="https://cdn.pixabay.com/photo/2015/10/05/22/37/blank-profile-picture-973460_960_720.png" 
-                 class="profile-circular-image" alt="Default Profile">
-            """, unsafe_allow_html=True)
+        st.markdown(profile_photo_html(user_id, "large", "profile-circular-image"), unsafe_allow_html=True)
         
         st.markdown('</div>', unsafe_allow_html=True)
     
@@ -193,49 +171,13 @@ def display_profile_photo_section(user, user_id):
         st.markdown('</div>', unsafe_allow_html=True)
 
 
-# Fonctions à remplacer dans account_settings.py pour le traitement des photos
-
+#photo redimensionnée et stockée par tailles dans GridFS (voir scripts/profile_photos.py)
 def update_profile_photo(user_id, uploaded_file):
     try:
-        # Open the uploaded image
-        image = Image.open(uploaded_file)
-        
-        # Convert to RGB if the image is in RGBA mode (handles PNG transparency)
-        if image.mode == 'RGBA':
-            # Create a white background image
-            background = Image.new('RGB', image.size, (255, 255, 255))
-            # Paste the image on the background
-            background.paste(image, mask=image.split()[3])  # 3 is the alpha channel
-            image = background
-        elif image.mode != 'RGB':
-            image = image.convert('RGB')
-        
-        # Make the image square by cropping to a square from the center
-        width, height = image.size
-        if width != height:
-            # Determine the size of the square (min of width/height)
-            new_size = min(width, height)
-            # Calculate coordinates for cropping from center
-            left = (width - new_size) / 2
-            top = (height - new_size) / 2
-            right = (width + new_size) / 2
-            bottom = (height + new_size) / 2
-            
-            # Crop the image
-            image = image.crop((left, top, right, bottom))
-        
-        # Resize image to standard size (150x150 px)
-        image = image.resize((150, 150), Image.LANCZOS)  # LANCZOS is better quality than the default
-        
-        # Convert to bytes
-        buffered = io.BytesIO()
-        image.save(buffered, format="JPEG", quality=90)  # Use higher quality
-        img_str = base64.b64encode(buffered.getvalue()).decode()
+        photo_hash = store_profile_photo(user_id, uploaded_file)
+        invalidate_session_user()
         
-        # Update the profile photo in database
-        result = update_user_profile(user_id, {"profile_photo": img_str})
-        
-        if result:
+        if photo_hash:
             # Log the profile photo update
             log_activity(user_id, "profile_photo_update", "Updated profile photo")
             return True, "Profile photo updated successfully!"
@@ -246,8 +188,9 @@ def update_profile_photo(user_id, uploaded_file):
 
 def remove_profile_photo(user_id):
     try:
-        # Set the profile_photo field to None
-        result = update_user_profile(user_id, {"profile_photo": None})
+        # Unset the photo reference (files no longer used by any user are deleted)
+        result = remove_user_profile_photo(user_id)
+        invalidate_session_user()
         
         if result:
             # Log the profile photo removal
@@ -307,6 +250,7 @@ def update_username(user_id, new_username):
         
         # Update the username
         result = update_user_profile(user_id, {"username": new_username})
+        invalidate_session_user()
         
         if result:
             # Log the username change
@@ -371,9 +315,9 @@ def display_password_section(user, user_id):
                 if not is_valid:
                     st.error(message)
                 else:
-                    # Verify current password first
-                    
-                    if not check_password_hash(user["password_hash"], current_password):
+                    # Verify current password first (the hash is not part of the session user)
+                    stored = get_user_by_id(user_id, {"password_hash": 1}) or {}
+                    if not check_password_hash(stored.get("password_hash", ""), current_password):
                         st.error("Current password is incorrect.")
                     else:
                         # Reset password
@@ -2,8 +2,7 @@ import streamlit as st
 import re
 import time
 from datetime import datetime, timedelta
-from PIL import Image
-from scripts.database import verify_user, register_user, reset_user_password
+from components.session_cache import invalidate_session_user
 
 #créer la barre de progression
 def simulate_progress(label="..."):
@@ -38,9 +37,11 @@ def clear_auth_cookie():
         del st.session_state['user_id']
     if 'user_name' in st.session_state:
         del st.session_state['user_name']
+    invalidate_session_user()
     st.session_state['logged_in'] = False
 
 #code de la page d'authentification 
+#scripts.database (connexion MongoDB) n'est importé qu'à la soumission d'un formulaire
 def authentication():
 
 
@@ -54,8 +55,7 @@ def authentication():
         st.session_state['logged_in'] = True
         st.session_state['current_user'] = st.session_state.get('user_name', 'User')
 
-    image = Image.open('./assets/genevision.png')  # Adjusted path
-    st.image(image, use_column_width=True)
+    st.image('./assets/genevision.png', use_column_width=True)  # Adjusted path
     st.markdown("#### <i>Please authenticate to continue</i>", unsafe_allow_html=True)
 
     if not st.session_state.get('logged_in', False):
@@ -75,6 +75,7 @@ def authentication():
 
                 if submit_login:
                     # Verify against MongoDB
+                    from scripts.database import verify_user
                     user = verify_user(email, password)
                     if user:
                         # Store MongoDB user_id in session
@@ -114,6 +115,7 @@ def authentication():
                     else:
                         simulate_progress("Creating your account...")
                         # Register user directly in MongoDB
+                        from scripts.database import register_user
                         success, message, user_id = register_user(new_username, new_email, new_password)
                         if success:
                             st.success(message)
@@ -141,6 +143,7 @@ def authentication():
                         st.error("Password must be strong: 6+ chars, 2+ digits, 1+ special character.")
                     else:
                         # Reset password in MongoDB
+                        from scripts.database import reset_user_password
                         if reset_user_password(reset_email, new_pass):
                             st.success("Password reset successful. You can now log in.")
                         else:
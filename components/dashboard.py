@@ -1,23 +1,20 @@
 import streamlit as st
 import os
-from PIL import Image
 from datetime import datetime
-import base64
-import io
 
 from streamlit_option_menu import option_menu
 
 from components.authentication import check_auth_cookie, clear_auth_cookie
-from components.results_steps import display_step_results, display_stepper
+from components.session_cache import get_session_user
+from components.profile_photo import profile_photo_html
 from scripts.database import (
-    get_user_by_id,
     create_sequence,
     update_sequence,
     log_activity
 )
 
-from components.history import display_history_page
-from components.account_settings import display_profile_page
+# Les pages (analyse, historique, compte) sont importées à leur premier affichage :
+# pandas, Biopython, py3Dmol, reportlab et PIL ne sont chargés que par la page qui les utilise
 
 # Fonction principale du dashboard modifiée avec le stepper
 def dashboard():
@@ -40,7 +37,8 @@ def dashboard():
     # Ensure user_id is set in both auth_user_id and user_id for consistency
     st.session_state['user_id'] = user_id
     
-    user_data = get_user_by_id(user_id) if user_id else None
+    # Read once per session (without the photo blob), see components/session_cache.py
+    user_data = get_session_user(user_id) if user_id else None
     
     if not user_data:
         st.error("User information not found. Please log in again.")
@@ -88,8 +86,10 @@ def dashboard():
     if selected_page == "Annotate Sequence":
         display_sequence_entry(user_id, username)
     elif selected_page == "Analysis History":
+        from components.history import display_history_page
         display_history_page()
     elif selected_page == "Account Settings":
+        from components.account_settings import display_profile_page
         display_profile_page()
 
     st.markdown("---")
@@ -113,7 +113,7 @@ def dashboard():
             return
         
         user_id = st.session_state['user_id']
-        user = get_user_by_id(user_id)
+        user = get_session_user(user_id)
         
         if not user:
             return
@@ -156,33 +156,8 @@ def dashboard():
             col1, col2, col3 = st.columns([1,2,4])
             
             with col2:
-                # Display profile photo in circular shape
-                if 'profile_photo' in user and user['profile_photo']:
-                    try:
-                        photo_data = base64.b64decode(user['profile_photo'])
-                        image = Image.open(io.BytesIO(photo_data))
-                        
-                        # Save the image to a bytes buffer
-                        buffered = io.BytesIO()
-                        image.save(buffered, format="PNG")
-                        img_str = base64.b64encode(buffered.getvalue()).decode()
-                        
-                        # Display the image with circular CSS
-                        st.markdown(f"""
-                        <img src="data:image/png;base64,{img_str}" class="sidebar-circular-image">
-                        """, unsafe_allow_html=True)
-                    except Exception:
-                        # Use a better default profile icon with circular shape
-                        st.markdown("""
-                        <img src="https://cdn.pixabay.com/photo/2015/10/05/22/37/blank-profile-picture-973460_960_720.png" 
-                            class="sidebar-circular-image" alt="Default Profile">
-                        """, unsafe_allow_html=True)
-                else:
-                    # Use a better default profile icon with circular shape
-                    st.markdown("""
-                    <img src="https://cdn.pixabay.com/photo/2015/10/05/22/37/blank-profile-picture-973460_960_720.png" 
-                        class="sidebar-circular-image" alt="Default Profile">
-                    """, unsafe_allow_html=True)
+                # Display profile photo in circular shape (stored sizes, memoized by content hash)
+                st.markdown(profile_photo_html(user_id, "small", "sidebar-circular-image"), unsafe_allow_html=True)
             
             with col3:
                 # Display username with better styling
@@ -195,12 +170,11 @@ def dashboard():
 
 #Affiche l'interface d'entrée de séquence et gère l'analyse étape par étape
 def display_sequence_entry(user_id, username):
-    
+    from components.results_steps import display_step_results, display_stepper
     
     # Use relative path for image file
     image_path = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'assets', 'genevision.png')
-    image = Image.open(image_path)
-    st.image(image, use_column_width=True)
+    st.image(image_path, use_column_width=True)
     
     st.markdown(f"""
     <div style="text-align: center; font-size: 18px; margin-top: 10px;">
@@ -265,6 +239,9 @@ def display_sequence_entry(user_id, username):
             st.session_state['steps_completed'] = []
             st.session_state['saved_sequence'] = False
             st.session_state['sequence_id'] = None
+            # nouvelle entrée : nouvel enregistrement, nouvelle validation et nouvelle empreinte
+            for key in ('db_sequence_id', 'input_hash', 'analysis_key', 'input_validation', 'upload_choice'):
+                st.session_state.pop(key, None)
             
             # Réinitialiser les résultats finaux
             if 'show_final_results' in st.session_state:
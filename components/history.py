@@ -2,19 +2,24 @@ import streamlit as st
 from datetime import datetime, timedelta
 import os
 
-# Import the report generation function
-from scripts.rapport_results import generate_genevision_report
+# Reports are rendered once per analysis results and served from the cache afterwards
+# (scripts.report_cache and scripts.batch_export load reportlab: imported when a report is requested)
 # Import functions from database.py
 from scripts.database import (
-    get_user_sequences,
+    get_user_sequences_page,
+    count_user_sequences,
     get_sequence,
-    get_sequence_results,
     get_sequence_reports,
     delete_sequence,
     get_activity_statistics,
-    create_report
+    get_user_history_page,
+    get_user_stats,
+    log_activity
 )
 
+# entrées d'activité chargées par page dans "Recent activity"
+ACTIVITY_PAGE_SIZE = 20
+
 def display_history_page():
     """Main function for displaying the history page"""
     
@@ -30,8 +35,22 @@ def display_history_page():
     # Display Usage Summary at the top
     display_usage_summary(user_id)
     
+    # Pages kept in session state are reloaded as soon as a new activity is recorded for the user
+    # (sequence saved, analysis completed, sequence deleted...), from this session or another one
+    version = get_listing_version(user_id)
+    
     # Display Sequences section
-    display_sequences_section(user_id)
+    display_sequences_section(user_id, version)
+    
+    # Display activity log
+    display_activity_section(user_id, version)
+
+
+#version des listes paginées : compteurs d'activité de user, modifiés à chaque log_activity
+def get_listing_version(user_id):
+    stats = get_user_stats(user_id) or {}
+    updated_at = stats.get("updated_at")
+    return stats.get("total", 0), updated_at.isoformat() if updated_at else None
 
 
 def display_usage_summary(user_id):
@@ -39,9 +58,8 @@ def display_usage_summary(user_id):
     
     st.subheader("Usage Summary")
     
-    # Get statistics and sequences for metrics
+    # Get statistics (precomputed counters) and sequence counts for metrics
     stats = get_activity_statistics(user_id)
-    sequences = get_user_sequences(user_id, limit=100)
     
     # Process stats data
     stats_data = {}
@@ -52,8 +70,8 @@ def display_usage_summary(user_id):
             stats_data[action_type] = count
     
     # Calculate metrics
-    total_sequences = len(sequences) if sequences else 0
-    completed = sum(1 for s in sequences if s.get("status") == "completed") if sequences else 0
+    total_sequences = count_user_sequences(user_id)
+    completed = count_user_sequences(user_id, status="completed")
     total_activities = sum(stats_data.values()) if stats_data else 0
     completion_rate = round((completed / total_sequences) * 100, 1) if total_sequences > 0 else 0
     
@@ -139,7 +157,8 @@ def display_usage_summary(user_id):
 
 
 #afficher les sequences de user avec option de filtrage
-def display_sequences_section(user_id):
+#version: les pages chargées sont rechargées quand elle change (voir get_listing_version)
+def display_sequences_section(user_id, version=None):
     
     
     st.subheader("My Analyzed Sequences")
@@ -149,7 +168,7 @@ def display_sequences_section(user_id):
     
     with col1:
         limit_value = st.text_input(
-            "Maximum sequences to display",
+            "Sequences per page",
             placeholder="10",
             key="limit_value"
         )
@@ -191,47 +210,45 @@ def display_sequences_section(user_id):
                 key="end_date"
             )
   
-    # Convert limit to integer with validation
+    # Convert page size to integer with validation
     try:
-        limit = int(limit_value) if limit_value.strip() else 10
-        if limit <= 0:
+        page_size = int(limit_value) if limit_value.strip() else 10
+        if page_size <= 0:
             st.warning("Please enter a positive number")
-            limit = 10
+            page_size = 10
     except ValueError:
         st.warning("Please enter a valid number")
-        limit = 10
+        page_size = 10
     
-    # Retrieve sequences
-    all_sequences = get_user_sequences(user_id, limit=limit)
-    
-    # Filter by status "analyzed"
-    analyzed_sequences = [seq for seq in all_sequences if seq.get("status", "").lower() == "analyzed"]
-    
-    # Apply time filter
+    # Date range and sort order are applied by the database query
+    start_datetime = None
+    end_datetime = None
     if time_filter == "Custom period" and start_date and end_date:
-        # Convert date objects to datetime for proper comparison
-        start_datetime = datetime.combine(start_date, datetime.min.time())
-        # Add one day to end_date to include the entire end date (until 23:59:59)
-        end_datetime = datetime.combine(end_date, datetime.max.time())
-        
         # Check if end date is before start date
         if end_date < start_date:
             st.warning("End date cannot be before start date")
-            filtered_sequences = analyzed_sequences
         else:
-            filtered_sequences = [
-                seq for seq in analyzed_sequences 
-                if start_datetime <= seq.get("created_at", datetime.min) <= end_datetime
-            ]
-    else:
-        filtered_sequences = analyzed_sequences
+            # Convert date objects to datetime, end date included until 23:59:59
+            start_datetime = datetime.combine(start_date, datetime.min.time())
+            end_datetime = datetime.combine(end_date, datetime.max.time())
+    
+    filters = {
+        "user_id": user_id,
+        "page_size": page_size,
+        "status": "analyzed",
+        "start_date": start_datetime,
+        "end_date": end_datetime,
+        "ascending": sort_option == "Oldest"
+    }
     
-    # Apply sorting
-    if sort_option == "Most recent":
-        filtered_sequences = sorted(filtered_sequences, key=lambda x: x.get("created_at", datetime.min), reverse=True)
-    elif sort_option == "Oldest":
-        filtered_sequences = sorted(filtered_sequences, key=lambda x: x.get("created_at", datetime.min))
-
+    # Pages already loaded are kept in session state until the filters or the user's activity change
+    listing = st.session_state.get('history_sequences')
+    if not listing or listing["filters"] != filters or listing.get("version") != version:
+        listing = {"filters": filters, "version": version, "sequences": [], "cursor": None, "exhausted": False}
+        st.session_state['history_sequences'] = listing
+        load_more_sequences()
+    
+    filtered_sequences = listing["sequences"]
     
     # Display sequences
     if not filtered_sequences:
@@ -242,13 +259,120 @@ def display_sequences_section(user_id):
     else:
         # Display number of sequences
         date_range_msg = f" between {start_date} and {end_date}" if time_filter == "Custom period" else ""
-        st.write(f"**{len(filtered_sequences)}** analyzed sequences found{date_range_msg}")
+        more_msg = "" if listing["exhausted"] else " (more available)"
+        st.write(f"**{len(filtered_sequences)}** analyzed sequences shown{date_range_msg}{more_msg}")
         
         # Display sequences as cards
         for i, seq in enumerate(filtered_sequences):
             display_sequence_card(seq, i, user_id)
+        
+        if not listing["exhausted"]:
+            st.button("⬇️ **Load more**", key="load_more_sequences",
+                      on_click=load_more_sequences, use_container_width=True)
+        
+        # Export several analyses at once
+        display_bulk_export(filtered_sequences, user_id)
+
+
+#charger la page suivante de séquences (curseur keyset conservé dans la session)
+def load_more_sequences():
+    listing = st.session_state.get('history_sequences')
+    if not listing or listing["exhausted"]:
+        return
+    
+    filters = listing["filters"]
+    sequences, next_cursor = get_user_sequences_page(
+        filters["user_id"],
+        page_size=filters["page_size"],
+        cursor=listing["cursor"],
+        status=filters["status"],
+        start_date=filters["start_date"],
+        end_date=filters["end_date"],
+        ascending=filters["ascending"]
+    )
+    listing["sequences"].extend(sequences)
+    listing["cursor"] = next_cursor
+    listing["exhausted"] = next_cursor is None
 
 
+#journal d'activité de user, page par page (même pagination keyset que les séquences)
+def display_activity_section(user_id, version=None):
+    with st.expander("🕒 Recent activity"):
+        listing = st.session_state.get('history_activity')
+        if not listing or listing["user_id"] != user_id or listing.get("version") != version:
+            listing = {"user_id": user_id, "version": version, "entries": [], "cursor": None, "exhausted": False}
+            st.session_state['history_activity'] = listing
+            load_more_activity()
+        
+        if not listing["entries"]:
+            st.info("No recorded activity.")
+            return
+        
+        for entry in listing["entries"]:
+            timestamp = entry["timestamp"].strftime("%Y-%m-%d %H:%M") if entry.get("timestamp") else ""
+            action = entry.get("action_type", "").replace("_", " ").capitalize()
+            description = f" — {entry['description']}" if entry.get("description") else ""
+            st.write(f"`{timestamp}` {action}{description}")
+        
+        if not listing["exhausted"]:
+            st.button("⬇️ **Load more activity**", key="load_more_activity",
+                      on_click=load_more_activity, use_container_width=True)
+
+
+#charger la page suivante du journal d'activité (curseur keyset conservé dans la session)
+def load_more_activity():
+    listing = st.session_state.get('history_activity')
+    if not listing or listing["exhausted"]:
+        return
+    
+    entries, next_cursor = get_user_history_page(listing["user_id"], page_size=ACTIVITY_PAGE_SIZE,
+                                                 cursor=listing["cursor"])
+    listing["entries"].extend(entries)
+    listing["cursor"] = next_cursor
+    listing["exhausted"] = next_cursor is None
+
+
+#export groupé des séquences affichées : ZIP des rapports PDF + annotations combinées
+def display_bulk_export(sequences, user_id):
+    st.markdown("### Bulk Export")
+    
+    options = {
+        f"{seq.get('created_at', datetime.utcnow()).strftime('%m/%d/%Y %H:%M')} - {seq['_id']}": seq["_id"]
+        for seq in sequences
+    }
+    selected = st.multiselect("Select analyses to export", list(options), key="bulk_export_selection")
+    
+    if st.button("📦 **Export selected**", key="bulk_export", disabled=not selected, use_container_width=True):
+        progress_bar = st.progress(0)
+        
+        def update_progress(done, total):
+            progress_bar.progress(int(100 * done / total) if total else 100)
+        
+        from scripts.batch_export import export_analyses
+        
+        user_name = st.session_state.get('current_user', 'user').replace(' ', '_').lower()
+        with st.spinner("Rendering reports..."):
+            zip_path, report_count, errors = export_analyses(
+                [options[label] for label in selected], user_name, update_progress
+            )
+        st.session_state['bulk_export'] = {"path": zip_path, "count": report_count, "errors": errors}
+        log_activity(user_id, "bulk_export", f"Exported {report_count} analysis reports")
+    
+    # Download the last export of the session
+    export = st.session_state.get('bulk_export')
+    if export and os.path.exists(export["path"]):
+        if export["errors"]:
+            st.warning(f"{len(export['errors'])} analyses could not be exported (see errors.txt in the archive).")
+        with open(export["path"], "rb") as zip_file:
+            st.download_button(
+                label=f"📥 **Download export ({export['count']} reports)**",
+                data=zip_file,
+                file_name=os.path.basename(export["path"]),
+                mime="application/zip",
+                key="download_bulk_export",
+                use_container_width=True
+            )
+
 #card de chaque sequence qui contient les options et les détails
 def display_sequence_card(seq, index, user_id):
     
@@ -310,10 +434,10 @@ def display_sequence_card(seq, index, user_id):
         
         # Middle section - Sequence preview (full width)
         st.markdown("### Sequence Preview")
-        content = seq.get("content", "")
+        content = seq.get("content_preview", seq.get("content", ""))
         if content:
-            # Format as a bioinformatics sequence
-            content = content[:180] + "..." if len(content) > 180 else content
+            # Format as a bioinformatics sequence (the listing only loads the first 180 characters)
+            content = content[:180] + "..." if len(content) >= 180 else content
             
             st.code(content)
         
@@ -343,6 +467,7 @@ def display_sequence_card(seq, index, user_id):
                                      disabled=delete_disabled,
                                      use_container_width=True):
                 if delete_sequence(seq_id, user_id):
+                    st.session_state.pop('history_sequences', None)
                     st.success("Sequence deleted successfully!")
                     st.experimental_rerun()
                 else:
@@ -350,6 +475,7 @@ def display_sequence_card(seq, index, user_id):
 
 #genérer rapport pdf du sequence
 def generate_sequence_report_for_download(seq_id, user_id):
+    from scripts.report_cache import load_report_source, submit_report
     
     # Get sequence data
     sequence = get_sequence(seq_id)
@@ -357,32 +483,18 @@ def generate_sequence_report_for_download(seq_id, user_id):
         st.error("Sequence not found")
         return None
     
-    # Get analysis results
-    results = get_sequence_results(seq_id)
-    if not results:
+    # Get analysis results (first result) and their fingerprint
+    analysis_data, fingerprint = load_report_source(seq_id)
+    if analysis_data is None:
         st.error("No analysis results available for this sequence")
         return None
     
-    # Use the first result
-    analysis_data = results[0].get("data", {})
-    
-    # Generate a filename using OS-independent path joining
-    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-    output_dir = os.path.join("reports")
-    os.makedirs(output_dir, exist_ok=True)  # Ensure directory exists
-    output_filename = f"genevision_report_{seq_id}_{timestamp}.pdf"
-    output_path = os.path.join(output_dir, output_filename)
-    
-    # Generate the report
+    # Generate the report, or reuse the one already rendered for these results
     try:
-        report_path = generate_genevision_report(analysis_data, output_path)
-        
-        # Save report information to database with normalized path
-        report_content = {"report_path": os.path.normpath(report_path)}
-        create_report(seq_id, report_content)
+        report = submit_report(seq_id, fingerprint, lambda: analysis_data).result()
         
         # Read the file for download
-        with open(report_path, "rb") as file:
+        with open(report["report_path"], "rb") as file:
             pdf_data = file.read()
         
         # Return the data for download
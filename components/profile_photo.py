@@ -0,0 +1,32 @@
+#affichage des photos de profil : les octets d'une taille sont lus une fois dans GridFS puis mémorisés
+#par (empreinte, taille) pour toutes les sessions ; l'empreinte identifie le contenu, l'entrée
+#mémorisée n'est jamais périmée (une nouvelle photo a une nouvelle empreinte)
+import base64
+
+import streamlit as st
+
+from components.session_cache import get_session_user_photo
+
+DEFAULT_PROFILE_PHOTO = "https://cdn.pixabay.com/photo/2015/10/05/22/37/blank-profile-picture-973460_960_720.png"
+
+
+#une photo introuvable lève LookupError : l'échec n'est pas mémorisé
+@st.cache_data(show_spinner=False, max_entries=256)
+def profile_photo_data_url(photo_hash, size):
+    from scripts.database import get_profile_photo
+    content = get_profile_photo(photo_hash, size)
+    if content is None:
+        raise LookupError(f"profile photo {photo_hash} ({size}) not found")
+    return f"data:image/jpeg;base64,{base64.b64encode(content).decode()}"
+
+
+#balise <img> de la photo de l'utilisateur (photo par défaut si absente ou illisible)
+def profile_photo_html(user_id, size, css_class, alt="Profile Photo"):
+    photo_hash = get_session_user_photo(user_id)
+    try:
+        src = profile_photo_data_url(photo_hash, size) if photo_hash else None
+    except LookupError:
+        src = None
+    if src is None:
+        return f'<img src="{DEFAULT_PROFILE_PHOTO}" class="{css_class}" alt="Default Profile">'
+    return f'<img src="{src}" class="{css_class}" alt="{alt}">'
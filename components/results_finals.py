@@ -1,16 +1,27 @@
 import streamlit as st
 import re
 import os
+import json
 import pandas as pd
-from Bio import SeqIO
-import py3Dmol
 from datetime import datetime
-import PyPDF2
 
-from scripts.rapport_results import generate_genevision_report
+from scripts.report_cache import REPORT_FORMATS, report_fingerprint, submit_report
+from scripts.fingerprints import fingerprint_data, fingerprint_files
 # Import necessary database functions
 from scripts.database import (create_sequence, update_sequence, 
-                      create_analysis_result, create_report, log_activity)
+                      create_analysis_result, log_activity)
+from components.session_cache import write_once
+from components.results_loader import ResultPaths, load_results_bundle, records_to_fasta
+from components.sequence_viewer import display_sequence_viewer
+from components.structure_viewer import (display_structure_viewer, display_model_confidence,
+                                         structure_quality_table)
+from scripts.model_confidence import confidence_bands, load_plddt
+from scripts.fasta_validation import read_normalized_sequence
+from components.results_steps import SEQUENCE_CONTENT_MAX
+
+# formats de rapport proposés (libellé -> clé de scripts/report_cache.REPORT_FORMATS)
+REPORT_FORMAT_LABELS = {"PDF": "pdf", "HTML": "html", "JSON": "json"}
+REPORT_MIME_TYPES = {"pdf": "application/pdf", "html": "text/html", "json": "application/json"}
 
 # Modification de la fonction d'affichage des résultats finaux
 def display_results():
@@ -21,25 +32,32 @@ def display_results():
     annotation_csv = "C:\\Users\\MSI\\Documents\\PFE\\DNA_project\\data\\final_annotations.csv"
     protein_models_dir = "C:\\Users\\MSI\\Documents\\PFE\\DNA_project\\data\\pdb_models"
 
+    # All result files are parsed once and memoized until they change on disk
+    bundle = load_results_bundle(ResultPaths(input_sequences, predicted_genes, protein_sequences,
+                                             annotation_csv, protein_models_dir))
+
     # Store current analysis in session state if not already there
     if 'current_analysis_id' not in st.session_state and st.session_state.get('logged_in', False):
+        # The sequence saved at the upload step is reused instead of storing a second copy
+        if st.session_state.get('db_sequence_id'):
+            st.session_state['current_analysis_id'] = st.session_state['db_sequence_id']
         # Create a new sequence entry in the database if input file exists
-        if os.path.exists(input_sequences):
+        elif bundle.input_records is not None:
             user_id = st.session_state.get('user_id')
-            # Read the input sequence content
-            with open(input_sequences, 'r') as f:
-                sequence_content = f.read()
+            # Only the first SEQUENCE_CONTENT_MAX bases are stored (16 MB MongoDB document limit)
+            sequence_content = read_normalized_sequence(input_sequences, max_length=SEQUENCE_CONTENT_MAX)
             
             # Get sequence metadata
-            seq_records = list(SeqIO.parse(input_sequences, "fasta"))
             metadata = {
-                "sequence_count": len(seq_records),
-                "total_length": sum(len(rec.seq) for rec in seq_records),
+                "sequence_count": len(bundle.input_records),
+                "total_length": sum(len(rec.sequence) for rec in bundle.input_records),
                 "source_file": os.path.basename(input_sequences)
             }
             
-            # Create sequence in database
-            seq_id = create_sequence(user_id, sequence_content, metadata)
+            # Create sequence in database (the analysis fingerprint also keys its cached reports)
+            seq_id = create_sequence(user_id, sequence_content, metadata,
+                                     content_hash=st.session_state.get('input_hash'),
+                                     analysis_key=st.session_state.get('analysis_key'))
             if seq_id:
                 st.session_state['current_analysis_id'] = seq_id
                 log_activity(user_id, "sequence_analysis_started", f"Started analysis of sequence {seq_id}")
@@ -47,28 +65,26 @@ def display_results():
     #résumé global sur la prédiction et l'annotation
     st.subheader("📈 Summary Statistics")
     if st.session_state.get('logged_in', False):
-        tab1, tab2 = st.tabs(["**_Summary Statistics_**", "ℹ️"])
+        tab1, tab_composition, tab2 = st.tabs(["**_Summary Statistics_**", "**_Sequence Composition_**", "ℹ️"])
         with tab1:
-            if os.path.exists(predicted_genes) and os.path.exists(protein_sequences):
-                # Existing statistics calculations
-                gene_count = len(list(SeqIO.parse(predicted_genes, "fasta")))
-                protein_count = len(list(SeqIO.parse(protein_sequences, "fasta")))
-                sequence_length = sum(len(rec.seq) for rec in SeqIO.parse(input_sequences, "fasta"))
-                avg_gene_length = sum(len(rec.seq) for rec in SeqIO.parse(predicted_genes, "fasta")) // max(1, gene_count)
-                avg_protein_length = sum(len(rec.seq) for rec in SeqIO.parse(protein_sequences, "fasta")) // max(1, protein_count)
-
-                # Calculate GC content percentage
-                gene_sequences = [str(record.seq) for record in SeqIO.parse(predicted_genes, "fasta")]
-                gc_counts = [seq.count('G') + seq.count('C') for seq in gene_sequences]
-                total_bases = [len(seq) for seq in gene_sequences]
-                gc_percentages = [round((gc / total) * 100, 2) if total > 0 else 0 for gc, total in zip(gc_counts, total_bases)]
-                avg_gc_content = sum(gc_percentages) / len(gc_percentages) if gc_percentages else 0
+            if bundle.gene_records is not None and bundle.protein_records is not None:
+                # Statistics computed once with the bundle (scripts/sequence_stats.py)
+                gene_stats = bundle.gene_stats
+                gene_count = len(bundle.gene_records)
+                protein_count = len(bundle.protein_records)
+                sequence_length = int(bundle.input_stats.lengths.sum()) if bundle.input_stats else 0
+                avg_gene_length = int(gene_stats.lengths.sum()) // max(1, gene_count)
+                avg_protein_length = int(bundle.protein_stats.lengths.sum()) // max(1, protein_count)
+
+                # GC content over all predicted genes, weighted by gene length
+                avg_gc_content = gene_stats.overall_gc
+                gc3_content = gene_stats.overall_gc3
 
                 # Retrieve the function GO with the highest score
                 most_go_function = "`N/A`"
                 go_term_counts = {}
-                if os.path.exists(annotation_csv):
-                    df = pd.read_csv(annotation_csv)
+                if bundle.annotations is not None:
+                    df = bundle.annotations
                     if "Confidence Score" in df.columns and "Top GO Term" in df.columns and "Top GO Term Name" in df.columns:
                         top_go = df.sort_values(by="Confidence Score", ascending=False).iloc[0]
                         go_id = top_go["Top GO Term"]
@@ -80,7 +96,9 @@ def display_results():
                             go_term_counts = df["Top GO Term Name"].value_counts().to_dict()
 
                 # Store analysis results in database if we have a current analysis
+                # (written once per set of result files, re-rendering the page is read-only)
                 if 'current_analysis_id' in st.session_state:
+                    analysis_id = st.session_state['current_analysis_id']
                     analysis_data = {
                         "gene_count": gene_count,
                         "protein_count": protein_count,
@@ -88,18 +106,18 @@ def display_results():
                         "avg_gene_length": avg_gene_length,
                         "avg_protein_length": avg_protein_length,
                         "avg_gc_content": float(avg_gc_content),
+                        "gc3_content": round(gc3_content, 2),
+                        "n_content": round(gene_stats.overall_n, 2),
+                        "codon_usage": gene_stats.codon_usage(),
+                        "amino_acid_composition": bundle.protein_stats.composition_percent(),
                         "top_go_function": most_go_function.replace('`', ''),
                         "go_term_counts": go_term_counts
                     }
                     
-                    # Create analysis result in database
-                    result_id = create_analysis_result(st.session_state['current_analysis_id'], analysis_data)
-                    
-                    # Update sequence status
-                    update_sequence(
-                        st.session_state['current_analysis_id'], 
-                        st.session_state.get('user_id'),
-                        {"status": "analyzed", "gene_count": gene_count, "avg_gc_content": float(avg_gc_content)}
+                    input_fingerprint = fingerprint_files(input_sequences, predicted_genes, protein_sequences, annotation_csv)
+                    write_once(
+                        ("final_summary", analysis_id), input_fingerprint,
+                        save_final_summary, analysis_id, st.session_state.get('user_id'), analysis_data, input_fingerprint
                     )
                 
                 # Display conditional
@@ -110,7 +128,8 @@ def display_results():
                     - **Total input sequence length**: {sequence_length} bp  
                     - **Gene length**: {avg_gene_length} bp  
                     - **Protein length**: {avg_protein_length} aa  
-                    - **Average GC content**: {avg_gc_content:.2f}%  
+                    - **GC content**: {avg_gc_content:.2f}%  
+                    - **GC3 content** (third codon position): {gc3_content:.2f}%  
                     - **Most confident GO function**: {most_go_function}
                     """)
                 else:
@@ -120,12 +139,16 @@ def display_results():
                     - **Total input sequence length**: {sequence_length} bp  
                     - **Average gene length**: {avg_gene_length} bp  
                     - **Average protein length**: {avg_protein_length} aa  
-                    - **Average GC content**: {avg_gc_content:.2f}%  
+                    - **GC content**: {avg_gc_content:.2f}%  
+                    - **GC3 content** (third codon position): {gc3_content:.2f}%  
                     - **Most common GO function**: {most_go_function}
                     """)
             else:
                 st.warning("Statistics cannot be calculated because result files are missing.")
 
+        with tab_composition:
+            display_sequence_composition(bundle)
+
         with tab2:
             st.info("""
                     
@@ -137,9 +160,11 @@ def display_results():
                 - **aa** (*amino acids*): Unit used to measure the length of protein sequences.  
                 Example: `604 aa` means the protein is made up of 604 amino acids.
 
-                - **GC content**: The percentage of guanine (G) and cytosine (C) bases in DNA.
+                - **GC content**: The percentage of guanine (G) and cytosine (C) bases in DNA, computed over all predicted genes.
                 Higher GC content often indicates more stable DNA structure.
 
+                - **GC3 content**: GC content at the third position of each codon, often linked to codon usage bias.
+
                 These metrics help understand the size, composition, and complexity of predicted genes and their translated proteins.
             """)
   
@@ -149,26 +174,23 @@ def display_results():
         tab1, tab2, tab3, tab4 = st.tabs(["**_Input Sequences_**", "**_Predicted Gene Sequences_**", "**_Protein Sequences_**", "ℹ️"])
 
         with tab1: 
-            if os.path.exists(input_sequences):
-                for record in SeqIO.parse(input_sequences, "fasta"):
-                    st.markdown(f"**{record.id}**")
-                    st.code(str(record.seq), language="text")
+            if bundle.input_records is not None:
+                display_sequence_viewer(bundle.paths.input_sequences, "final_input",
+                                        records=bundle.input_records, unit="bp")
             else:
                 st.warning("No input sequences file found.")
 
         with tab2: 
-            if os.path.exists(predicted_genes):
-                for record in SeqIO.parse(predicted_genes, "fasta"):
-                    st.markdown(f"**{record.id}**")
-                    st.code(str(record.seq), language="text")
+            if bundle.gene_records is not None:
+                display_sequence_viewer(bundle.paths.predicted_genes, "final_genes",
+                                        records=bundle.gene_records, unit="bp")
             else:
                 st.warning("No predicted genes file found.")
 
         with tab3: 
-            if os.path.exists(protein_sequences):
-                for record in SeqIO.parse(protein_sequences, "fasta"):
-                    st.markdown(f"**{record.id}**")
-                    st.code(str(record.seq), language="text")
+            if bundle.protein_records is not None:
+                display_sequence_viewer(bundle.paths.protein_sequences, "final_proteins",
+                                        records=bundle.protein_records, unit="aa")
             else:
                 st.warning("No protein sequences file found.")
 
@@ -187,34 +209,20 @@ def display_results():
         tab1, tab2, tab3 = st.tabs(["**_Overview of Functional Annotations_**", "**_Detailed Annotation per Gene_**", "ℹ️"])
 
         with tab1 :
-            if os.path.exists(annotation_csv):
-                df = pd.read_csv(annotation_csv)
-                df = df.rename(columns={
+            if bundle.annotations is not None:
+                df = bundle.annotations.rename(columns={
                     "Top GO Term Name": "Function",
                 })
                 # Table résumé à afficher
                 summary_df = df[["Gene ID", "Position", "Confidence Score", "Function"]]
                 st.dataframe(summary_df, use_container_width=True)
                 
-                # Store annotation data in database if we have a current analysis
+                # Store annotation data in database if we have a current analysis (once per annotation file)
                 if 'current_analysis_id' in st.session_state:
-                    # Get annotation data for database storage
-                    annotation_data = []
-                    for _, row in df.iterrows():
-                        annotation_data.append({
-                            "gene_id": row["Gene ID"],
-                            "position": row["Position"],
-                            "confidence": float(row["Confidence Score"]),
-                            "function": row["Function"],
-                            "go_term": row.get("Top GO Term", ""),
-                            "go_description": row.get("Top GO Term Description", "")
-                        })
-                    
-                    # Update sequence with annotation data
-                    update_sequence(
-                        st.session_state['current_analysis_id'],
-                        st.session_state.get('user_id'),
-                        {"annotations": annotation_data}
+                    analysis_id = st.session_state['current_analysis_id']
+                    write_once(
+                        ("annotations", analysis_id), fingerprint_files(annotation_csv),
+                        save_annotations, analysis_id, st.session_state.get('user_id'), df
                     )
             else:
                 st.warning("No functional annotation file found.")
@@ -222,8 +230,8 @@ def display_results():
         with tab2:
             search_gene = st.text_input(" Search by Gene ID", placeholder="e.g. gene1")
             
-            if os.path.exists(annotation_csv):
-                df = pd.read_csv(annotation_csv)
+            if bundle.annotations is not None:
+                df = bundle.annotations
                 
                 if search_gene:
                     # Filtrer pour obtenir les détails du gène recherché
@@ -329,55 +337,24 @@ def display_results():
                         
                         
                         # Check if directory exists
-                        if os.path.exists(protein_models_dir):
+                        if bundle.structures is not None:
                             # Get all PDB files in the directory
-                            model_files = [f for f in os.listdir(protein_models_dir) if f.endswith('.pdb')]
+                            model_files = [model.file_name for model in bundle.structures]
                             
                             if model_files:
                                 # Create a selectbox to choose which protein model to display
                                 selected_model = st.selectbox("Select protein model to view :", model_files)
-                                model_path = os.path.join(protein_models_dir, selected_model)
+                                model = bundle.structure(selected_model)
                                 
-                                # Read the PDB file content
-                                with open(model_path, 'r') as file:
-                                    pdb_data = file.read()
-                                
-                                # Store PDB model data in database if we have a current analysis
-                                if 'current_analysis_id' in st.session_state and selected_model and not hasattr(st, '_model_data_stored'):
-                                    protein_id = selected_model.replace('.pdb', '')
-                                    update_sequence(
-                                        st.session_state['current_analysis_id'],
-                                        st.session_state.get('user_id'),
-                                        {f"protein_model_{protein_id}": {"name": selected_model, "size": len(pdb_data)}}
+                                # Store PDB model data in database if we have a current analysis (once per model)
+                                if 'current_analysis_id' in st.session_state and selected_model:
+                                    analysis_id = st.session_state['current_analysis_id']
+                                    write_once(
+                                        ("protein_model", analysis_id, selected_model), fingerprint_files(model.path),
+                                        save_protein_model_view, analysis_id, st.session_state.get('user_id'), selected_model, os.path.getsize(model.path)
                                     )
-                                    setattr(st, '_model_data_stored', True)
-                                    log_activity(st.session_state.get('user_id'), "protein_model_viewed", f"Viewed 3D model for {protein_id}")
-
-                                view = py3Dmol.view(width=600, height=400)
-                                view.addModel(pdb_data, "pdb")
-
-                                # Add some controls for the visualization
-                                style_options = st.radio(
-                                    "Visualization style :",
-                                    ("Cartoon", "Stick", "Sphere", "Line"),
-                                    horizontal=True
-                                )
-
-                                # Apply the selected style
-                                if style_options == "Cartoon":
-                                    view.setStyle({'cartoon': {'color': 'spectrum'}})
-                                elif style_options == "Stick":
-                                    view.setStyle({'stick': {'colorscheme': 'greenCarbon', 'radius': 0.2}})
-                                elif style_options == "Sphere":
-                                    view.setStyle({'sphere': {'colorscheme': 'blueCarbon', 'radius': 0.5}})
-                                elif style_options == "Line":
-                                    view.setStyle({'line': {'colorscheme': 'redCarbon', 'linewidth': 1.0}})
-
-                                view.zoomTo()
-                                view.spin(True)
-                                
-                                # Display the 3D visualization in Streamlit
-                                st.components.v1.html(view._make_html(), height=400)
+
+                                display_structure_viewer(model)
 
                             else:
                                 st.warning("No protein model files found.")
@@ -385,41 +362,39 @@ def display_results():
                             st.warning("Protein models directory not found.")
                     
                     with tab2:
-                        # Create placeholder quality metrics based on the generated models
                         st.markdown("#### Protein Model Quality Assessment")
                         
-                        if os.path.exists(protein_models_dir):
-                            model_files = [f for f in os.listdir(protein_models_dir) if f.endswith('.pdb')]
+                        if bundle.structures is not None:
+                            model_files = [model.file_name for model in bundle.structures]
                             
                             if model_files:
-                                # Create example quality data
-                                quality_data = {
-                                    "Protein ID": [f.replace('.pdb', '') for f in model_files],
-                                    "Model Length": [len(open(os.path.join(protein_models_dir, f), 'r').readlines()) for f in model_files],
-                                    "Confidence Score": [round(min(95, 75 + 20 * (i / len(model_files))), 1) for i in range(len(model_files))],
-                                    "Quality Category": ["High" if i < len(model_files)/2 else "Medium" for i in range(len(model_files))]
-                                }
-                                
-                                quality_df = pd.DataFrame(quality_data)
+                                # Quality metrics read from the model summaries (residues, chains, mean pLDDT)
+                                quality_df = structure_quality_table(bundle.structures)
                                 st.dataframe(quality_df, use_container_width=True)
                                 
-                                # Store model quality data in database
-                                if 'current_analysis_id' in st.session_state and not hasattr(st, '_quality_data_stored'):
+                                # Store model quality data in database (once per set of quality values)
+                                if 'current_analysis_id' in st.session_state:
                                     quality_info = []
-                                    for i, row in quality_df.iterrows():
+                                    for model in bundle.structures:
                                         quality_info.append({
-                                            "protein_id": row["Protein ID"],
-                                            "model_length": int(row["Model Length"]),
-                                            "confidence": float(row["Confidence Score"]),
-                                            "quality": row["Quality Category"]
+                                            "protein_id": model.protein_id,
+                                            "model_length": model.summary["residue_count"],
+                                            "chains": model.summary["chains"],
+                                            "confidence": model.summary["mean_plddt"],
+                                            "quality": model.summary["quality"]
                                         })
                                     
-                                    update_sequence(
-                                        st.session_state['current_analysis_id'],
-                                        st.session_state.get('user_id'),
+                                    analysis_id = st.session_state['current_analysis_id']
+                                    write_once(
+                                        ("protein_models_quality", analysis_id), fingerprint_data(quality_info),
+                                        update_sequence, analysis_id, st.session_state.get('user_id'),
                                         {"protein_models_quality": quality_info}
                                     )
-                                    setattr(st, '_quality_data_stored', True)
+                                
+                                # Per-residue confidence stored at prediction time (pLDDT, PAE when available)
+                                st.markdown("#### Per-residue Confidence")
+                                confidence_model = st.selectbox("Select protein model :", model_files, key="confidence_model")
+                                display_model_confidence(bundle.structure(confidence_model))
                         
                             else:
                                 st.warning("No protein models found to assess quality.")
@@ -435,11 +410,12 @@ def display_results():
                         - **3D Visualization:** Explore protein structures in different visualization styles (Cartoon, Stick, Sphere, Line)
                         - **Model Quality Assessment:** Review quality metrics for generated protein models
                         - **Multiple Models:** Compare different protein models from your sequences
-                        - **Confidence Score**: Higher values indicate greater confidence in the predicted structure
+                        - **Per-residue Confidence:** pLDDT of each residue and, when the predictor provides it, the Predicted Aligned Error
+                        - **Mean pLDDT**: Average per-residue confidence (0-100) stored in the model, higher values indicate greater confidence in the predicted structure
                         - **Quality Category**: 
-                            - High: Well-predicted structures with reliable folding patterns
-                            - Medium: Reasonably predicted structures with some uncertainty
-                            - Low: Less reliable predictions that may require refinement
+                            - High (pLDDT ≥ 70): Well-predicted structures with reliable folding patterns
+                            - Medium (50 ≤ pLDDT < 70): Reasonably predicted structures with some uncertainty
+                            - Low (pLDDT < 50): Less reliable predictions that may require refinement
                         """)
 
     # Ajout de la section pour le rapport PDF
@@ -449,55 +425,78 @@ def display_results():
         
         with tab1:
             st.info("""
-            Generate a comprehensive PDF report containing all analysis details and results,
+            Generate a report containing all analysis details and results,
             which you can download and save for future reference.
+            HTML and JSON reports are ready instantly; the PDF export takes a little longer.
             """)
             
             # Initialiser une variable d'état pour le chemin du rapport
             if 'report_path' not in st.session_state:
                 st.session_state['report_path'] = None
             
+            report_format = st.radio(
+                "Report format :",
+                tuple(REPORT_FORMAT_LABELS),
+                horizontal=True,
+                key="report_format"
+            )
+            fmt = REPORT_FORMAT_LABELS[report_format]
+            
             col1, col2, col3 = st.columns([1, 1, 1])
             with col2:
                 if st.button("⬇️ **Generate Report**"):
-                    report_path = generate_and_download_report()
-                    if report_path:
-                        st.session_state['report_path'] = report_path
+                    # The report entry (path, page count, size) is stored in the database when it is rendered
+                    report = generate_and_download_report(fmt)
+                    if report:
+                        st.session_state['report_path'] = report["report_path"]
+                        st.session_state['report_info'] = report
                         st.success("Report generated successfully!")
-                        
-                        # Store report info in database
-                        if 'current_analysis_id' in st.session_state:
-                            report_metadata = {
-                                "report_path": report_path,
-                                "generated_at": datetime.utcnow().isoformat(),
-                                "user": st.session_state.get('current_user', 'Unknown User')
-                            }
-                            
-                            # Create report entry in database
-                            report_id = create_report(
-                                st.session_state['current_analysis_id'], 
-                                report_metadata,
-                                "standard_pdf"
-                            )
-                            
-                            if report_id:
-                                log_activity(st.session_state.get('user_id'), "report_generated", f"Generated report for analysis {st.session_state['current_analysis_id']}")
             
                     # Si un rapport a été généré, afficher le lien pour le télécharger
                     if st.session_state['report_path'] and os.path.exists(st.session_state['report_path']):
-                        with open(st.session_state['report_path'], "rb") as pdf_file:
-                            PDFbyte = pdf_file.read()
+                        report_ext = os.path.splitext(st.session_state['report_path'])[1].lstrip(".")
+                        with open(st.session_state['report_path'], "rb") as report_file:
+                            report_bytes = report_file.read()
                              
                             st.download_button(
                                 label="📥 **Download Report**",
-                                data=PDFbyte,
+                                data=report_bytes,
                                 file_name=os.path.basename(st.session_state['report_path']),
-                                mime="application/pdf"
+                                mime=REPORT_MIME_TYPES.get(report_ext, "application/octet-stream")
                             )
+                        
+                        report_info = st.session_state.get('report_info')
+                        if report_info and report_info["report_path"] == st.session_state['report_path']:
+                            if report_info['page_count']:
+                                st.caption(f"{report_info['page_count']} pages · {report_info['file_size'] / 1024:.0f} KB · built in {report_info['build_seconds']:.1f} s")
+                            else:
+                                st.caption(f"{report_info['file_size'] / 1024:.0f} KB · built in {report_info['build_seconds'] * 1000:.0f} ms")
+                            
+                            # Annexes trop longues pour le PDF, écrites dans des fichiers FASTA à côté du rapport
+                            for attachment in report_info["attachments"]:
+                                with open(attachment, "rb") as fasta_file:
+                                    st.download_button(
+                                        label=f"📥 **{os.path.basename(attachment)}**",
+                                        data=fasta_file.read(),
+                                        file_name=os.path.basename(attachment),
+                                        mime="text/plain",
+                                        key=f"download_{os.path.basename(attachment)}"
+                                    )
+            
+            # Aperçu du rapport léger généré (HTML affiché tel quel, JSON dépliable)
+            report_path = st.session_state.get('report_path')
+            if report_path and os.path.exists(report_path) and not report_path.endswith(".pdf"):
+                with open(report_path, "r", encoding="utf-8") as report_file:
+                    report_text = report_file.read()
+                with st.expander("👁️ Report preview", expanded=True):
+                    if report_path.endswith(".html"):
+                        st.components.v1.html(report_text, height=800, scrolling=True)
+                    else:
+                        st.json(json.loads(report_text))
         
         with tab2:
             st.info("""
-            The PDF report includes:
+            The report (PDF, HTML or JSON) includes:
             
             - **Summary of analysis**: Overview of your input sequence and general statistics
             - **Gene prediction results**: Complete list of predicted genes with positions
@@ -505,8 +504,72 @@ def display_results():
             - **Visual charts and diagrams**: Graphical representation of key results
             
             This report is perfect for documentation, sharing with colleagues, or including in publications.
+            The JSON summary contains the same results in a machine-readable form.
             """)
 
+
+#composition des gènes prédits : profil GC, usage des codons et composition en acides aminés
+def display_sequence_composition(bundle):
+    gene_stats = bundle.gene_stats
+    if gene_stats is None or not gene_stats.ids:
+        st.warning("No predicted genes available for composition analysis.")
+        return
+    
+    selected_gene = st.selectbox("Gene for GC profile :", gene_stats.ids, key="composition_gene")
+    window = st.slider("Window size (bp)", min_value=20, max_value=500, value=100, step=10, key="gc_window")
+    positions, gc_values = gene_stats.gc_profile(gene_stats.ids.index(selected_gene), window=window)
+    if len(gc_values):
+        st.markdown(f"#### GC profile of `{selected_gene}` ({window} bp windows)")
+        st.line_chart(pd.DataFrame({"GC (%)": gc_values}, index=pd.Index(positions, name="Position")))
+    
+    st.markdown("#### Codon usage (all predicted genes)")
+    codon_usage = pd.Series(gene_stats.codon_usage(), name="Count")
+    st.bar_chart(codon_usage[codon_usage > 0])
+    
+    if bundle.protein_stats is not None:
+        st.markdown("#### Amino acid composition (%)")
+        st.bar_chart(pd.Series(bundle.protein_stats.composition_percent(), name="%"))
+
+#save du résumé final de l'analyse et du statut de la séquence
+def save_final_summary(analysis_id, user_id, analysis_data, fingerprint):
+    result_id = create_analysis_result(analysis_id, analysis_data, stage="final_summary", fingerprint=fingerprint)
+    
+    # Update sequence status
+    update_sequence(
+        analysis_id,
+        user_id,
+        {"status": "analyzed", "gene_count": analysis_data["gene_count"], "avg_gc_content": analysis_data["avg_gc_content"]}
+    )
+    return result_id
+
+#save des annotations fonctionnelles dans le document de la séquence
+def save_annotations(analysis_id, user_id, df):
+    # Get annotation data for database storage
+    annotation_data = []
+    for _, row in df.iterrows():
+        annotation_data.append({
+            "gene_id": row["Gene ID"],
+            "position": row["Position"],
+            "confidence": float(row["Confidence Score"]),
+            "function": row["Function"],
+            "go_term": row.get("Top GO Term", ""),
+            "go_description": row.get("Top GO Term Description", "")
+        })
+    
+    # Update sequence with annotation data
+    return update_sequence(analysis_id, user_id, {"annotations": annotation_data})
+
+#save des informations du modèle 3D consulté
+def save_protein_model_view(analysis_id, user_id, model_name, model_size):
+    protein_id = model_name.replace('.pdb', '')
+    updated = update_sequence(
+        analysis_id,
+        user_id,
+        {f"protein_model_{protein_id}": {"name": model_name, "size": model_size}}
+    )
+    log_activity(user_id, "protein_model_viewed", f"Viewed 3D model for {protein_id}")
+    return updated
+
 # Fonction pour collecter les données d'analyse pour le rapport
 # Improved collect_report_data function for results_finals.py
 def collect_report_data():
@@ -532,53 +595,37 @@ def collect_report_data():
         'sequence_contents': {}
     }
     
-    # Read sequence contents for the report
-    if os.path.exists(input_sequences):
-        with open(input_sequences, 'r') as f:
-            report_data['sequence_contents']['input_sequence'] = f.read()
+    bundle = load_results_bundle(ResultPaths(input_sequences, predicted_genes, protein_sequences,
+                                             annotation_csv, protein_models_dir))
     
-    if os.path.exists(predicted_genes):
-        with open(predicted_genes, 'r') as f:
-            report_data['sequence_contents']['predicted_genes'] = f.read()
+    # Sequence contents for the report, rebuilt from the parsed records
+    if bundle.input_records is not None:
+        report_data['sequence_contents']['input_sequence'] = records_to_fasta(bundle.input_records)
     
-    if os.path.exists(protein_sequences):
-        with open(protein_sequences, 'r') as f:
-            report_data['sequence_contents']['protein_sequences'] = f.read()
+    if bundle.gene_records is not None:
+        report_data['sequence_contents']['predicted_genes'] = records_to_fasta(bundle.gene_records)
     
-    # Collect structure content if available
-    structure_files = {}
-    if os.path.exists(protein_models_dir):
-        for file in os.listdir(protein_models_dir):
-            if file.endswith('.pdb'):
-                structure_files[file.replace('.pdb', '')] = os.path.join(protein_models_dir, file)
+    if bundle.protein_records is not None:
+        report_data['sequence_contents']['protein_sequences'] = records_to_fasta(bundle.protein_records)
     
     # Collect sequence statistics
-    if os.path.exists(predicted_genes) and os.path.exists(protein_sequences):
-        gene_count = len(list(SeqIO.parse(predicted_genes, "fasta")))
-        protein_count = len(list(SeqIO.parse(protein_sequences, "fasta")))
-        sequence_length = sum(len(rec.seq) for rec in SeqIO.parse(input_sequences, "fasta"))
-        
+    if bundle.gene_records is not None and bundle.protein_records is not None:
         report_data['sequence_data'] = {
-            'gene_count': gene_count,
-            'protein_count': protein_count,
-            'sequence_length': sequence_length
+            'gene_count': len(bundle.gene_records),
+            'protein_count': len(bundle.protein_records),
+            'sequence_length': int(bundle.input_stats.lengths.sum()) if bundle.input_stats else 0,
+            'input_gc_content': round(bundle.input_stats.overall_gc, 2) if bundle.input_stats else 0,
+            'gc_content': round(bundle.gene_stats.overall_gc, 2),
+            'gc3_content': round(bundle.gene_stats.overall_gc3, 2)
         }
     
     # Collect gene and annotation data
-    if os.path.exists(annotation_csv):
-        df = pd.read_csv(annotation_csv)
-        for _, row in df.iterrows():
+    if bundle.annotations is not None:
+        for _, row in bundle.annotations.iterrows():
             gene_id = row.get('Gene ID', 'Unknown')
             
-            # Check for corresponding PDB file
-            pdb_path = None
-            structure_content = None
-            if gene_id in structure_files:
-                pdb_path = structure_files[gene_id]
-                # Read the PDB content
-                if os.path.exists(pdb_path):
-                    with open(pdb_path, 'r') as f:
-                        structure_content = f.read()
+            # Structure summary of the corresponding PDB file
+            structure = bundle.structure(f"{gene_id}.pdb")
             
             gene_info = {
                 'id': gene_id,
@@ -587,103 +634,81 @@ def collect_report_data():
                 'function': row.get('Top GO Term Name', 'Unknown'),
                 'Top GO Term': row.get('Top GO Term', 'Unknown'),
                 'Top GO Term Description': row.get('Top GO Term Description', 'No description available'),
-                'structure_content': structure_content
+                'structure_summary': structure.summary if structure else None
             }
             report_data['genes'].append(gene_info)
+        
+        # Include GO annotations content
+        report_data['go_annotations_content'] = bundle.annotations.to_csv(index=False)
     
-    # Include GO annotations content
-    if os.path.exists(annotation_csv):
-        with open(annotation_csv, 'r') as f:
-            report_data['go_annotations_content'] = f.read()
+    # Per-residue confidence of each protein model (pLDDT arrays stored at prediction time)
+    report_data['structure_confidence'] = []
+    for model in bundle.structures or ():
+        plddt = load_plddt(model.path)
+        if len(plddt):
+            report_data['structure_confidence'].append({
+                'protein_id': model.protein_id,
+                'mean_plddt': model.summary['mean_plddt'],
+                'plddt': plddt.astype(float).tolist(),
+                'bands': confidence_bands(plddt)
+            })
     
     return report_data
 
 
-# Fonction pour générer et télécharger le rapport PDF
-def generate_and_download_report():
-    # Collect data for the report
-    with st.spinner("Collecting analysis data..."):
-        report_data = collect_report_data()
-    
-    # Create report directory path
-    report_dir = "C:\\Users\\MSI\\Documents\\PFE\\DNA_project\\reports"
-    os.makedirs(report_dir, exist_ok=True)
-    
-    # Generate unique filename
-    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-    user_name = st.session_state.get('current_user', 'user').replace(' ', '_').lower()
-    report_path = os.path.join(report_dir, f"genevision_report_{user_name}_{timestamp}.pdf")
+# Fonction pour générer et télécharger le rapport (fmt: "pdf", "html" ou "json")
+# Le rapport est rendu à la demande, une seule fois par (analyse, empreinte de l'analyse, version du modèle,
+# format) : les demandes suivantes, ici ou depuis l'historique, servent le fichier déjà rendu
+# (voir scripts/report_cache.py)
+def generate_and_download_report(fmt="pdf"):
+    analysis_id = st.session_state.get('current_analysis_id')
+    user_id = st.session_state.get('user_id') if st.session_state.get('logged_in', False) else None
     
     # Log report generation activity
-    if st.session_state.get('logged_in', False):
-        user_id = st.session_state.get('user_id')
-        log_activity(user_id, "report_generation_started", f"Started generating report {os.path.basename(report_path)}")
+    if user_id:
+        log_activity(user_id, "report_generation_started", f"Started generating report for analysis {analysis_id}")
     
-    # Generate the report
-    with st.spinner("Generating PDF report..."):
+    with st.spinner(f"Generating {fmt.upper()} report..."):
         try:
-            generated_path = generate_genevision_report(report_data, report_path)
+            fingerprint = report_fingerprint(analysis_id) if analysis_id else None
+            if fingerprint:
+                # Rendered in the background worker (or served from the cache), then awaited here
+                report = submit_report(analysis_id, fingerprint, collect_report_data, fmt).result()
+            else:
+                # No saved analysis to key the cache on: render directly
+                report = build_uncached_report(fmt)
             
             # Log successful report generation
-            if st.session_state.get('logged_in', False):
-                user_id = st.session_state.get('user_id')
-                log_activity(user_id, "report_generation_completed", f"Successfully generated report {os.path.basename(report_path)}")
-                
-                # Store report in database
-                if 'current_analysis_id' in st.session_state:
-                    report_metadata = {
-                        "report_path": generated_path,
-                        "generated_at": datetime.utcnow().isoformat(),
-                        "user": st.session_state.get('current_user', 'Unknown User'),
-                        "page_count": count_pdf_pages(generated_path)  # You would need to implement this function
-                    }
-                    
-                    create_report(
-                        st.session_state['current_analysis_id'], 
-                        report_metadata,
-                        "standard_pdf"
-                    )
+            if user_id:
+                log_activity(user_id, "report_generation_completed", f"Successfully generated report {os.path.basename(report['report_path'])}")
             
-            return generated_path
+            return report
         except Exception as e:
             st.error(f"Error generating report: {str(e)}")
-            if st.session_state.get('logged_in', False):
-                user_id = st.session_state.get('user_id')
+            if user_id:
                 log_activity(user_id, "report_generation_failed", f"Failed to generate report: {str(e)}")
             return None
 
-# Helper function to count PDF pages
-def count_pdf_pages(pdf_path):
-    try:
-        
-        with open(pdf_path, 'rb') as f:
-            pdf_reader = PyPDF2.PdfFileReader(f)
-            return pdf_reader.numPages
-    except:
-        return 0  # Return 0 if we can't count pages
-    # Collecter les données pour le rapport
+#rendre le rapport sans cache (analyse non enregistrée en base)
+def build_uncached_report(fmt="pdf"):
     report_data = collect_report_data()
     
-    # Chemin de sauvegarde du rapport
+    # Create report directory path
     report_dir = "C:\\Users\\MSI\\Documents\\PFE\\DNA_project\\reports"
     os.makedirs(report_dir, exist_ok=True)
-    timestamp = datetime.now().strftime("%Y%m%d")
-    user_name = st.session_state.get('current_user', 'user').replace(' ', '_').lower()
-    report_path = os.path.join(report_dir, f"genevision_report_{user_name}_{timestamp}.pdf")
     
-    # Log report generation activity for the user
-    if st.session_state.get('logged_in', False):
-        user_id = st.session_state.get('user_id')
-        log_activity(user_id, "report_generation_started", f"Started generating report {os.path.basename(report_path)}")
+    # Generate unique filename
+    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+    user_name = st.session_state.get('current_user', 'user').replace(' ', '_').lower()
+    _, extension, build_report = REPORT_FORMATS[fmt]
+    report_path = os.path.join(report_dir, f"genevision_report_{user_name}_{timestamp}.{extension}")
     
-    # Générer le rapport
-    with st.spinner("Generating PDF report..."):
-        try:
-            generated_path = generate_genevision_report(report_data, report_path)
-            return generated_path
-        except Exception as e:
-            st.error(f"Error generating report: {str(e)}")
-            if st.session_state.get('logged_in', False):
-                user_id = st.session_state.get('user_id')
-                log_activity(user_id, "report_generation_failed", f"Failed to generate report: {str(e)}")
-            return None
\ No newline at end of file
+    build_info = build_report(report_data, report_path)
+    return {
+        "report_path": build_info.path,
+        "page_count": build_info.page_count,
+        "file_size": build_info.file_size,
+        "build_seconds": build_info.build_seconds,
+        "attachments": list(build_info.attachments),
+        "truncated_sections": list(build_info.truncated_sections)
+    }
@@ -0,0 +1,136 @@
+#chargement des fichiers de résultats (FASTA, CSV d'annotations, résumés des modèles PDB) en une seule lecture
+#le résultat est un "bundle" immuable mémorisé avec st.cache_data, la clé de cache contient
+#le chemin, la taille et la date de modification de chaque fichier : un fichier régénéré par
+#une étape du pipeline invalide automatiquement le cache
+import os
+from dataclasses import dataclass
+from typing import Optional, Tuple
+
+import pandas as pd
+import streamlit as st
+from Bio import SeqIO
+
+from scripts.fingerprints import fingerprint_files
+from scripts.structure_assets import list_model_files, load_structure_summary
+from scripts.sequence_stats import NucleotideStats, ProteinStats, nucleotide_stats, protein_stats
+
+
+@dataclass(frozen=True)
+class ResultPaths:
+    input_sequences: str
+    predicted_genes: str
+    protein_sequences: str
+    annotation_csv: str
+    protein_models_dir: str
+
+
+@dataclass(frozen=True)
+class SequenceRecord:
+    id: str
+    description: str
+    sequence: str
+
+
+@dataclass(frozen=True)
+class StructureModel:
+    protein_id: str
+    file_name: str
+    path: str
+    # résumé du modèle (résidus, chaînes, pLDDT moyen, boîte englobante), le texte PDB
+    # n'est lu que par le visualiseur pour le modèle sélectionné
+    summary: dict
+
+
+@dataclass(frozen=True)
+class ResultsBundle:
+    paths: ResultPaths
+    # None = fichier absent, tuple vide = fichier sans séquence
+    input_records: Optional[Tuple[SequenceRecord, ...]]
+    gene_records: Optional[Tuple[SequenceRecord, ...]]
+    protein_records: Optional[Tuple[SequenceRecord, ...]]
+    # st.cache_data renvoie une copie à chaque appel, le DataFrame peut donc être modifié sans risque
+    annotations: Optional[pd.DataFrame]
+    # None = répertoire des modèles absent
+    structures: Optional[Tuple[StructureModel, ...]]
+    # statistiques de composition calculées une seule fois avec le bundle (None si fichier absent)
+    input_stats: Optional[NucleotideStats] = None
+    gene_stats: Optional[NucleotideStats] = None
+    protein_stats: Optional[ProteinStats] = None
+
+    def structure(self, file_name):
+        return next((model for model in self.structures or () if model.file_name == file_name), None)
+
+
+#lire un fichier FASTA une seule fois (None si absent)
+def read_records(fasta_path):
+    if not os.path.exists(fasta_path):
+        return None
+    return tuple(
+        SequenceRecord(record.id, record.description, str(record.seq))
+        for record in SeqIO.parse(fasta_path, "fasta")
+    )
+
+
+#résumer les modèles PDB du répertoire (chaque fichier n'est parsé qu'une fois, voir structure_assets)
+def read_structures(models_dir):
+    if not os.path.exists(models_dir):
+        return None
+    structures = []
+    for file_name in list_model_files(models_dir):
+        path = os.path.join(models_dir, file_name)
+        structures.append(StructureModel(
+            protein_id=file_name.replace('.pdb', ''),
+            file_name=file_name,
+            path=path,
+            summary=load_structure_summary(path)
+        ))
+    return tuple(structures)
+
+
+#statistiques d'un ensemble d'enregistrements (None si le fichier est absent)
+def records_stats(records, stats_fn):
+    if records is None:
+        return None
+    return stats_fn((record.id, record.sequence) for record in records)
+
+
+#parser tous les fichiers de résultats (sans cache)
+def parse_results_bundle(paths):
+    annotations = pd.read_csv(paths.annotation_csv) if os.path.exists(paths.annotation_csv) else None
+    input_records = read_records(paths.input_sequences)
+    gene_records = read_records(paths.predicted_genes)
+    protein_records = read_records(paths.protein_sequences)
+    return ResultsBundle(
+        paths=paths,
+        input_records=input_records,
+        gene_records=gene_records,
+        protein_records=protein_records,
+        annotations=annotations,
+        structures=read_structures(paths.protein_models_dir),
+        input_stats=records_stats(input_records, nucleotide_stats),
+        gene_stats=records_stats(gene_records, nucleotide_stats),
+        protein_stats=records_stats(protein_records, protein_stats)
+    )
+
+
+#signature (chemin, taille, date de modification) des fichiers de résultats
+def results_signature(paths):
+    files = [paths.input_sequences, paths.predicted_genes, paths.protein_sequences, paths.annotation_csv]
+    if os.path.exists(paths.protein_models_dir):
+        files += [os.path.join(paths.protein_models_dir, f) for f in list_model_files(paths.protein_models_dir)]
+    return fingerprint_files(*files)
+
+
+@st.cache_data(show_spinner=False, max_entries=8)
+def load_cached_bundle(paths, signature):
+    return parse_results_bundle(paths)
+
+
+#point d'entrée : bundle mémorisé tant que les fichiers ne changent pas
+def load_results_bundle(paths):
+    return load_cached_bundle(paths, results_signature(paths))
+
+
+#reconstruire un contenu FASTA à partir des enregistrements du bundle
+def records_to_fasta(records):
+    return "".join(f">{record.description}\n{record.sequence}\n" for record in records or ())
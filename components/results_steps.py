@@ -1,17 +1,27 @@
 import streamlit as st
 import os
-import subprocess
-import pandas as pd
-from Bio import SeqIO
-import py3Dmol
+import time
 from datetime import datetime
-from components.results_finals import display_results
 from scripts.database import (
     create_sequence, 
     update_sequence,
     create_analysis_result, 
     log_activity
 )
+from components.session_cache import write_once
+from scripts.fingerprints import fingerprint_data
+from scripts.fasta_validation import read_normalized_sequence
+from scripts.artifact_store import STEP_ARTIFACTS, analysis_fingerprint, restorable_step, restore_step, snapshot_step
+from scripts.pipeline_runner import run_step_script
+from scripts.tracing import stage_trace, trace_env, trace_rows
+from scripts.metrics import merge_snapshot, metrics_env
+
+# pandas, Biopython, les visualiseurs (py3Dmol) et les résultats finaux (reportlab) sont importés
+# dans les étapes qui les utilisent : l'étape d'upload s'affiche sans les charger
+
+# seuls les SEQUENCE_CONTENT_MAX premiers nucléotides sont copiés dans le document MongoDB (limite de 16 Mo) :
+# la longueur, la validation et l'empreinte décrivent la séquence complète, dont le FASTA normalisé reste sur disque
+SEQUENCE_CONTENT_MAX = int(os.environ.get('SEQUENCE_CONTENT_MAX', 1_000_000))
 
 
 # Nouvelle fonction pour afficher le stepper
@@ -52,20 +62,124 @@ def display_stepper():
                 # Étape à venir
                 st.markdown(f"<div style='text-align:center; color:gray;'>○<br>{step}</div>", unsafe_allow_html=True)
 
+    display_stage_timings()
+
+# Temps et ressources de chaque étape exécutée (traces écrites par les scripts, voir scripts/tracing.py)
+def display_stage_timings():
+    traces = st.session_state.get('stage_traces', {})
+    if not traces:
+        return
+    import pandas as pd
+    
+    with st.expander("⏱️ Stage timings"):
+        ordered = [traces[step] for step in sorted(traces)]
+        st.bar_chart(pd.DataFrame(
+            {"Wall time (s)": [trace["wall_seconds"] for trace in ordered]},
+            index=[trace["name"] for trace in ordered]
+        ))
+        st.dataframe(pd.DataFrame(trace_rows(ordered)), use_container_width=True)
+        st.caption("Wall time includes starting the step script. External tools (AUGUSTUS, DeepGOPlus, QuickGO, LLM, ESMFold) are listed as spans of their step; repeated calls are grouped.")
+
+# Recevoir, valider et normaliser l'entrée dans output_fasta (voir scripts/uploads.py) : les fichiers
+# sont lus par blocs et décompressés à la volée, l'empreinte du FASTA normalisé est calculée pendant
+# l'écriture. Le résultat est mémorisé dans la session par clé d'entrée (pas de nouvelle lecture à chaque rerun)
+# source: texte collé (str) ou fichier ouvert en binaire ; size: taille du fichier pour la progression
+def validate_input(key, source, output_fasta, size=None):
+    cached = st.session_state.get('input_validation')
+    if cached and cached[0] == key and (not cached[1].report.ok or os.path.exists(output_fasta)):
+        return cached[1]
+    
+    from scripts.uploads import receive_text, receive_upload
+    with st.spinner("Validating sequence..."):
+        if isinstance(source, str):
+            result = receive_text(source, output_fasta)
+        else:
+            progress = st.progress(0) if size else None
+            on_progress = (lambda received: progress.progress(min(100, int(100 * received / size)))) if size else None
+            result = receive_upload(source, output_fasta, on_progress=on_progress)
+            if progress is not None:
+                progress.empty()
+    st.session_state['input_validation'] = (key, result)
+    st.session_state['input_hash'] = result.content_hash
+    # empreinte de l'analyse (séquence + configuration du pipeline), clé des résultats partagés
+    st.session_state['analysis_key'] = analysis_fingerprint(result.content_hash) if result.content_hash else None
+    return result
+
+# Séquence déjà envoyée par l'utilisateur (même empreinte) : réutiliser son enregistrement
+# au lieu d'en créer un nouveau, sauf si elle a été analysée avec une autre configuration du pipeline
+def reuse_existing_sequence(user_id, content_hash, analysis_key):
+    if not content_hash or 'db_sequence_id' in st.session_state:
+        return
+    from scripts.database import find_sequence_by_hash
+    existing = find_sequence_by_hash(user_id, content_hash)
+    if existing and existing.get("analysis_key") == analysis_key:
+        st.session_state['db_sequence_id'] = str(existing["_id"])
+
+# Étape déjà calculée pour la même analyse, par ce user ou un autre (voir scripts/artifact_store.py) :
+# ses fichiers sont restaurés au lieu de relancer le script, et ses résultats sont enregistrés dans la
+# séquence du user comme après une exécution (chaque user garde ses propres documents de résultats)
+def restore_cached_step(step_num, user_id, data_dir="C:\\Users\\MSI\\Documents\\PFE\\DNA_project\\data"):
+    analysis_key = st.session_state.get('analysis_key')
+    if not analysis_key or not restore_step(analysis_key, step_num, data_dir):
+        return False
+    st.session_state['steps_completed'].append(step_num)
+    if user_id and 'db_sequence_id' in st.session_state:
+        save_analysis_results(step_num, user_id, st.session_state['db_sequence_id'])
+    return True
+
+# Étapes déjà calculées pour cette analyse : proposer de les restaurer toutes au lieu de relancer le pipeline
+# une analyse complète (comme l'exemple, précalculé au déploiement par scripts/precompute_example.py)
+# mène directement aux résultats finaux
+def display_cached_results(analysis_key, data_dir):
+    if not analysis_key:
+        return
+    cached_step = restorable_step(analysis_key)
+    if cached_step > 0:
+        complete = cached_step == max(STEP_ARTIFACTS)
+        if complete:
+            st.info("Results for this sequence are already available: they can be shown instantly.")
+        else:
+            st.info(f"This sequence was already analysed: steps 1 to {cached_step} can be restored without running them again.")
+        if st.button("⚡ Show results instantly" if complete else "⏩ Skip to cached results", key="restore_cached_btn"):
+            with st.spinner("Restoring cached results..."):
+                for step in range(1, cached_step + 1):
+                    if step not in st.session_state['steps_completed']:
+                        restore_cached_step(step, st.session_state.get('user_id'), data_dir)
+            st.session_state['current_step'] = cached_step + 1 if complete else cached_step
+            st.session_state['show_final_results'] = complete
+            st.session_state['saved_sequence'] = True
+            st.experimental_rerun()
+
+# Afficher le rapport de validation : erreurs (entrée refusée), corrections appliquées, résumé des records
+def display_validation_report(report):
+    for error in report.errors:
+        st.error(error)
+    for warning in report.warnings:
+        st.warning(warning)
+    if report.ok:
+        st.caption(f"{len(report.records)} record(s), {report.total_length:,} bp, GC {report.gc_percent:.2f}%")
+
 # Fonction pour initialiser une séquence dans la base de données
-def init_db_sequence(user_id, sequence_content, sequence_name="input_sequence"):
+# validation: résumé du rapport de validation (records, longueur, GC, corrections)
+# content_hash: empreinte du FASTA normalisé (recherche des séquences déjà envoyées)
+# analysis_key: empreinte de l'analyse, référence aux résultats partagés entre users
+def init_db_sequence(user_id, sequence_content, sequence_name="input_sequence", validation=None, content_hash=None,
+                     analysis_key=None):
     # Vérifier si l'ID de séquence existe déjà dans la session
     if 'db_sequence_id' not in st.session_state:
         # Créer des métadonnées pour la séquence
         metadata = {
             "sequence_name": sequence_name,
-            "length": len(sequence_content),
+            "length": validation["total_length"] if validation else len(sequence_content),
             "date_created": datetime.utcnow().isoformat(),
             "source": st.session_state.get('input_mode', 'unknown')
         }
+        if validation:
+            metadata["validation"] = validation
         
         # Créer la séquence dans la base de données
-        seq_id = create_sequence(user_id, sequence_content, metadata)
+        seq_id = create_sequence(user_id, sequence_content, metadata, content_hash=content_hash,
+                                 analysis_key=analysis_key)
         
         if seq_id:
             # Stocker l'ID de la séquence dans la session
@@ -78,8 +192,25 @@ def init_db_sequence(user_id, sequence_content, sequence_name="input_sequence"):
     
     return st.session_state['db_sequence_id']
 
+# Fonction pour charger les fichiers de résultats des étapes (bundle mémorisé, voir results_loader)
+def load_step_bundle():
+    from components.results_loader import ResultPaths, load_results_bundle
+    data_dir = "C:\\Users\\MSI\\Documents\\PFE\\DNA_project\\data"
+    return load_results_bundle(ResultPaths(
+        os.path.join(data_dir, "input_sequences.fasta"),
+        os.path.join(data_dir, "predicted_genes.fasta"),
+        os.path.join(data_dir, "protein_sequences.fasta"),
+        os.path.join(data_dir, "final_annotations.csv"),
+        os.path.join(data_dir, "pdb_models")
+    ))
+
 # Fonction pour sauvegarder les résultats d'analyse dans la base de données
-def save_analysis_results(step_num, user_id, sequence_id):
+# trace: temps et ressources de l'étape, enregistrés avec le résultat
+def save_analysis_results(step_num, user_id, sequence_id, trace=None):
+    import pandas as pd
+    from Bio import SeqIO
+    from scripts.structure_assets import list_model_files, load_structure_summary
+    
     steps_data = {
         1: {"type": "gene_prediction", "files": ["predicted_genes.fasta", "protein_sequences.fasta"]},
         2: {"type": "go_annotation", "files": ["final_annotations.csv"]},
@@ -116,7 +247,7 @@ def save_analysis_results(step_num, user_id, sequence_id):
     if step_num == 4:
         protein_models_dir = "C:\\Users\\MSI\\Documents\\PFE\\DNA_project\\data\\pdb_models"
         if os.path.exists(protein_models_dir):
-            model_files = [f for f in os.listdir(protein_models_dir) if f.endswith('.pdb')]
+            model_files = list_model_files(protein_models_dir)
             models_data = []
             
             for model_file in model_files:
@@ -128,7 +259,8 @@ def save_analysis_results(step_num, user_id, sequence_id):
                 models_data.append({
                     "protein_id": protein_id,
                     "model_content": pdb_content[:1000],  # Limiter la taille pour éviter les problèmes
-                    "model_path": model_path
+                    "model_path": model_path,
+                    "summary": load_structure_summary(model_path)
                 })
             
             data["protein_models"] = models_data
@@ -138,7 +270,7 @@ def save_analysis_results(step_num, user_id, sequence_id):
     
     # Enregistrer les résultats d'analyse
     if data:
-        result_id = create_analysis_result(sequence_id, data)
+        result_id = create_analysis_result(sequence_id, data, stage=steps_data[step_num]["type"], trace=trace)
         if result_id:
             step_name = steps_data[step_num]["type"]
             log_activity(user_id, f"{step_name}_complete", f"Completed {step_name} analysis for sequence {sequence_id}")
@@ -168,32 +300,41 @@ def display_step_results(step_num):
         if step_num > 0 and step_num < len(steps_info) - 1:
             st.subheader(f"Step {step_num}: {steps_info[step_num]['name']}")
             
+            # Étape déjà calculée pour la même analyse : résultats réutilisés au lieu de relancer le script
+            if step_num not in st.session_state['steps_completed'] and restore_cached_step(step_num, user_id):
+                st.info("Results reused from a previous identical analysis.")
+            
             # Vérifier si le script a déjà été exécuté
             if step_num not in st.session_state['steps_completed']:
                 with st.spinner(f"{steps_info[step_num]['description']}"):
-                    base_path = "C:\\Users\\MSI\\Documents\\PFE\\DNA_project\\scripts\\"
-                    script_path = os.path.join(base_path, steps_info[step_num]['script'])
+                    # Le script écrit ses spans (étapes internes, appels externes) dans ce fichier en sortant
+                    trace_path = os.path.join("C:\\Users\\MSI\\Documents\\PFE\\DNA_project\\data\\traces", f"step_{step_num}.json")
+                    metrics_path = os.path.join(os.path.dirname(trace_path), f"step_{step_num}.metrics.json")
+                    os.makedirs(os.path.dirname(trace_path), exist_ok=True)
+                    step_env = metrics_env(metrics_path, trace_env(trace_path))
+                    started = time.perf_counter()
                     
-                    # Exécuter le script avec des paramètres spécifiques selon le script
-                    if steps_info[step_num]['script'] == "protein_model.py":
-                        protein_fasta_path = "C:\\Users\\MSI\\Documents\\PFE\\DNA_project\\data\\protein_sequences.fasta"
-                        output_dir = "C:\\Users\\MSI\\Documents\\PFE\\DNA_project\\data\\pdb_models"
-                        # S'assurer que le répertoire de sortie existe
-                        os.makedirs(output_dir, exist_ok=True)
-                        result = subprocess.run(f'python "{script_path}" "{protein_fasta_path}" --output_dir "{output_dir}"', 
-                                            shell=True, capture_output=True, text=True)
-                    else:
-                        # Comportement par défaut pour les autres scripts
-                        result = subprocess.run(f'python "{script_path}"', shell=True, capture_output=True, text=True)
+                    # Exécuter le script avec des paramètres spécifiques selon le script (voir scripts/pipeline_runner.py)
+                    result = run_step_script(step_num, env=step_env)
+                    
+                    trace = stage_trace(steps_info[step_num]['name'], trace_path, time.perf_counter() - started)
+                    st.session_state.setdefault('stage_traces', {})[step_num] = trace
+                    # compteurs et histogrammes du script ajoutés aux métriques exposées par l'application
+                    merge_snapshot(metrics_path)
                         
                     # Vérifier si l'exécution s'est bien passée
                     if result.returncode == 0:
                         st.success(f"{steps_info[step_num]['name']} completed successfully!")
                         st.session_state['steps_completed'].append(step_num)
                         
+                        # Conserver les fichiers de l'étape pour une prochaine analyse identique (tous users)
+                        if st.session_state.get('analysis_key'):
+                            snapshot_step(st.session_state['analysis_key'], step_num,
+                                          "C:\\Users\\MSI\\Documents\\PFE\\DNA_project\\data")
+                        
                         # Sauvegarder les résultats dans la base de données si l'utilisateur est connecté
                         if user_id and 'db_sequence_id' in st.session_state:
-                            save_analysis_results(step_num, user_id, st.session_state['db_sequence_id'])
+                            save_analysis_results(step_num, user_id, st.session_state['db_sequence_id'], trace)
                     else:
                         st.error(f"Error executing {steps_info[step_num]['name']}: {result.stderr}")
             else:
@@ -202,33 +343,29 @@ def display_step_results(step_num):
             # Afficher les résultats partiels selon l'étape
             if step_num == 1:  # Prédiction de gènes
                 if st.session_state.get('logged_in', False):
+                    from components.sequence_viewer import display_sequence_viewer
                     tab1, tab2, tab3, tab4 = st.tabs(["**_Input Sequence_**", "**_Predicted Gene Sequences_**", "**_Protein Sequences_**","ℹ️"])
 
-                    input_sequences = "C:\\Users\\MSI\\Documents\\PFE\\DNA_project\\data\\input_sequences.fasta"
-                    predicted_genes = "C:\\Users\\MSI\\Documents\\PFE\\DNA_project\\data\\predicted_genes.fasta"
-                    protein_sequences = "C:\\Users\\MSI\\Documents\\PFE\\DNA_project\\data\\protein_sequences.fasta"
+                    bundle = load_step_bundle()
 
                     with tab1: 
-                        if os.path.exists(input_sequences):
-                            for record in SeqIO.parse(input_sequences, "fasta"):
-                                st.markdown(f"**{record.id}**")
-                                st.code(str(record.seq), language="text")
+                        if bundle.input_records is not None:
+                            display_sequence_viewer(bundle.paths.input_sequences, "step_input",
+                                                    records=bundle.input_records, unit="bp")
                         else:
                             st.warning("No input sequences file found.")
 
                     with tab2: 
-                        if os.path.exists(predicted_genes):
-                            for record in SeqIO.parse(predicted_genes, "fasta"):
-                                st.markdown(f"**{record.id}**")
-                                st.code(str(record.seq), language="text")
+                        if bundle.gene_records is not None:
+                            display_sequence_viewer(bundle.paths.predicted_genes, "step_genes",
+                                                    records=bundle.gene_records, unit="bp")
                         else:
                             st.warning("No predicted genes file found.")
 
                     with tab3: 
-                        if os.path.exists(protein_sequences):
-                            for record in SeqIO.parse(protein_sequences, "fasta"):
-                                st.markdown(f"**{record.id}**")
-                                st.code(str(record.seq), language="text")
+                        if bundle.protein_records is not None:
+                            display_sequence_viewer(bundle.paths.protein_sequences, "step_proteins",
+                                                    records=bundle.protein_records, unit="aa")
                         else:
                             st.warning("No protein sequences file found.")
                     with tab4:
@@ -244,9 +381,8 @@ def display_step_results(step_num):
                 if st.session_state.get('logged_in', False):
                     tab1, tab2 = st.tabs(["**_Annotation GO Table_**","ℹ️"])
                     with tab1 :
-                        annotation_csv = "C:\\Users\\MSI\\Documents\\PFE\\DNA_project\\data\\final_annotations.csv"
-                        if os.path.exists(annotation_csv):
-                            df = pd.read_csv(annotation_csv)
+                        df = load_step_bundle().annotations
+                        if df is not None:
                             # Table résumé à afficher
                             summary_df = df[["Gene ID", "Position", "Top GO Term", "Confidence Score"]]
                             st.dataframe(summary_df, use_container_width=True)
@@ -268,9 +404,8 @@ def display_step_results(step_num):
                 if st.session_state.get('logged_in', False):
                     tab1, tab2 = st.tabs(["**_Function Table_**","ℹ️"])
                     with tab1 :
-                        annotation_csv = "C:\\Users\\MSI\\Documents\\PFE\\DNA_project\\data\\final_annotations.csv"
-                        if os.path.exists(annotation_csv):
-                            df = pd.read_csv(annotation_csv)
+                        df = load_step_bundle().annotations
+                        if df is not None:
                             df = df.rename(columns={
                                 "Top GO Term Name": "Function",
                                 "Top GO Term Description": "Description"
@@ -295,52 +430,22 @@ def display_step_results(step_num):
 
             elif step_num == 4:  # Modélisation des proteines
                 if st.session_state.get('logged_in', False):
+                    from components.structure_viewer import display_structure_viewer, structure_quality_table
                     tab1, tab2, tab3 = st.tabs(["**_Protein Models_**", "**_Model Quality_**", "ℹ️"])
                     
                     with tab1:
-                        # Update path to correct location of PDB files
-                        protein_models_dir = "C:\\Users\\MSI\\Documents\\PFE\\DNA_project\\data\\pdb_models"
+                        bundle = load_step_bundle()
                         
                         # Check if directory exists
-                        if os.path.exists(protein_models_dir):
+                        if bundle.structures is not None:
                             # Get all PDB files in the directory
-                            model_files = [f for f in os.listdir(protein_models_dir) if f.endswith('.pdb')]
+                            model_files = [model.file_name for model in bundle.structures]
                             
                             if model_files:
                                 # Create a selectbox to choose which protein model to display
                                 selected_model = st.selectbox("Select protein model to view :", model_files)
-                                model_path = os.path.join(protein_models_dir, selected_model)
-                                
-                                # Read the PDB file content
-                                with open(model_path, 'r') as file:
-                                    pdb_data = file.read()
-                                
-
-                                view = py3Dmol.view(width=600, height=400)
-                                view.addModel(pdb_data, "pdb")
-
-                                # Add some controls for the visualization
-                                style_options = st.radio(
-                                    "Visualization style :",
-                                    ("Cartoon", "Stick", "Sphere", "Line"),
-                                    horizontal=True
-                                )
-
-                                # Apply the selected style
-                                if style_options == "Cartoon":
-                                    view.setStyle({'cartoon': {'color': 'spectrum'}})
-                                elif style_options == "Stick":
-                                    view.setStyle({'stick': {'colorscheme': 'greenCarbon', 'radius': 0.2}})
-                                elif style_options == "Sphere":
-                                    view.setStyle({'sphere': {'colorscheme': 'blueCarbon', 'radius': 0.5}})
-                                elif style_options == "Line":
-                                    view.setStyle({'line': {'colorscheme': 'redCarbon', 'linewidth': 1.0}})
-
-                                view.zoomTo()
-                                view.spin(True)
                                 
-                                # Display the 3D visualization in Streamlit
-                                st.components.v1.html(view._make_html(), height=400)
+                                display_structure_viewer(bundle.structure(selected_model))
 
                             else:
                                 st.warning("No protein model files found.")
@@ -348,22 +453,14 @@ def display_step_results(step_num):
                             st.warning("Protein models directory not found.")
                     
                     with tab2:
-                        # Create placeholder quality metrics based on the generated models
                         st.markdown("#### Protein Model Quality Assessment")
                         
-                        if os.path.exists(protein_models_dir):
-                            model_files = [f for f in os.listdir(protein_models_dir) if f.endswith('.pdb')]
+                        if bundle.structures is not None:
+                            model_files = [model.file_name for model in bundle.structures]
                             
                             if model_files:
-                                # Create example quality data
-                                quality_data = {
-                                    "Protein ID": [f.replace('.pdb', '') for f in model_files],
-                                    "Model Length": [len(open(os.path.join(protein_models_dir, f), 'r').readlines()) for f in model_files],
-                                    "Confidence": [round(min(95, 75 + 20 * (i / len(model_files))), 1) for i in range(len(model_files))],
-                                    "Quality Category": ["High" if i < len(model_files)/2 else "Medium" for i in range(len(model_files))]
-                                }
-                                
-                                quality_df = pd.DataFrame(quality_data)
+                                # Quality metrics read from the model summaries (residues, chains, mean pLDDT)
+                                quality_df = structure_quality_table(bundle.structures)
                                 st.dataframe(quality_df, use_container_width=True)
                         
                             else:
@@ -380,11 +477,11 @@ def display_step_results(step_num):
                         - **3D Visualization:** Explore protein structures in different visualization styles (Cartoon, Stick, Sphere, Line)
                         - **Model Quality Assessment:** Review quality metrics for generated protein models
                         - **Multiple Models:** Compare different protein models from your sequences
-                        - **Confidence Score**: Higher values indicate greater confidence in the predicted structure
+                        - **Mean pLDDT**: Average per-residue confidence (0-100) stored in the model, higher values indicate greater confidence in the predicted structure
                         - **Quality Category**: 
-                            - High: Well-predicted structures with reliable folding patterns
-                            - Medium: Reasonably predicted structures with some uncertainty
-                            - Low: Less reliable predictions that may require refinement
+                            - High (pLDDT ≥ 70): Well-predicted structures with reliable folding patterns
+                            - Medium (50 ≤ pLDDT < 70): Reasonably predicted structures with some uncertainty
+                            - Low (pLDDT < 50): Less reliable predictions that may require refinement
                         """)
 
         elif step_num == 0:  # Étape d'upload
@@ -400,24 +497,37 @@ def display_step_results(step_num):
                 st.session_state['input_mode'] = input_mode
 
                 sequence = ""
+                result = None
 
+                # L'entrée est validée et normalisée (>input_sequence, lignes de 60 bases) avant d'être écrite :
+                # une entrée refusée n'écrase pas input_sequences.fasta et aucune étape ne peut démarrer
                 if input_mode == "Upload FASTA file":
-                    fasta_file = st.file_uploader("Upload a FASTA file", type=["fasta"])
+                    # fichiers compressés acceptés (gzip/bgzip/zstd), décompressés pendant la lecture
+                    fasta_file = st.file_uploader("Upload a FASTA file", type=["fasta", "fa", "fna", "gz", "bgz", "zst"])
                     if fasta_file is not None:
-                        fasta_content = fasta_file.read().decode("utf-8")
-                        sequence_lines = [line.strip() for line in fasta_content.splitlines() if not line.startswith(">")]
-                        sequence = ''.join(sequence_lines)
-
-                        with open(output_fasta, "w") as f:
-                            f.write(">input_sequence\n")
-                            f.write(sequence)
+                        result = validate_input(("upload", fasta_file.name, fasta_file.size), fasta_file, output_fasta,
+                                                size=fasta_file.size)
+                    
+                    # les gros génomes peuvent être déposés dans le dossier d'import (copie reprenable)
+                    from scripts.uploads import UPLOAD_DIR, list_upload_dir
+                    upload_files = list_upload_dir()
+                    if upload_files and fasta_file is None:
+                        with st.expander("📂 Import from the upload folder"):
+                            st.caption(f"Large genomes can be copied to {UPLOAD_DIR} (scp, rsync) and imported from here.")
+                            choice = st.selectbox("File", upload_files,
+                                                  format_func=lambda entry: f"{entry[0]} ({entry[1] / 1e6:,.1f} MB)")
+                            if st.button("Import this file", key="import_upload_btn"):
+                                st.session_state['upload_choice'] = choice
+                            if st.session_state.get('upload_choice') == choice:
+                                path = os.path.join(UPLOAD_DIR, choice[0])
+                                key = ("folder", choice[0], choice[1], os.path.getmtime(path))
+                                with open(path, "rb") as f:
+                                    result = validate_input(key, f, output_fasta, size=choice[1])
 
                 elif input_mode == "Enter sequence manually":
-                    sequence = st.text_area("Enter your sequence here", height=200)
-                    if sequence:
-                        with open(output_fasta, "w") as f:
-                            f.write(">input_sequence\n")
-                            f.write(sequence)
+                    sequence_text = st.text_area("Enter your sequence here", height=200)
+                    if sequence_text:
+                        result = validate_input(("text", fingerprint_data(sequence_text)), sequence_text, output_fasta)
 
                 elif input_mode == "Try an example":
                     example_sequence = "C:\\Users\\MSI\\Documents\\PFE\\DNA_project\\data\\example_sequence.txt"
@@ -425,23 +535,30 @@ def display_step_results(step_num):
                         example_sequence_content = file.read()
 
                     st.text_area("Sequence example", example_sequence_content, height=200)
-                    sequence = example_sequence_content
-
-                    with open(output_fasta, "w") as f:
-                        f.write(">input_sequence\n")
-                        f.write(sequence)
+                    result = validate_input(("example", fingerprint_data(example_sequence_content)),
+                                            example_sequence_content, output_fasta)
+
+                if result is not None:
+                    report = result.report
+                    display_validation_report(report)
+                    if report.ok:
+                        sequence = read_normalized_sequence(output_fasta, max_length=SEQUENCE_CONTENT_MAX)
+                    else:
+                        # ne pas passer à la prédiction avec un fichier d'une entrée précédente
+                        st.session_state['saved_sequence'] = False
 
             if 'saved_sequence' not in st.session_state:
                 st.session_state['saved_sequence'] = False
 
             if sequence:
-                with open(output_fasta, "w") as f:
-                    f.write(">input_sequence\n")
-                    f.write(sequence)
-                
                 # Initialiser la séquence dans la base de données si l'utilisateur est connecté
                 if st.session_state.get('logged_in', False) and st.session_state.get('user_id'):
-                    seq_id = init_db_sequence(st.session_state['user_id'], sequence)
+                    # une séquence déjà envoyée (même empreinte) réutilise son enregistrement
+                    reuse_existing_sequence(st.session_state['user_id'], result.content_hash,
+                                            st.session_state.get('analysis_key'))
+                    seq_id = init_db_sequence(st.session_state['user_id'], sequence, validation=report.summary(),
+                                              content_hash=result.content_hash,
+                                              analysis_key=st.session_state.get('analysis_key'))
                     if seq_id:
                         st.session_state['saved_sequence'] = True
                         st.success("Sequence successfully uploaded, saved for analysis, and stored in your account.")
@@ -450,6 +567,8 @@ def display_step_results(step_num):
                     st.success("Sequence successfully uploaded and saved for analysis.")
                     st.info("Log in to save this sequence to your account for future reference.")
                 
+                display_cached_results(st.session_state.get('analysis_key'), save_path)
+                
             else:
                 st.info("Preparing your DNA sequence for gene prediction and analysis...")
             
@@ -471,22 +590,16 @@ def display_step_results(step_num):
                 if st.button("🔍 **View Final Results**", key="view_results_btn"):
                     st.session_state['show_final_results'] = not st.session_state['show_final_results']  # Toggle l'état
             
-            # Enregistrer les résultats complets dans la base de données
+            # Enregistrer les résultats complets dans la base de données (une seule fois par séquence)
             if st.session_state.get('logged_in', False) and 'db_sequence_id' in st.session_state:
                 user_id = st.session_state['user_id']
                 sequence_id = st.session_state['db_sequence_id']
                 
-                # Mettre à jour le statut de la séquence
-                update_sequence(sequence_id, user_id, {"status": "completed"})
-                
                 # Créer un lien de téléchargement pour les fichiers générés
                 download_links = get_download_links(sequence_id)
                 
-                # Sauvegarder les résultats finaux
-                save_analysis_results(5, user_id, sequence_id)
-                
-                # Journaliser l'activité
-                log_activity(user_id, "analysis_completed", f"Completed full analysis for sequence {sequence_id}")
+                write_once(("analysis_completed", sequence_id), "completed",
+                           complete_analysis, user_id, sequence_id)
             
             # Afficher les résultats seulement si le bouton a été cliqué
             if st.session_state['show_final_results']:
@@ -494,8 +607,21 @@ def display_step_results(step_num):
                 st.session_state['check_final_step'] = True
                 
                 # Appeler la fonction qui affiche les résultats
+                from components.results_finals import display_results
                 display_results()
 
+# Fonction pour marquer l'analyse comme terminée (statut, résultats finaux, activité)
+def complete_analysis(user_id, sequence_id):
+    # Mettre à jour le statut de la séquence
+    updated = update_sequence(sequence_id, user_id, {"status": "completed"})
+    
+    # Sauvegarder les résultats finaux
+    save_analysis_results(5, user_id, sequence_id)
+    
+    # Journaliser l'activité
+    log_activity(user_id, "analysis_completed", f"Completed full analysis for sequence {sequence_id}")
+    return updated
+
 # Fonction auxiliaire pour obtenir les liens de téléchargement (récupérée de database.py)
 def get_download_links(seq_id):
     return {
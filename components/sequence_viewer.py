@@ -0,0 +1,92 @@
+#visualiseur de séquences pour les onglets de résultats : liste résumée des records (ID, longueur),
+#recherche par ID et affichage à la demande d'une fenêtre de la séquence choisie
+#seule la fenêtre affichée est envoyée au navigateur, quelle que soit la taille du génome
+import os
+
+import pandas as pd
+import streamlit as st
+
+from scripts.fasta_index import FastaIndexEntry, fetch_window, load_fasta_index
+from scripts.fingerprints import fingerprint_files
+
+# nombre de caractères envoyés par fenêtre et par ligne affichée
+WINDOW_SIZE = 3000
+LINE_WIDTH = 60
+# nombre de records par page dans la liste résumée
+SUMMARY_PAGE_SIZE = 50
+
+
+#index .fai mémorisé tant que le fichier ne change pas (la signature fait partie de la clé)
+@st.cache_data(show_spinner=False, max_entries=16)
+def load_cached_index(fasta_path, signature):
+    return load_fasta_index(fasta_path)
+
+
+#découper une fenêtre en lignes de 60 caractères (même format que le fichier d'entrée)
+def wrap_sequence(sequence, width=LINE_WIDTH):
+    return "\n".join(sequence[i:i + width] for i in range(0, len(sequence), width))
+
+
+#entrées à afficher et fonction de lecture d'une fenêtre
+#si le fichier n'est pas indexable (lignes de longueurs différentes), on lit les records déjà chargés
+def sequence_source(fasta_path, records):
+    if os.path.exists(fasta_path):
+        try:
+            entries = load_cached_index(fasta_path, fingerprint_files(fasta_path))
+            return entries, lambda entry, start, length: fetch_window(fasta_path, entry, start, length)
+        except (OSError, ValueError):
+            pass
+
+    sequences = {record.id: record.sequence for record in records or ()}
+    entries = tuple(FastaIndexEntry(record.id, len(record.sequence), 0, 0, 0) for record in records or ())
+    return entries, lambda entry, start, length: sequences[entry.id][start:start + length]
+
+
+#afficher le visualiseur d'un fichier FASTA, key doit être unique dans la page
+def display_sequence_viewer(fasta_path, key, records=None, unit="bp"):
+    entries, read_window = sequence_source(fasta_path, records)
+    if not entries:
+        st.info("No sequences in this file.")
+        return
+
+    # Search by ID (only useful when the file contains several records)
+    matches = entries
+    if len(entries) > 1:
+        search = st.text_input("Search by ID", key=f"{key}_search", placeholder="e.g. gene_12")
+        if search.strip():
+            matches = tuple(entry for entry in entries if search.strip().lower() in entry.id.lower())
+        st.caption(f"{len(matches)} of {len(entries)} records")
+        if not matches:
+            st.info("No record matches this ID.")
+            return
+
+    # Summary list, paginated so that only one page of IDs is rendered
+    page_count = (len(matches) - 1) // SUMMARY_PAGE_SIZE + 1
+    page = 1
+    if page_count > 1:
+        page = st.number_input("Page", min_value=1, max_value=page_count, value=1, step=1,
+                               key=f"{key}_page")
+    page_entries = matches[(page - 1) * SUMMARY_PAGE_SIZE:page * SUMMARY_PAGE_SIZE]
+
+    if len(entries) > 1:
+        st.dataframe(
+            pd.DataFrame({"ID": [entry.id for entry in page_entries],
+                          f"Length ({unit})": [entry.length for entry in page_entries]}),
+            use_container_width=True
+        )
+
+    selected_id = st.selectbox("Record", [entry.id for entry in page_entries], key=f"{key}_record")
+    entry = next(entry for entry in page_entries if entry.id == selected_id)
+
+    # The sequence itself is only read and sent when requested
+    if not st.checkbox(f"Show sequence ({entry.length:,} {unit})", key=f"{key}_show"):
+        return
+
+    start = 1
+    if entry.length > WINDOW_SIZE:
+        start = st.number_input("Start position", min_value=1, max_value=entry.length, value=1,
+                                step=WINDOW_SIZE, key=f"{key}_start_{entry.id}")
+    window = read_window(entry, start - 1, WINDOW_SIZE)
+    st.code(wrap_sequence(window), language="text")
+    if entry.length > WINDOW_SIZE:
+        st.caption(f"Positions {start:,}–{start + len(window) - 1:,} of {entry.length:,} {unit}")
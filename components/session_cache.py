@@ -0,0 +1,68 @@
+import streamlit as st
+
+#cache d'écritures de la session : une écriture en base n'est refaite que si son empreinte change
+#(évite de réécrire les mêmes résultats à chaque rerun streamlit)
+#key: identifiant de l'écriture (ex: ("annotations", sequence_id))
+#fingerprint: empreinte des données écrites
+def write_once(key, fingerprint, write_fn, *args, **kwargs):
+    written = st.session_state.setdefault('written_fingerprints', {})
+    
+    if key in written and written[key][0] == fingerprint:
+        return written[key][1]
+    
+    result = write_fn(*args, **kwargs)
+    # on ne mémorise que les écritures réussies pour qu'un échec soit retenté au prochain rerun
+    if result:
+        written[key] = (fingerprint, result)
+    return result
+
+#oublier les écritures mémorisées (toutes ou celles d'une clé)
+def forget_writes(key=None):
+    written = st.session_state.get('written_fingerprints', {})
+    if key is None:
+        written.clear()
+    else:
+        written.pop(key, None)
+
+#document de l'utilisateur connecté, lu une fois par session (sans photo ni hash du mot de passe)
+#au lieu de deux requêtes MongoDB à chaque rerun ; à invalider après toute modification du profil
+def get_session_user(user_id):
+    cached = st.session_state.get('session_user')
+    if cached and cached[0] == user_id:
+        return cached[1]
+    
+    from scripts.database import USER_SUMMARY_PROJECTION, get_user_by_id
+    user = get_user_by_id(user_id, USER_SUMMARY_PROJECTION)
+    # un échec de lecture n'est pas mémorisé
+    if user:
+        st.session_state['session_user'] = (user_id, user)
+    return user
+
+#empreinte de la photo de profil de l'utilisateur connecté (None sans photo)
+#les comptes dont la photo est encore en base64 dans le document sont convertis au premier affichage
+def get_session_user_photo(user_id):
+    user = get_session_user(user_id)
+    if not user:
+        return None
+    if user.get('photo_hash'):
+        return user['photo_hash']
+    
+    cached = st.session_state.get('session_user_photo')
+    if cached and cached[0] == user_id:
+        return cached[1]
+    
+    from scripts.database import get_user_by_id
+    legacy = get_user_by_id(user_id, {"profile_photo": 1})
+    if legacy is None:
+        return None
+    photo_hash = None
+    if legacy.get('profile_photo'):
+        from scripts.profile_photos import migrate_legacy_profile_photo
+        photo_hash = migrate_legacy_profile_photo(user_id, legacy['profile_photo'])
+    st.session_state['session_user_photo'] = (user_id, photo_hash)
+    return photo_hash
+
+#oublier l'utilisateur mémorisé (après update_user_profile, update_profile_photo, à la déconnexion)
+def invalidate_session_user():
+    st.session_state.pop('session_user', None)
+    st.session_state.pop('session_user_photo', None)
@@ -0,0 +1,89 @@
+#visualiseur 3D des modèles de protéines et tableau de qualité, à partir des résumés du bundle
+#le HTML py3Dmol est mémorisé par (fichier, signature, style) : le modèle n'est relu que s'il change
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+from scripts.fingerprints import fingerprint_files
+from scripts.model_confidence import confidence_bands, load_pae, load_plddt
+from scripts.structure_assets import viewer_model
+
+STYLES = {
+    "Cartoon": {'cartoon': {'color': 'spectrum'}},
+    "Stick": {'stick': {'colorscheme': 'greenCarbon', 'radius': 0.2}},
+    "Sphere": {'sphere': {'colorscheme': 'blueCarbon', 'radius': 0.5}},
+    "Line": {'line': {'colorscheme': 'redCarbon', 'linewidth': 1.0}}
+}
+# une trace CA n'a pas de liaisons : seul le tracé du squelette ou les sphères sont lisibles
+CA_TRACE_STYLE = {'cartoon': {'style': 'trace', 'color': 'spectrum'}}
+
+
+@st.cache_data(show_spinner=False, max_entries=16)
+def load_viewer_html(pdb_path, signature, summary, style):
+    import py3Dmol  # ~0.4 s à l'import : chargé au premier affichage d'un modèle
+    
+    pdb_data, ca_only = viewer_model(pdb_path, summary)
+
+    view = py3Dmol.view(width=600, height=400)
+    view.addModel(pdb_data, "pdb")
+    if ca_only and style != "Sphere":
+        view.setStyle(CA_TRACE_STYLE)
+    else:
+        view.setStyle(STYLES[style])
+    view.zoomTo()
+    view.spin(True)
+    return view._make_html(), ca_only
+
+
+#afficher le modèle 3D sélectionné (model = StructureModel du bundle)
+def display_structure_viewer(model):
+    # Add some controls for the visualization
+    style_option = st.radio(
+        "Visualization style :",
+        tuple(STYLES),
+        horizontal=True
+    )
+
+    html, ca_only = load_viewer_html(model.path, fingerprint_files(model.path), model.summary, style_option)
+    if ca_only:
+        st.caption(f"Large model ({model.summary['atom_count']:,} atoms): showing the C-alpha trace.")
+
+    # Display the 3D visualization in Streamlit
+    st.components.v1.html(html, height=400)
+
+
+#tableau de qualité des modèles, calculé à partir des résumés (pLDDT moyen des carbones alpha)
+def structure_quality_table(structures):
+    return pd.DataFrame({
+        "Protein ID": [model.protein_id for model in structures],
+        "Residues": [model.summary["residue_count"] for model in structures],
+        "Chains": [", ".join(model.summary["chains"]) for model in structures],
+        "Mean pLDDT": [model.summary["mean_plddt"] for model in structures],
+        "Quality Category": [model.summary["quality"] for model in structures]
+    })
+
+
+#pLDDT par résidu et PAE enregistrés au moment de la prédiction (tableaux float16)
+@st.cache_data(show_spinner=False, max_entries=32)
+def load_confidence(pdb_path, signature):
+    return load_plddt(pdb_path), load_pae(pdb_path)
+
+
+#confiance par résidu d'un modèle : courbe pLDDT, bandes de confiance et PAE si disponible
+def display_model_confidence(model):
+    plddt, pae = load_confidence(model.path, fingerprint_files(model.path))
+    if not len(plddt):
+        st.info("No per-residue confidence available for this model.")
+        return
+
+    st.line_chart(pd.DataFrame({"pLDDT": plddt.astype(np.float32)},
+                               index=pd.Index(np.arange(1, len(plddt) + 1), name="Residue")))
+
+    bands_df = pd.DataFrame(confidence_bands(plddt))
+    bands_df.columns = ["Confidence band", "pLDDT", "Residues", "Residues (%)"]
+    st.dataframe(bands_df, use_container_width=True)
+
+    if pae is not None:
+        # PAE de 0 à 30 Å : clair = erreur attendue faible, foncé = erreur attendue élevée
+        image = (255 * (1 - np.clip(pae.astype(np.float32) / 30.0, 0, 1))).astype(np.uint8)
+        st.image(image, caption="Predicted Aligned Error (light = low expected error, dark = up to 30 Å)", width=400)
@@ -8,6 +8,16 @@ import pandas as pd
 import os
 import re
 
+try:
+    from tracing import count_request, span
+    from metrics import external_call, stage
+    from compressed_io import open_text
+except ImportError:
+    # importé depuis le package scripts (et non lancé comme script)
+    from scripts.tracing import count_request, span
+    from scripts.metrics import external_call, stage
+    from scripts.compressed_io import open_text
+
 #exécution duu model deepgoplus
 def run_deepgoplus(input_fasta, output_file, data_root):
     
@@ -30,7 +40,9 @@ def run_deepgoplus(input_fasta, output_file, data_root):
     
     try:
         print("**Exécution de DeepGOPlus en cours")
-        subprocess.run(cmd, check=True)
+        with span("deepgoplus", kind="external", tool="DeepGOPlus"), external_call("deepgoplus"):
+            count_request()
+            subprocess.run(cmd, check=True)
         print("**DeepGOPlus exécuté avec succès")
         
     except subprocess.CalledProcessError as e:
@@ -69,7 +81,7 @@ def extract_annotation(deepgoplus_output_tsv, predicted_genes_fasta):
         results = []
 
         # lire le fichier FASTA pour obtenir les positions des gènes
-        with open(predicted_genes_fasta, "r") as f:
+        with open_text(predicted_genes_fasta, "r") as f:
             fasta_headers = [line.strip() for line in f.readlines() if line.startswith(">")]
         
          # assurer que chaque en-tête FASTA correspond à un identifiant de gène dans les résultats de DeepGOPlus
@@ -137,15 +149,18 @@ def main():
         return
     
     # analyser les annotations réalisées
-    annotations_df = extract_annotation(deepgoplus_output_tsv, predicted_genes_fasta)
+    with span("extract_annotation"):
+        annotations_df = extract_annotation(deepgoplus_output_tsv, predicted_genes_fasta)
     
     if annotations_df.empty:
         print("**Aucune annotation extraite")
         return
     
     # sauvegarder les annotations réalisés dans un fichier csv pour les utiliser dans l'affichage
-    annotations_df.to_csv(final_annotations_csv, index=False)
+    with span("write_annotations"):
+        annotations_df.to_csv(final_annotations_csv, index=False)
     print(f"**Annotations terminées avec succès")
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    with stage("go_annotation"):
+        main()
\ No newline at end of file
@@ -0,0 +1,187 @@
+#instantanés des fichiers produits par les étapes du pipeline, partagés entre tous les users et rangés
+#par empreinte de l'analyse : empreinte de la séquence normalisée (voir scripts/uploads.py) et de la
+#configuration du pipeline (version, contenu des scripts, prédicteur de gènes). Après chaque étape réussie, ses
+#fichiers sont copiés dans ARTIFACT_DIR/<empreinte>/step_<n>/ ; quand la même analyse est de nouveau
+#demandée (par n'importe quel user), les étapes déjà calculées sont restaurées dans le répertoire de
+#travail au lieu d'être relancées. Les séquences qui utilisent un instantané le référencent par
+#analysis_key : il est supprimé avec la dernière d'entre elles (voir database.delete_unused_artifacts)
+#les fichiers sont copiés (et non liés) : les étapes suivantes réécrivent les fichiers de travail
+#les fichiers texte (GFF, FASTA, TSV, CSV) sont conservés compressés (gzip) et décompressés à la restauration
+#les résultats du prédicteur fake (GFF factice) ne sont jamais enregistrés ni épinglés
+import json
+import os
+import shlex
+import shutil
+
+from scripts.compressed_io import convert_file
+from scripts.fingerprints import fingerprint_data, fingerprint_file_content
+from scripts.gene_predictors import AUGUSTUS_ARGS, AUGUSTUS_SPECIES, GENE_PREDICTOR
+
+ARTIFACT_DIR = os.environ.get('ARTIFACT_DIR', "C:\\Users\\MSI\\Documents\\PFE\\DNA_project\\data\\artifacts")
+MANIFEST_NAME = "manifest.json"
+# marqueur des analyses épinglées (exemple précalculé) : jamais supprimées avec les séquences
+PIN_NAME = "pinned"
+# à incrémenter quand un outil externe change (modèle AUGUSTUS, données DeepGOPlus, modèle LLM, ESMFold) :
+# les résultats calculés avec l'ancienne version ne sont plus réutilisés
+PIPELINE_VERSION = os.environ.get('PIPELINE_VERSION', "1")
+# scripts des étapes et modules qu'ils utilisent : une modification de l'un d'eux change l'empreinte de l'analyse
+PIPELINE_SCRIPTS = ("predict_genes.py", "gene_predictors.py", "compressed_io.py", "fasta_index.py",
+                    "annotations_go.py", "functions_go.py", "llm_gemini_resume.py", "protein_model.py",
+                    "model_confidence.py")
+# prédicteurs dont les résultats ne sont pas partagés (sortie factice, voir gene_predictors.FakeGenePredictor)
+UNSHAREABLE_PREDICTORS = ("fake",)
+SCRIPTS_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# fichiers (ou répertoires) du répertoire de travail produits par chaque étape
+STEP_ARTIFACTS = {
+    1: ("augustus_output.gff", "predicted_genes.fasta", "protein_sequences.fasta"),
+    2: ("deepgoplus_output.tsv", "final_annotations.csv"),
+    3: ("final_annotations.csv",),
+    4: ("pdb_models",)
+}
+# extensions des fichiers compressés dans les instantanés
+COMPRESSED_EXTENSIONS = (".gff", ".fasta", ".tsv", ".csv")
+
+
+#configuration du pipeline qui fait partie de l'empreinte de l'analyse : version, scripts et prédicteur de
+#gènes (backend, espèce et options d'AUGUSTUS, lus dans le même environnement que les scripts des étapes)
+def pipeline_config(scripts_dir=SCRIPTS_DIR):
+    scripts = {}
+    for name in PIPELINE_SCRIPTS:
+        path = os.path.join(scripts_dir, name)
+        scripts[name] = fingerprint_file_content(path) if os.path.exists(path) else None
+    predictor = {"name": GENE_PREDICTOR, "species": AUGUSTUS_SPECIES, "args": shlex.split(AUGUSTUS_ARGS)}
+    return {"version": PIPELINE_VERSION, "scripts": scripts, "predictor": predictor}
+
+
+#les résultats de cette configuration peuvent-ils être enregistrés et partagés entre users
+def shareable_config(config=None):
+    config = config if config is not None else pipeline_config()
+    return config.get("predictor", {}).get("name") not in UNSHAREABLE_PREDICTORS
+
+
+#empreinte d'une analyse : séquence normalisée (content_hash) et configuration du pipeline
+def analysis_fingerprint(content_hash, config=None):
+    return fingerprint_data({"input": content_hash, "pipeline": config if config is not None else pipeline_config()})
+
+
+def artifact_dir(analysis_key, artifact_root=ARTIFACT_DIR):
+    return os.path.join(artifact_root, analysis_key)
+
+
+def step_dir(analysis_key, step, artifact_root=ARTIFACT_DIR):
+    return os.path.join(artifact_dir(analysis_key, artifact_root), f"step_{step}")
+
+
+def _copy(source, destination):
+    if os.path.isdir(source):
+        shutil.copytree(source, destination)
+    else:
+        shutil.copy2(source, destination)
+
+
+def _remove(path):
+    if os.path.isdir(path):
+        shutil.rmtree(path)
+    elif os.path.exists(path):
+        os.remove(path)
+
+
+#copier les fichiers de l'étape step depuis data_dir ; l'instantané est remplacé en une fois
+#(copie dans un répertoire temporaire puis renommage) pour ne jamais restaurer une étape incomplète
+#renvoie None sans rien enregistrer si aucun fichier n'existe ou si le prédicteur configuré est fake
+def snapshot_step(analysis_key, step, data_dir, artifact_root=ARTIFACT_DIR):
+    if not shareable_config():
+        return None
+    names = [name for name in STEP_ARTIFACTS.get(step, ()) if os.path.exists(os.path.join(data_dir, name))]
+    if not names:
+        return None
+    destination = step_dir(analysis_key, step, artifact_root)
+    tmp_dir = f"{destination}.{os.getpid()}.tmp"
+    _remove(tmp_dir)
+    os.makedirs(tmp_dir)
+    try:
+        compressed = [name for name in names if name.endswith(COMPRESSED_EXTENSIONS)]
+        for name in names:
+            if name in compressed:
+                convert_file(os.path.join(data_dir, name), os.path.join(tmp_dir, f"{name}.gz"))
+            else:
+                _copy(os.path.join(data_dir, name), os.path.join(tmp_dir, name))
+        with open(os.path.join(tmp_dir, MANIFEST_NAME), "w", encoding="utf-8") as f:
+            json.dump({"step": step, "files": names, "compressed": compressed}, f)
+        _remove(destination)
+        os.replace(tmp_dir, destination)
+    except OSError:
+        _remove(tmp_dir)
+        raise
+    return destination
+
+
+def _manifest(analysis_key, step, artifact_root=ARTIFACT_DIR):
+    try:
+        with open(os.path.join(step_dir(analysis_key, step, artifact_root), MANIFEST_NAME), "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+#dernière étape restaurable : les étapes 1..n doivent toutes avoir un instantané (0 si aucune)
+def restorable_step(analysis_key, artifact_root=ARTIFACT_DIR):
+    last = 0
+    for step in sorted(STEP_ARTIFACTS):
+        if _manifest(analysis_key, step, artifact_root) is None:
+            break
+        last = step
+    return last
+
+
+#restaurer dans data_dir les fichiers d'une étape, False si elle n'a pas d'instantané
+def restore_step(analysis_key, step, data_dir, artifact_root=ARTIFACT_DIR):
+    manifest = _manifest(analysis_key, step, artifact_root)
+    if manifest is None:
+        return False
+    source_dir = step_dir(analysis_key, step, artifact_root)
+    for name in manifest["files"]:
+        destination = os.path.join(data_dir, name)
+        _remove(destination)
+        if name in manifest.get("compressed", ()):
+            convert_file(os.path.join(source_dir, f"{name}.gz"), destination)
+        else:
+            _copy(os.path.join(source_dir, name), destination)
+    return True
+
+
+#restaurer dans data_dir les fichiers des étapes 1..up_to (par défaut toutes les étapes disponibles),
+#dans l'ordre : une étape plus avancée remplace les fichiers qu'elle réécrit (final_annotations.csv)
+#renvoie la dernière étape restaurée
+def restore_steps(analysis_key, data_dir, up_to=None, artifact_root=ARTIFACT_DIR):
+    last = restorable_step(analysis_key, artifact_root)
+    if up_to is not None:
+        last = min(last, up_to)
+    for step in range(1, last + 1):
+        restore_step(analysis_key, step, data_dir, artifact_root)
+    return last
+
+
+#épingler une analyse ; refusé (ValueError) quand le prédicteur configuré est fake
+def pin_artifacts(analysis_key, artifact_root=ARTIFACT_DIR):
+    if not shareable_config():
+        raise ValueError(f"Results of the {GENE_PREDICTOR} gene predictor cannot be pinned")
+    os.makedirs(artifact_dir(analysis_key, artifact_root), exist_ok=True)
+    open(os.path.join(artifact_dir(analysis_key, artifact_root), PIN_NAME), "w").close()
+
+
+def unpin_artifacts(analysis_key, artifact_root=ARTIFACT_DIR):
+    _remove(os.path.join(artifact_dir(analysis_key, artifact_root), PIN_NAME))
+
+
+def is_pinned(analysis_key, artifact_root=ARTIFACT_DIR):
+    return os.path.exists(os.path.join(artifact_dir(analysis_key, artifact_root), PIN_NAME))
+
+
+#supprimer tous les instantanés d'une analyse (sauf si elle est épinglée), renvoie True si supprimés
+def remove_artifacts(analysis_key, artifact_root=ARTIFACT_DIR):
+    if is_pinned(analysis_key, artifact_root):
+        return False
+    _remove(artifact_dir(analysis_key, artifact_root))
+    return True
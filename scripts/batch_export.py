@@ -0,0 +1,106 @@
+#export groupé de plusieurs analyses : une archive ZIP avec le rapport PDF de chaque séquence
+#et les annotations de toutes les séquences dans un seul CSV (et Parquet si pyarrow est installé)
+#les rapports absents du cache sont rendus en parallèle dans un pool de processus (reportlab est limité par le CPU)
+import os
+import zipfile
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import datetime
+
+import pandas as pd
+
+from scripts.rapport_results import build_genevision_report
+from scripts.report_cache import get_cached_report, load_report_source, report_tmp_path, store_rendered_report
+from scripts.database import get_sequence_annotations
+
+EXPORT_DIR = os.environ.get('EXPORT_DIR', "C:\\Users\\MSI\\Documents\\PFE\\DNA_project\\reports\\exports")
+# nombre de processus de rendu (par défaut un par coeur)
+BATCH_EXPORT_WORKERS = int(os.environ.get('BATCH_EXPORT_WORKERS', os.cpu_count() or 1))
+
+
+#rapports des séquences demandées : {seq_id: contenu de l'entrée reports}, {seq_id: erreur}
+#progress(terminés, total) est appelé à chaque rapport prêt
+def collect_reports(seq_ids, progress=None):
+    reports = {}
+    errors = {}
+    jobs = []
+
+    for seq_id in seq_ids:
+        analysis_data, fingerprint = load_report_source(seq_id)
+        if analysis_data is None:
+            errors[seq_id] = "No analysis results available"
+            continue
+        cached = get_cached_report(seq_id, fingerprint)
+        if cached:
+            reports[seq_id] = cached
+        else:
+            jobs.append((seq_id, fingerprint, analysis_data))
+
+    total = len(reports) + len(jobs)
+    done = len(reports)
+    if progress:
+        progress(done, total)
+
+    if jobs:
+        with ProcessPoolExecutor(max_workers=min(BATCH_EXPORT_WORKERS, len(jobs))) as pool:
+            futures = {
+                pool.submit(build_genevision_report, analysis_data, report_tmp_path(seq_id, fingerprint)): (seq_id, fingerprint)
+                for seq_id, fingerprint, analysis_data in jobs
+            }
+            for future in as_completed(futures):
+                seq_id, fingerprint = futures[future]
+                try:
+                    reports[seq_id] = store_rendered_report(seq_id, fingerprint, future.result())
+                except Exception as e:
+                    errors[seq_id] = str(e)
+                done += 1
+                if progress:
+                    progress(done, total)
+
+    return reports, errors
+
+
+#annotations de toutes les séquences dans un seul tableau (colonne sequence_id en tête)
+def combined_annotations(seq_ids):
+    frames = []
+    for seq_id in seq_ids:
+        annotations = get_sequence_annotations(seq_id)
+        if annotations:
+            df = pd.DataFrame(annotations)
+            df.insert(0, "sequence_id", seq_id)
+            frames.append(df)
+    return pd.concat(frames, ignore_index=True) if frames else pd.DataFrame(columns=["sequence_id"])
+
+
+#écrire l'archive : PDF (et annexes FASTA) stockés tels quels, annotations compressées
+def write_export_zip(zip_path, reports, annotations, errors=None):
+    with zipfile.ZipFile(zip_path, "w") as archive:
+        for seq_id, report in reports.items():
+            archive.write(report["report_path"], f"reports/genevision_report_{seq_id}.pdf",
+                          compress_type=zipfile.ZIP_STORED)
+            for attachment in report.get("attachments", []):
+                if os.path.exists(attachment):
+                    archive.write(attachment, f"reports/{os.path.basename(attachment)}",
+                                  compress_type=zipfile.ZIP_DEFLATED)
+
+        archive.writestr("annotations.csv", annotations.to_csv(index=False), compress_type=zipfile.ZIP_DEFLATED)
+        try:
+            archive.writestr("annotations.parquet", annotations.to_parquet(index=False),
+                             compress_type=zipfile.ZIP_STORED)
+        except ImportError:
+            pass  # pyarrow/fastparquet non installé : CSV seulement
+
+        if errors:
+            lines = [f"{seq_id}: {error}" for seq_id, error in errors.items()]
+            archive.writestr("errors.txt", "\n".join(lines) + "\n", compress_type=zipfile.ZIP_DEFLATED)
+    return zip_path
+
+
+#export complet : renvoie (chemin de l'archive, nombre de rapports, erreurs)
+def export_analyses(seq_ids, user_name="user", progress=None):
+    os.makedirs(EXPORT_DIR, exist_ok=True)
+    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+    zip_path = os.path.join(EXPORT_DIR, f"genevision_export_{user_name}_{timestamp}.zip")
+
+    reports, errors = collect_reports(seq_ids, progress)
+    write_export_zip(zip_path, reports, combined_annotations(seq_ids), errors)
+    return zip_path, len(reports), errors
@@ -0,0 +1,323 @@
+#lecture et écriture des fichiers compressés du pipeline (FASTA, GFF, TSV) : le format est reconnu à la
+#signature du fichier en lecture (gzip, bgzip, zstd) et à l'extension en écriture (.gz, .bgz, .zst)
+#un fichier non compressé est ouvert normalement
+#
+#bgzip (BGZF) écrit une suite de blocs gzip indépendants d'au plus 64 Ko : l'index .gzi (même format que
+#`bgzip -i` / samtools) donne la position de chaque bloc, une plage du fichier décompressé est lue en ne
+#décompressant que les blocs qui la contiennent (voir fasta_index.FastaReader)
+#
+#usage (compresser un génome avec son index) :
+#   python -m scripts.compressed_io genome.fasta             -> genome.fasta.bgz + genome.fasta.bgz.gzi
+#   python -m scripts.compressed_io genome.fasta.gz --output genome.fa.bgz
+import argparse
+import bisect
+import gzip
+import io
+import os
+import shutil
+import struct
+import zlib
+
+try:
+    from fingerprints import file_stamp, is_stamped, write_stamp
+except ImportError:
+    # importé depuis le package scripts (et non lancé comme script)
+    from scripts.fingerprints import file_stamp, is_stamped, write_stamp
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None  # fichiers .zst refusés avec un message explicite
+
+GZIP_MAGIC = b"\x1f\x8b"
+ZSTD_MAGIC = b"\x28\xb5\x2f\xfd"
+# extension -> format écrit
+COMPRESSION_SUFFIXES = {".gz": "gzip", ".bgz": "bgzf", ".zst": "zstd"}
+
+# données non compressées par bloc BGZF (valeur de bgzip) et bloc vide qui termine un fichier BGZF
+BGZF_BLOCK_SIZE = 0xff00
+BGZF_EOF = bytes.fromhex("1f8b08040000000000ff0600424302001b0003000000000000000000")
+# en-tête gzip d'un bloc BGZF : champ extra "BC" de 2 octets contenant la taille du bloc - 1
+BGZF_HEADER = struct.Struct("<4BI2BH2BHH")
+BGZF_HEADER_SIZE = BGZF_HEADER.size
+COMPRESSION_LEVEL = 6
+
+
+#format d'un flux d'après ses premiers octets : "bgzf", "gzip", "zstd" ou None (non compressé)
+def sniff_compression(head):
+    if head[:2] == GZIP_MAGIC:
+        # FLG.FEXTRA et sous-champ "BC" en tête du champ extra
+        if len(head) >= 14 and head[3] & 4 and head[12:14] == b"BC":
+            return "bgzf"
+        return "gzip"
+    if head[:4] == ZSTD_MAGIC:
+        return "zstd"
+    return None
+
+
+def detect_compression(path):
+    with open(path, "rb") as f:
+        return sniff_compression(f.read(BGZF_HEADER_SIZE))
+
+
+#format à écrire d'après l'extension du chemin
+def compression_for_path(path):
+    return COMPRESSION_SUFFIXES.get(os.path.splitext(path)[1].lower())
+
+
+#chemin sans l'extension de compression (genome.fasta.gz -> genome.fasta)
+def strip_compression_suffix(path):
+    root, suffix = os.path.splitext(path)
+    return root if suffix.lower() in COMPRESSION_SUFFIXES else path
+
+
+def _require_zstd():
+    if zstandard is None:
+        raise ValueError("zstd-compressed files need the zstandard package (pip install zstandard)")
+    return zstandard
+
+
+#décompresser un flux de blocs d'octets (chunks) ; gzip et bgzip peuvent contenir plusieurs membres,
+#zstd plusieurs frames : chaque membre est décompressé à la suite du précédent
+#un flux corrompu ou tronqué lève zlib.error ou ValueError
+def decompress_chunks(chunks, compression):
+    if compression in ("gzip", "bgzf"):
+        new_decompressor = lambda: zlib.decompressobj(zlib.MAX_WBITS | 16)
+        errors = zlib.error
+    elif compression == "zstd":
+        zstd = _require_zstd()
+        new_decompressor = lambda: zstd.ZstdDecompressor().decompressobj()
+        errors = zstd.ZstdError
+    else:
+        yield from chunks
+        return
+
+    decompressor = new_decompressor()
+    member_open = False
+    for chunk in chunks:
+        while chunk:
+            member_open = True
+            try:
+                data = decompressor.decompress(chunk)
+            except errors as e:
+                raise ValueError(str(e)) from e
+            yield data
+            if not decompressor.eof:
+                break
+            # fin d'un membre : le reste du bloc appartient au membre suivant
+            member_open = False
+            chunk = decompressor.unused_data
+            decompressor = new_decompressor()
+    if member_open:
+        raise ValueError(f"the {'zstd' if compression == 'zstd' else 'gzip'} file is truncated")
+
+
+#ouvrir un fichier en binaire ; "rb" : décompression selon la signature, "wb" : compression selon l'extension
+def open_binary(path, mode="rb"):
+    if mode == "rb":
+        compression = detect_compression(path)
+        if compression in ("gzip", "bgzf"):
+            return gzip.open(path, "rb")
+        if compression == "zstd":
+            reader = _require_zstd().ZstdDecompressor().stream_reader(open(path, "rb"), read_across_frames=True,
+                                                                      closefd=True)
+            return io.BufferedReader(reader)
+        return open(path, "rb")
+
+    if mode == "wb":
+        compression = compression_for_path(path)
+        if compression == "gzip":
+            return gzip.open(path, "wb", compresslevel=COMPRESSION_LEVEL)
+        if compression == "bgzf":
+            return BgzfWriter(path)
+        if compression == "zstd":
+            return _require_zstd().ZstdCompressor().stream_writer(open(path, "wb"), closefd=True)
+        return open(path, "wb")
+
+    raise ValueError(f"Unsupported mode: {mode}")
+
+
+#ouvrir un fichier texte ("r"/"rt" ou "w"/"wt"), compressé ou non
+def open_text(path, mode="r", encoding="utf-8"):
+    binary_mode = "rb" if mode in ("r", "rt") else "wb" if mode in ("w", "wt") else None
+    if binary_mode is None:
+        raise ValueError(f"Unsupported mode: {mode}")
+    compression = detect_compression(path) if binary_mode == "rb" else compression_for_path(path)
+    if compression is None:
+        return open(path, mode, encoding=encoding)
+    return io.TextIOWrapper(open_binary(path, binary_mode), encoding=encoding)
+
+
+#copier source (compressé ou non) vers destination (compressé selon son extension)
+def convert_file(source, destination):
+    with open_binary(source) as src, open_binary(destination, "wb") as dst:
+        shutil.copyfileobj(src, dst, 1024 * 1024)
+    return destination
+
+
+# --- BGZF -------------------------------------------------------------------------------------------------
+
+def _bgzf_block(data, level=COMPRESSION_LEVEL):
+    compressor = zlib.compressobj(level, zlib.DEFLATED, -zlib.MAX_WBITS)
+    payload = compressor.compress(data) + compressor.flush()
+    block_size = BGZF_HEADER_SIZE + len(payload) + 8
+    header = BGZF_HEADER.pack(0x1f, 0x8b, 8, 4, 0, 0, 0xff, 6, ord("B"), ord("C"), 2, block_size - 1)
+    return header + payload + struct.pack("<II", zlib.crc32(data), len(data))
+
+
+#écriture au format BGZF ; l'index .gzi est construit pendant l'écriture et enregistré à la fermeture
+class BgzfWriter(io.RawIOBase):
+
+    def __init__(self, path, write_index=True, level=COMPRESSION_LEVEL):
+        self.path = path
+        self.write_index = write_index
+        self.level = level
+        self._file = open(path, "wb")
+        self._buffer = bytearray()
+        self._compressed_offset = 0
+        self._uncompressed_offset = 0
+        # (position compressée, position décompressée) du début de chaque bloc
+        self.index = [(0, 0)]
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        self._buffer += data
+        while len(self._buffer) >= BGZF_BLOCK_SIZE:
+            self._flush_block(bytes(self._buffer[:BGZF_BLOCK_SIZE]))
+            del self._buffer[:BGZF_BLOCK_SIZE]
+        return len(data)
+
+    def _flush_block(self, data):
+        block = _bgzf_block(data, self.level)
+        self._file.write(block)
+        self._compressed_offset += len(block)
+        self._uncompressed_offset += len(data)
+        self.index.append((self._compressed_offset, self._uncompressed_offset))
+
+    def close(self):
+        if self.closed:
+            return
+        if self._buffer:
+            self._flush_block(bytes(self._buffer))
+            self._buffer.clear()
+        self._file.write(BGZF_EOF)
+        self._file.close()
+        # la dernière entrée est la fin des données, pas le début d'un bloc
+        self.index.pop()
+        if self.write_index:
+            write_gzi(self.index, f"{self.path}.gzi")
+            write_stamp(f"{self.path}.gzi", self.path)
+        super().close()
+
+
+#parcourir les en-têtes des blocs d'un fichier BGZF sans les décompresser : [(position compressée, décompressée)]
+def build_gzi(path):
+    index = []
+    compressed_offset = uncompressed_offset = 0
+    with open(path, "rb") as f:
+        while True:
+            header = f.read(BGZF_HEADER_SIZE)
+            if not header:
+                break
+            if len(header) < BGZF_HEADER_SIZE or sniff_compression(header) != "bgzf":
+                raise ValueError(f"{path} is not a BGZF file (compress it with bgzip)")
+            block_size = BGZF_HEADER.unpack(header)[-1] + 1
+            f.seek(block_size - BGZF_HEADER_SIZE - 4, os.SEEK_CUR)
+            data_size = struct.unpack("<I", f.read(4))[0]
+            if data_size:
+                index.append((compressed_offset, uncompressed_offset))
+            compressed_offset += block_size
+            uncompressed_offset += data_size
+    return index
+
+
+#format .gzi : nombre d'entrées puis paires (position compressée, décompressée), uint64 little-endian,
+#sans l'entrée (0, 0) du premier bloc
+def write_gzi(index, gzi_path):
+    entries = [entry for entry in index if entry != (0, 0)]
+    with open(gzi_path, "wb") as f:
+        f.write(struct.pack("<Q", len(entries)))
+        for compressed_offset, uncompressed_offset in entries:
+            f.write(struct.pack("<QQ", compressed_offset, uncompressed_offset))
+
+
+def read_gzi(gzi_path):
+    with open(gzi_path, "rb") as f:
+        count = struct.unpack("<Q", f.read(8))[0]
+        values = struct.unpack(f"<{2 * count}Q", f.read(16 * count))
+    return [(0, 0)] + list(zip(values[0::2], values[1::2]))
+
+
+#charger l'index .gzi à côté du fichier s'il a été construit pour cette version du fichier (taille et date
+#enregistrées dans <index>.stamp, voir fingerprints.file_stamp), sinon le (re)construire (même règle que les .fai)
+def load_gzi(path):
+    gzi_path = f"{path}.gzi"
+    try:
+        if is_stamped(gzi_path, path):
+            return read_gzi(gzi_path)
+    except (OSError, struct.error):
+        pass
+    stamp = file_stamp(path)
+    index = build_gzi(path)
+    try:
+        write_gzi(index, gzi_path)
+        write_stamp(gzi_path, path, stamp)
+    except OSError:
+        pass  # répertoire en lecture seule : l'index reste en mémoire
+    return index
+
+
+#lecture d'une plage du fichier décompressé : seuls les blocs qui la contiennent sont décompressés
+class BgzfRandomReader:
+
+    def __init__(self, path, index=None):
+        self.index = index if index is not None else load_gzi(path)
+        self._starts = [uncompressed_offset for _, uncompressed_offset in self.index]
+        self._file = open(path, "rb")
+
+    def read(self, offset, length):
+        if length <= 0 or not self.index:
+            return b""
+        block = max(0, bisect.bisect_right(self._starts, offset) - 1)
+        compressed_offset, block_start = self.index[block]
+        self._file.seek(compressed_offset)
+        parts = []
+        remaining = offset + length - block_start
+        while remaining > 0:
+            header = self._file.read(BGZF_HEADER_SIZE)
+            if len(header) < BGZF_HEADER_SIZE:
+                break
+            block_size = BGZF_HEADER.unpack(header)[-1] + 1
+            data = zlib.decompress(self._file.read(block_size - BGZF_HEADER_SIZE)[:-8], -zlib.MAX_WBITS)
+            parts.append(data)
+            remaining -= len(data)
+        skip = offset - block_start
+        return b"".join(parts)[skip:skip + length]
+
+    def close(self):
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compresser un fichier au format BGZF avec son index .gzi")
+    parser.add_argument("input", type=str, help="Fichier d'entrée (compressé ou non)")
+    parser.add_argument("--output", type=str, default=None, help="Fichier de sortie (par défaut <entrée>.bgz)")
+    args = parser.parse_args()
+
+    output = args.output or f"{strip_compression_suffix(args.input)}.bgz"
+    if compression_for_path(output) != "bgzf":
+        parser.error("the output file must end with .bgz")
+    convert_file(args.input, output)
+    print(f"**Fichier compressé : {output} (index {output}.gzi)")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,11 +1,15 @@
-from pymongo import MongoClient
+from pymongo import MongoClient, monitoring
 from bson import ObjectId
-from datetime import datetime
+from gridfs import GridFSBucket
+from datetime import datetime, timedelta
 import os
 import logging
 from werkzeug.security import generate_password_hash, check_password_hash
 from dotenv import load_dotenv
 
+from scripts.fingerprints import fingerprint_data
+from scripts.metrics import METRICS_ENABLED, ANALYSIS_RESULTS, MONGODB_FAILURES, MONGODB_SECONDS
+
 # Charger les variables d'environnement
 load_dotenv()
 
@@ -13,11 +17,53 @@ load_dotenv()
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger('genevision_db')
 
+# Durée de conservation de l'historique (en jours) : valeur par défaut et valeurs par type d'action
+# (None = jamais supprimé). Les entrées expirent via l'index TTL sur "expires_at".
+# Les valeurs par type d'action sont modifiables par HISTORY_RETENTION_BY_ACTION,
+# ex: "user_logout=7,sequence_create=180,user_create=none"
+HISTORY_RETENTION_DAYS = int(os.environ.get('HISTORY_RETENTION_DAYS', 90))
+DEFAULT_HISTORY_RETENTION_BY_ACTION = {
+    "user_create": None,
+    "password_reset": 365,
+    "password_change": 365,
+    "sequence_delete": 365,
+    "user_logout": 30,
+    "protein_model_viewed": 30
+}
+
+#durées par type d'action : valeurs par défaut complétées ou remplacées par "action=jours,action=none"
+def parse_history_retention(value, defaults=DEFAULT_HISTORY_RETENTION_BY_ACTION):
+    retention = dict(defaults)
+    for item in filter(None, (part.strip() for part in value.split(","))):
+        action, _, days = item.partition("=")
+        if not action.strip() or not days.strip():
+            raise ValueError(f"Invalid HISTORY_RETENTION_BY_ACTION entry: {item!r} (expected action=days)")
+        retention[action.strip()] = None if days.strip().lower() == "none" else int(days)
+    return retention
+
+HISTORY_RETENTION_BY_ACTION = parse_history_retention(os.environ.get('HISTORY_RETENTION_BY_ACTION', ""))
+
+# Projection du document utilisateur affiché à chaque page : sans la photo (blob base64 des anciens comptes)
+# ni le hash du mot de passe ; la photo est référencée par son empreinte (photo_hash)
+USER_SUMMARY_PROJECTION = {"profile_photo": 0, "password_hash": 0}
+
+# Durée des commandes MongoDB (métriques), branché seulement si les métriques sont activées
+class CommandMetrics(monitoring.CommandListener):
+    def started(self, event):
+        pass
+
+    def succeeded(self, event):
+        MONGODB_SECONDS.observe(event.duration_micros / 1e6, command=event.command_name)
+
+    def failed(self, event):
+        MONGODB_SECONDS.observe(event.duration_micros / 1e6, command=event.command_name)
+        MONGODB_FAILURES.inc(command=event.command_name)
+
 # Connexion à MongoDB avec gestion d'erreur
 def get_db():
     uri = os.environ.get('MONGODB_URI', 'mongodb+srv://genevision_db:<db_password>@cluster0.f8uj7qd.mongodb.net/')
     try:
-        client = MongoClient(uri)
+        client = MongoClient(uri, event_listeners=[CommandMetrics()] if METRICS_ENABLED else [])
         db = client['genevision_db']
         # Test de connexion
         client.admin.command('ping')
@@ -35,13 +81,39 @@ try:
     sequences_col = db["sequences"]
     results_col = db["results"]
     reports_col = db["reports"]
+    user_stats_col = db["user_stats"]
+    # photos de profil (JPEG redimensionnés), un fichier par (empreinte du contenu, taille)
+    photos_fs = GridFSBucket(db, bucket_name="profile_photos")
     
     # Création des index pour optimiser les performances
     users_col.create_index("email", unique=True)
-    history_col.create_index("user_id")
+    users_col.create_index("photo_hash", sparse=True)
+    history_col.create_index([("user_id", 1), ("timestamp", -1)])
+    # ancien index simple sur user_id : couvert par l'index (user_id, timestamp)
+    if "user_id_1" in history_col.index_information():
+        history_col.drop_index("user_id_1")
+    history_col.create_index([("user_id", 1), ("action_type", 1), ("timestamp", -1)])
+    history_col.create_index("expires_at", expireAfterSeconds=0)
     sequences_col.create_index("user_id")
+    sequences_col.create_index(
+        [("user_id", 1), ("content_hash", 1), ("created_at", -1)],
+        partialFilterExpression={"content_hash": {"$exists": True}}
+    )
+    sequences_col.create_index("analysis_key", sparse=True)
     results_col.create_index("sequence_id")
+    results_col.create_index(
+        [("sequence_id", 1), ("stage", 1), ("fingerprint", 1)],
+        unique=True,
+        partialFilterExpression={"fingerprint": {"$exists": True}}
+    )
     reports_col.create_index("sequence_id")
+    reports_col.create_index(
+        [("sequence_id", 1), ("type", 1), ("fingerprint", 1), ("template_version", 1)],
+        unique=True,
+        partialFilterExpression={"fingerprint": {"$exists": True}}
+    )
+    sequences_col.create_index([("user_id", 1), ("created_at", -1), ("_id", -1)])
+    sequences_col.create_index([("user_id", 1), ("status", 1), ("created_at", -1), ("_id", -1)])
     
     logger.info("Database collections and indexes initialized")
 
@@ -101,9 +173,10 @@ def verify_user(email, password):
         return None
 
 #récuprer user par id
-def get_user_by_id(user_id):
+#projection: champs à inclure ou exclure (ex: USER_SUMMARY_PROJECTION), None = document complet
+def get_user_by_id(user_id, projection=None):
     try:
-        user = users_col.find_one({"_id": ObjectId(user_id)})
+        user = users_col.find_one({"_id": ObjectId(user_id)}, projection)
         if user:
             user["_id"] = str(user["_id"])
         return user
@@ -159,6 +232,77 @@ def deactivate_user(user_id):
         logger.error(f"User deactivation error: {e}")
         return False
 
+#nom du fichier GridFS d'une photo de profil
+def profile_photo_filename(photo_hash, size):
+    return f"{photo_hash}_{size}.jpg"
+
+#stocker les tailles d'une photo qui ne sont pas (ou plus) dans GridFS
+def upload_missing_photo_sizes(photo_hash, renditions):
+    for size, content in renditions.items():
+        filename = profile_photo_filename(photo_hash, size)
+        if not db["profile_photos.files"].find_one({"filename": filename}, {"_id": 1}):
+            photos_fs.upload_from_stream(filename, content, metadata={"photo_hash": photo_hash, "size": size})
+
+#enregistrer les tailles d'une photo de profil et la référencer dans le document user
+#renditions: {nom de la taille: octets JPEG} ; une photo déjà stockée (même empreinte) n'est pas réécrite
+def save_profile_photo(user_id, photo_hash, renditions):
+    try:
+        upload_missing_photo_sizes(photo_hash, renditions)
+        
+        previous = users_col.find_one_and_update(
+            {"_id": ObjectId(user_id)},
+            {"$set": {"photo_hash": photo_hash, "updated_at": datetime.utcnow()}, "$unset": {"profile_photo": ""}},
+            projection={"photo_hash": 1}
+        )
+        if previous is None:
+            return False
+        # la photo a pu être supprimée par delete_unused_profile_photo (autre user) avant la référence
+        upload_missing_photo_sizes(photo_hash, renditions)
+        if previous.get("photo_hash") not in (None, photo_hash):
+            delete_unused_profile_photo(previous["photo_hash"])
+        return True
+    except Exception as e:
+        logger.error(f"Profile photo save error: {e}")
+        return False
+
+#lire une taille de photo de profil (octets JPEG), None si absente
+def get_profile_photo(photo_hash, size):
+    try:
+        return photos_fs.open_download_stream_by_name(profile_photo_filename(photo_hash, size)).read()
+    except Exception as e:
+        logger.error(f"Error getting profile photo: {e}")
+        return None
+
+#retirer la photo de profil d'un user (et l'ancienne photo base64)
+def remove_user_profile_photo(user_id):
+    try:
+        previous = users_col.find_one_and_update(
+            {"_id": ObjectId(user_id)},
+            {"$unset": {"photo_hash": "", "profile_photo": ""}, "$set": {"updated_at": datetime.utcnow()}},
+            projection={"photo_hash": 1}
+        )
+        if previous is None:
+            return False
+        if previous.get("photo_hash"):
+            delete_unused_profile_photo(previous["photo_hash"])
+        return True
+    except Exception as e:
+        logger.error(f"Profile photo removal error: {e}")
+        return False
+
+#supprimer les fichiers d'une photo qu'aucun user ne référence plus (une même photo peut être partagée)
+#un user qui enregistre la même photo pendant la suppression la retrouve : les tailles (quelques Ko) sont
+#lues avant la suppression et restaurées si la photo est de nouveau référencée (voir aussi save_profile_photo)
+def delete_unused_profile_photo(photo_hash):
+    if users_col.count_documents({"photo_hash": photo_hash}, limit=1):
+        return
+    renditions = {}
+    for file in db["profile_photos.files"].find({"metadata.photo_hash": photo_hash}, {"_id": 1, "metadata": 1}):
+        renditions[file["metadata"]["size"]] = photos_fs.open_download_stream(file["_id"]).read()
+        photos_fs.delete(file["_id"])
+    if renditions and users_col.count_documents({"photo_hash": photo_hash}, limit=1):
+        upload_missing_photo_sizes(photo_hash, renditions)
+
 #Gestion des séquences
 def get_download_links(seq_id):
     return {
@@ -169,7 +313,10 @@ def get_download_links(seq_id):
 
 
 #create new sequence per user
-def create_sequence(user_id, sequence, metadata=None):
+#content_hash: empreinte du FASTA normalisé (voir scripts/uploads.py), pour retrouver une séquence déjà envoyée
+#analysis_key: empreinte de l'analyse (séquence + configuration du pipeline), référence aux instantanés
+#partagés des étapes (voir scripts/artifact_store.py)
+def create_sequence(user_id, sequence, metadata=None, content_hash=None, analysis_key=None):
     try:
         seq = {
             "user_id": user_id,
@@ -178,6 +325,10 @@ def create_sequence(user_id, sequence, metadata=None):
             "created_at": datetime.utcnow(),
             "status": "created"
         }
+        if content_hash:
+            seq["content_hash"] = content_hash
+        if analysis_key:
+            seq["analysis_key"] = analysis_key
         
         result = sequences_col.insert_one(seq)
         log_activity(user_id, "sequence_create", "Creating sequence")
@@ -187,10 +338,26 @@ def create_sequence(user_id, sequence, metadata=None):
         logger.error(f"Sequence creation error: {e}")
         return None
 
+#dernière séquence de user ayant le même contenu (sans charger le contenu), None si jamais envoyée
+def find_sequence_by_hash(user_id, content_hash):
+    try:
+        seq = sequences_col.find_one(
+            {"user_id": user_id, "content_hash": content_hash},
+            {"content": 0, "annotations": 0},
+            sort=[("created_at", -1)]
+        )
+        if seq:
+            seq["_id"] = str(seq["_id"])
+        return seq
+    except Exception as e:
+        logger.error(f"Error finding sequence by content hash: {e}")
+        return None
+
 #get sequence par id
-def get_sequence(seq_id):
+#projection: champs à inclure ou exclure (ex: {"analysis_key": 1}), None = document complet
+def get_sequence(seq_id, projection=None):
     try:
-        seq = sequences_col.find_one({"_id": ObjectId(seq_id)})
+        seq = sequences_col.find_one({"_id": ObjectId(seq_id)}, projection)
         if seq:
             seq["_id"] = str(seq["_id"])
         return seq
@@ -198,6 +365,23 @@ def get_sequence(seq_id):
         logger.error(f"Error getting sequence: {e}")
         return None
 
+#annotations enregistrées pour une séquence (sans charger le contenu de la séquence)
+#à défaut, annotations du dernier résultat d'analyse qui en contient
+def get_sequence_annotations(seq_id):
+    try:
+        seq = sequences_col.find_one({"_id": ObjectId(seq_id)}, {"annotations": 1})
+        if seq and seq.get("annotations"):
+            return seq["annotations"]
+        result = results_col.find_one(
+            {"sequence_id": seq_id, "data.annotations": {"$exists": True}},
+            {"data.annotations": 1},
+            sort=[("created_at", -1)]
+        )
+        return result["data"]["annotations"] if result else []
+    except Exception as e:
+        logger.error(f"Error getting sequence annotations: {e}")
+        return []
+
 #get les séquences d'un utilisateur avec filtrage : status: Filtre sur le statut
 def get_user_sequences(user_id, limit=10, status=None):
     try:
@@ -211,6 +395,85 @@ def get_user_sequences(user_id, limit=10, status=None):
         logger.error(f"Error getting user sequences: {e}")
         return []
 
+#get une page de séquences d'un utilisateur (pagination keyset sur (created_at, _id))
+#{cursor: curseur renvoyé par la page précédente (None = première page),
+# status: Filtre sur le statut,
+# start_date / end_date: Filtrage par date de création (datetime),
+# ascending: True = plus anciennes d'abord}
+#retourne (séquences, curseur de la page suivante ou None)
+#le contenu complet n'est pas transféré, seulement "content_preview"
+def get_user_sequences_page(user_id, page_size=10, cursor=None, status=None,
+                            start_date=None, end_date=None, ascending=False, preview_length=180):
+    try:
+        query = {"user_id": user_id}
+        if status:
+            query["status"] = status
+        date_query = build_date_range(start_date, end_date)
+        if date_query:
+            query["created_at"] = date_query
+        if cursor:
+            query = {"$and": [query, build_keyset_filter("created_at", cursor, ascending)]}
+        
+        direction = 1 if ascending else -1
+        pipeline = [
+            {"$match": query},
+            {"$sort": {"created_at": direction, "_id": direction}},
+            {"$limit": page_size + 1},
+            {"$addFields": {"content_preview": {"$substrCP": [{"$ifNull": ["$content", ""]}, 0, preview_length]}}},
+            {"$project": {"content": 0, "annotations": 0}}
+        ]
+        docs = list(sequences_col.aggregate(pipeline))
+        return build_page(docs, page_size, "created_at")
+    except Exception as e:
+        logger.error(f"Error getting user sequences page: {e}")
+        return [], None
+
+#filtre de dates {"$gte": start_date, "$lte": end_date}
+def build_date_range(start_date=None, end_date=None):
+    date_query = {}
+    if start_date:
+        date_query["$gte"] = start_date
+    if end_date:
+        date_query["$lte"] = end_date
+    return date_query
+
+#curseur de pagination : "<valeur de tri iso>|<_id>"
+def encode_page_cursor(value, doc_id):
+    return f"{value.isoformat()}|{doc_id}"
+
+def decode_page_cursor(cursor):
+    value, doc_id = cursor.split("|", 1)
+    return datetime.fromisoformat(value), ObjectId(doc_id)
+
+#filtre keyset : documents situés après le curseur dans l'ordre (field, _id)
+def build_keyset_filter(field, cursor, ascending=False):
+    value, doc_id = decode_page_cursor(cursor)
+    op = "$gt" if ascending else "$lt"
+    return {"$or": [
+        {field: {op: value}},
+        {field: value, "_id": {op: doc_id}}
+    ]}
+
+#découper le résultat (page_size + 1 documents) en page + curseur suivant
+def build_page(docs, page_size, field):
+    has_more = len(docs) > page_size
+    docs = docs[:page_size]
+    next_cursor = None
+    if has_more and docs:
+        next_cursor = encode_page_cursor(docs[-1][field], docs[-1]["_id"])
+    return [{**doc, "_id": str(doc["_id"])} for doc in docs], next_cursor
+
+#compter les séquences d'un utilisateur (sans les charger) : status: Filtre sur le statut
+def count_user_sequences(user_id, status=None):
+    try:
+        query = {"user_id": user_id}
+        if status:
+            query["status"] = {"$in": status} if isinstance(status, list) else status
+        return sequences_col.count_documents(query)
+    except Exception as e:
+        logger.error(f"Error counting user sequences: {e}")
+        return 0
+
 #update de sequence
 def update_sequence(seq_id, user_id, updates):
     try:
@@ -245,38 +508,66 @@ def delete_sequence(seq_id, user_id):
         
         if result.deleted_count:
             log_activity(user_id, "sequence_delete", f"Deletion of the sequence {seq_id}")
+            if seq.get("analysis_key"):
+                delete_unused_artifacts(seq["analysis_key"])
             
         return result.deleted_count > 0
     except Exception as e:
         logger.error(f"Sequence deletion error: {e}")
         return False
 
+#supprimer les instantanés partagés d'une analyse qu'aucune séquence ne référence plus
+#(les résultats d'un user restent à lui : chaque séquence a ses propres documents de résultats)
+#renvoie True si les instantanés ont été supprimés (False : encore référencés ou épinglés)
+def delete_unused_artifacts(analysis_key, artifact_root=None):
+    if sequences_col.count_documents({"analysis_key": analysis_key}, limit=1):
+        return False
+    from scripts.artifact_store import ARTIFACT_DIR, remove_artifacts
+    return remove_artifacts(analysis_key, artifact_root or ARTIFACT_DIR)
+
 # gestion des résultats d'analyse
 
-#save le résultat d'une analyse
-def create_analysis_result(seq_id, data):
+#save le résultat d'une analyse (idempotent)
+#le résultat est identifié par (sequence_id, stage, fingerprint) : une même écriture répétée
+#(rerun streamlit) met à jour le document existant au lieu d'en créer un nouveau
+#fingerprint: empreinte des entrées de l'étape (par défaut empreinte de data)
+#trace: temps et ressources de l'étape (voir scripts/tracing.py), enregistrée hors de l'empreinte des données
+def create_analysis_result(seq_id, data, stage="summary", fingerprint=None, trace=None):
     try:
-        seq = get_sequence(seq_id)
+        # seul le propriétaire est nécessaire, inutile de charger le contenu de la séquence
+        seq = sequences_col.find_one({"_id": ObjectId(seq_id)}, {"user_id": 1})
         if not seq:
             return None
             
         user_id = seq["user_id"]
+        fingerprint = fingerprint or fingerprint_data(data)
+        now = datetime.utcnow()
         
-        res = {
-            "sequence_id": seq_id,
-            "user_id": user_id,
-            "data": data,
-            "created_at": datetime.utcnow()
-        }
+        key = {"sequence_id": seq_id, "stage": stage, "fingerprint": fingerprint}
+        fields = {"user_id": user_id, "data": data, "updated_at": now}
+        if trace:
+            fields["trace"] = trace
+        result = results_col.update_one(
+            key,
+            {
+                "$set": fields,
+                "$setOnInsert": {"created_at": now}
+            },
+            upsert=True
+        )
+        
+        if result.upserted_id is None:
+            existing = results_col.find_one(key, {"_id": 1})
+            return str(existing["_id"]) if existing else None
         
-        result = results_col.insert_one(res)
+        ANALYSIS_RESULTS.inc(stage=stage)
         
         # Mise à jour du statut de la séquence
         update_sequence(seq_id, user_id, {"status": "completed"})
         
         log_activity(user_id, "analysis_complete", f"Analysis completed for sequence {seq_id}")
         
-        return str(result.inserted_id)
+        return str(result.upserted_id)
     except Exception as e:
         logger.error(f"Analysis result creation error: {e}")
         return None
@@ -315,6 +606,56 @@ def create_report(seq_id, content, report_type="standard"):
         logger.error(f"Report creation error: {e}")
         return None
 
+#rapport déjà rendu pour (séquence, empreinte des résultats, version du modèle de rapport)
+def get_report_by_fingerprint(seq_id, fingerprint, template_version, report_type="standard_pdf"):
+    try:
+        rep = reports_col.find_one({
+            "sequence_id": seq_id,
+            "type": report_type,
+            "fingerprint": fingerprint,
+            "template_version": template_version
+        })
+        if rep:
+            rep["_id"] = str(rep["_id"])
+        return rep
+    except Exception as e:
+        logger.error(f"Error getting report by fingerprint: {e}")
+        return None
+
+#enregistrer un rapport rendu (idempotent, une seule entrée par séquence/empreinte/version)
+#content: chemin du fichier et informations de construction (pages, taille, durée)
+def save_report_artifact(seq_id, fingerprint, template_version, content, report_type="standard_pdf"):
+    try:
+        seq = sequences_col.find_one({"_id": ObjectId(seq_id)}, {"user_id": 1})
+        if not seq:
+            return None
+        
+        now = datetime.utcnow()
+        key = {
+            "sequence_id": seq_id,
+            "type": report_type,
+            "fingerprint": fingerprint,
+            "template_version": template_version
+        }
+        result = reports_col.update_one(
+            key,
+            {
+                "$set": {"user_id": seq["user_id"], "content": content, "updated_at": now},
+                "$setOnInsert": {"created_at": now}
+            },
+            upsert=True
+        )
+        
+        if result.upserted_id is None:
+            existing = reports_col.find_one(key, {"_id": 1})
+            return str(existing["_id"]) if existing else None
+        
+        log_activity(seq["user_id"], "report_generate", f"Generate a report for sequence {seq_id}")
+        return str(result.upserted_id)
+    except Exception as e:
+        logger.error(f"Report artifact save error: {e}")
+        return None
+
 #récupèrer rapport par son id
 def get_report(rep_id):
     try:
@@ -338,18 +679,115 @@ def get_sequence_reports(seq_id):
 # historique et activités
 
 #save activity de chaque user
+#les compteurs de user_stats sont incrémentés en même temps que l'insertion dans history
 def log_activity(user_id, action_type, description=None):
     try:
+        now = datetime.utcnow()
         log = {
             "user_id": user_id,
             "action_type": action_type,
-            "timestamp": datetime.utcnow()
+            "timestamp": now
         }
+        # description affichée dans le journal d'activité de la page History
+        if description:
+            log["description"] = description
+        expires_at = get_history_expiry(action_type, now)
+        if expires_at:
+            log["expires_at"] = expires_at
         
         history_col.insert_one(log)
+        increment_activity_counters(user_id, action_type, now)
     except Exception as e:
         logger.error(f"Activity logging error: {e}")
 
+#date d'expiration d'une entrée d'historique selon son type d'action (None = conservée)
+def get_history_expiry(action_type, timestamp=None):
+    days = HISTORY_RETENTION_BY_ACTION.get(action_type, HISTORY_RETENTION_DAYS)
+    if days is None:
+        return None
+    return (timestamp or datetime.utcnow()) + timedelta(days=days)
+
+#mise à jour incrémentale du document de compteurs de user (par type d'action et par jour)
+def increment_activity_counters(user_id, action_type, timestamp=None):
+    timestamp = timestamp or datetime.utcnow()
+    day = timestamp.strftime("%Y-%m-%d")
+    user_stats_col.update_one(
+        {"_id": str(user_id)},
+        {
+            "$inc": {
+                "total": 1,
+                f"actions.{action_type}": 1,
+                f"days.{day}": 1
+            },
+            "$set": {"updated_at": timestamp},
+            # date du premier compteur : l'historique antérieur est ajouté par rebuild_activity_counters
+            "$setOnInsert": {"since": timestamp}
+        },
+        upsert=True
+    )
+
+#compléter les compteurs à partir de history (users créés avant l'ajout de user_stats)
+#les compteurs en cours ne sont jamais écrasés : document absent -> créé avec l'historique ($setOnInsert),
+#document créé par $inc -> l'historique antérieur à "since" est ajouté ($inc) ; un document sans "since"
+#n'est remplacé que si aucun $inc n'a eu lieu depuis sa lecture (filtre sur total)
+def rebuild_activity_counters(user_id):
+    try:
+        key = {"_id": str(user_id)}
+        current = user_stats_col.find_one(key)
+        if current and current.get("backfilled"):
+            return current
+        started = datetime.utcnow()
+        # document absent ou sans "since" : tout l'historique antérieur à la reconstruction
+        since = (current or {}).get("since") or started
+        
+        pipeline = [
+            {"$match": {"user_id": user_id, "timestamp": {"$lt": since}}},
+            {"$group": {
+                "_id": {
+                    "action": "$action_type",
+                    "day": {"$dateToString": {"format": "%Y-%m-%d", "date": "$timestamp"}}
+                },
+                "count": {"$sum": 1}
+            }}
+        ]
+        actions, days, total = {}, {}, 0
+        for item in history_col.aggregate(pipeline):
+            action, day, count = item["_id"]["action"], item["_id"]["day"], item["count"]
+            actions[action] = actions.get(action, 0) + count
+            days[day] = days.get(day, 0) + count
+            total += count
+        
+        if current is None:
+            # sans effet si un $inc concurrent a créé le document entre-temps (complété au prochain appel)
+            stats = {"total": total, "actions": actions, "days": days, "since": started, "updated_at": started}
+            user_stats_col.update_one(key, {"$setOnInsert": {**stats, "backfilled": True}}, upsert=True)
+        elif current.get("since"):
+            increments = {"total": total,
+                          **{f"actions.{action}": count for action, count in actions.items()},
+                          **{f"days.{day}": count for day, count in days.items()}}
+            user_stats_col.update_one({**key, "backfilled": {"$ne": True}},
+                                      {"$inc": increments, "$set": {"backfilled": True}})
+        else:
+            stats = {"total": total, "actions": actions, "days": days, "backfilled": True, "updated_at": started}
+            user_stats_col.update_one({**key, "total": current.get("total", 0), "backfilled": {"$ne": True}},
+                                      {"$set": stats})
+        return user_stats_col.find_one(key)
+    except Exception as e:
+        logger.error(f"Activity counters rebuild error: {e}")
+        return None
+
+#récupèrer le document de compteurs d'un utilisateur
+def get_user_stats(user_id):
+    try:
+        stats = user_stats_col.find_one({"_id": str(user_id)})
+        # un document créé par $inc avant la reconstruction ne contient pas l'historique antérieur
+        if stats is None or not stats.get("backfilled"):
+            stats = rebuild_activity_counters(user_id)
+        return stats
+    except Exception as e:
+        logger.error(f"Error getting user stats: {e}")
+        return None
+
 #récuperer history d'activities per user avec options de filtrage avancées
 #{user_id: ID de l'utilisateur, 
 # limit: Nombre maximum d'entrées à retourner, 
@@ -374,14 +812,9 @@ def get_user_history(user_id, limit=20, action_types=None, search_text=None, sta
             query["description"] = {"$regex": search_text, "$options": "i"}
         
         # Filtrage par date
-        if start_date or end_date:
-            date_query = {}
-            if start_date:
-                date_query["$gte"] = start_date
-            if end_date:
-                date_query["$lte"] = end_date
-            if date_query:
-                query["timestamp"] = date_query
+        date_query = build_date_range(start_date, end_date)
+        if date_query:
+            query["timestamp"] = date_query
         
         # Exécution de la requête
         cursor = history_col.find(query).sort("timestamp", -1).limit(limit)
@@ -390,6 +823,27 @@ def get_user_history(user_id, limit=20, action_types=None, search_text=None, sta
         logger.error(f"Error getting user history: {e}")
         return []
 
+#get une page d'historique (pagination keyset sur (timestamp, _id)), mêmes filtres que get_user_history
+#retourne (entrées, curseur de la page suivante ou None)
+def get_user_history_page(user_id, page_size=20, cursor=None, action_types=None,
+                          start_date=None, end_date=None, ascending=False):
+    try:
+        query = {"user_id": user_id}
+        if action_types:
+            query["action_type"] = {"$in": action_types} if isinstance(action_types, list) else action_types
+        date_query = build_date_range(start_date, end_date)
+        if date_query:
+            query["timestamp"] = date_query
+        if cursor:
+            query = {"$and": [query, build_keyset_filter("timestamp", cursor, ascending)]}
+        
+        direction = 1 if ascending else -1
+        cursor_db = history_col.find(query).sort([("timestamp", direction), ("_id", direction)]).limit(page_size + 1)
+        return build_page(list(cursor_db), page_size, "timestamp")
+    except Exception as e:
+        logger.error(f"Error getting user history page: {e}")
+        return [], None
+
 #delate une entrée d'historique spécifique
 def delete_history_entry(entry_id, user_id):
     try:
@@ -402,22 +856,20 @@ def delete_history_entry(entry_id, user_id):
         logger.error(f"History entry deletion error: {e}")
         return False
 
-#get des statistiques sur les activités d'un utilisateur
+#get des statistiques sur les activités d'un utilisateur (lecture du document user_stats)
 def get_activity_statistics(user_id):
     try:
-        pipeline = [
-            {"$match": {"user_id": user_id}},
-            {"$group": {"_id": "$action_type", "count": {"$sum": 1}}}
-        ]
-        return list(history_col.aggregate(pipeline))
+        stats = get_user_stats(user_id) or {}
+        return [{"_id": action, "count": count} for action, count in stats.get("actions", {}).items()]
     except Exception as e:
         logger.error(f"Activity statistics error: {e}")
         return []
 
-#delate les entrées d'historique plus anciennes que le nombre de jours spécifié (pour le momoent 90j)
+#delate les entrées d'historique plus anciennes que le nombre de jours spécifié
+#(nettoyage manuel, la rétention normale est assurée par l'index TTL sur expires_at)
 def cleanup_old_history(days=90):
     try:
-        cutoff_date = datetime.utcnow() - datetime.timedelta(days=days)
+        cutoff_date = datetime.utcnow() - timedelta(days=days)
         result = history_col.delete_many({"timestamp": {"$lt": cutoff_date}})
         logger.info(f"Cleaned up {result.deleted_count} old history entries")
         return result.deleted_count
@@ -425,6 +877,30 @@ def cleanup_old_history(days=90):
         logger.error(f"History cleanup error: {e}")
         return 0
 
+#ajouter expires_at aux entrées d'historique créées avant la rétention TTL (les actions conservées sans limite
+#restent sans expires_at)
+def backfill_history_expiry():
+    try:
+        updated = 0
+        for action_type in history_col.distinct("action_type", {"expires_at": {"$exists": False}}):
+            days = HISTORY_RETENTION_BY_ACTION.get(action_type, HISTORY_RETENTION_DAYS)
+            if days is None:
+                continue
+            result = history_col.update_many(
+                {"action_type": action_type, "expires_at": {"$exists": False}},
+                [{"$set": {"expires_at": {"$add": ["$timestamp", days * 24 * 3600 * 1000]}}}]
+            )
+            updated += result.modified_count
+        if updated:
+            logger.info(f"Retention applied to {updated} legacy history entries")
+        return updated
+    except Exception as e:
+        logger.error(f"History retention backfill error: {e}")
+        return 0
+
+# exécuté au démarrage, après la création de l'index TTL : ne modifie plus rien une fois les anciennes entrées datées
+backfill_history_expiry()
+
 # fermeture de la connexion
 def close_db():
     try:
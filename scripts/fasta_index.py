@@ -0,0 +1,169 @@
+#index d'un fichier FASTA (format .fai de samtools) pour lire une fenêtre d'une séquence
+#sans charger tout le fichier : la fenêtre est lue directement dans le fichier via mmap
+#un FASTA compressé avec bgzip est indexé de la même façon (positions dans le fichier décompressé) :
+#seuls les blocs BGZF qui contiennent la fenêtre sont décompressés (voir compressed_io)
+import os
+import mmap
+from dataclasses import dataclass
+
+try:
+    from compressed_io import BgzfRandomReader, detect_compression, load_gzi, open_binary
+except ImportError:
+    # importé depuis le package scripts (et non lancé comme script)
+    from scripts.compressed_io import BgzfRandomReader, detect_compression, load_gzi, open_binary
+
+try:
+    from fingerprints import file_stamp, is_stamped, write_stamp
+except ImportError:
+    from scripts.fingerprints import file_stamp, is_stamped, write_stamp
+
+
+@dataclass(frozen=True)
+class FastaIndexEntry:
+    id: str
+    length: int
+    # position (octets) du premier nucléotide dans le fichier
+    offset: int
+    # nombre de nucléotides par ligne et nombre d'octets par ligne (fin de ligne comprise)
+    line_bases: int
+    line_width: int
+
+
+#parcourir le fichier une seule fois pour construire l'index
+#les lignes d'une séquence doivent avoir la même longueur (sauf la dernière), comme pour samtools faidx
+def build_fasta_index(fasta_path):
+    entries = []
+    current = None
+
+    def close_record():
+        if current is not None:
+            entries.append(FastaIndexEntry(current["id"], current["length"], current["offset"],
+                                           current["line_bases"], current["line_width"]))
+
+    with open_binary(fasta_path) as f:
+        position = 0
+        for line in f:
+            line_start = position
+            position += len(line)
+            if line.startswith(b">"):
+                close_record()
+                current = {"id": line[1:].split()[0].decode() if line[1:].split() else "",
+                           "length": 0, "offset": position, "line_bases": 0, "line_width": 0, "short_line": False}
+                continue
+            if current is None:
+                continue
+            bases = len(line.rstrip(b"\r\n"))
+            if bases == 0:
+                continue
+            if current["short_line"]:
+                raise ValueError(f"Irregular line length in record {current['id']} of {fasta_path}")
+            if current["line_bases"] == 0:
+                current["offset"] = line_start
+                current["line_bases"] = bases
+                current["line_width"] = len(line)
+            elif bases > current["line_bases"]:
+                raise ValueError(f"Irregular line length in record {current['id']} of {fasta_path}")
+            # une ligne plus courte (ou sans fin de ligne) ne peut être que la dernière du record
+            if bases < current["line_bases"] or len(line) != current["line_width"]:
+                if len(line) > bases and len(line) - bases != current["line_width"] - current["line_bases"]:
+                    raise ValueError(f"Irregular line ending in record {current['id']} of {fasta_path}")
+                current["short_line"] = True
+            current["length"] += bases
+        close_record()
+    return tuple(entries)
+
+
+#écrire l'index au format .fai (NOM LONGUEUR OFFSET BASES_PAR_LIGNE OCTETS_PAR_LIGNE)
+def write_fai(entries, fai_path):
+    with open(fai_path, "w") as f:
+        for entry in entries:
+            f.write(f"{entry.id}\t{entry.length}\t{entry.offset}\t{entry.line_bases}\t{entry.line_width}\n")
+
+
+def read_fai(fai_path):
+    entries = []
+    with open(fai_path, "r") as f:
+        for line in f:
+            name, length, offset, line_bases, line_width = line.rstrip("\n").split("\t")[:5]
+            entries.append(FastaIndexEntry(name, int(length), int(offset), int(line_bases), int(line_width)))
+    return tuple(entries)
+
+
+#charger l'index .fai à côté du fichier s'il a été construit pour cette version du fichier (taille et date
+#enregistrées dans <index>.stamp), sinon le (re)construire ; un .fai sans .stamp (samtools) est reconstruit
+#un fichier gzip ou zstd ne permet pas l'accès direct : seul bgzip est indexable
+def load_fasta_index(fasta_path):
+    compression = detect_compression(fasta_path)
+    if compression not in (None, "bgzf"):
+        raise ValueError(f"{fasta_path} is {compression}-compressed: recompress it with bgzip to index it")
+    fai_path = f"{fasta_path}.fai"
+    try:
+        if is_stamped(fai_path, fasta_path):
+            return read_fai(fai_path)
+    except (OSError, ValueError):
+        pass
+    stamp = file_stamp(fasta_path)
+    entries = build_fasta_index(fasta_path)
+    try:
+        write_fai(entries, fai_path)
+        write_stamp(fai_path, fasta_path, stamp)
+    except OSError:
+        pass  # répertoire en lecture seule : l'index reste en mémoire
+    return entries
+
+
+#position (octets) dans le fichier d'une position 0-based de la séquence
+def byte_position(entry, position):
+    if entry.line_bases == 0:
+        return entry.offset
+    line, column = divmod(position, entry.line_bases)
+    return entry.offset + line * entry.line_width + column
+
+
+#lecture de fenêtres dans un fichier indexé, ouvert une seule fois pour toutes les fenêtres
+#(fichier non compressé via mmap, fichier bgzip via son index .gzi)
+class FastaReader:
+
+    def __init__(self, fasta_path):
+        self._file = None
+        self._mmap = None
+        self._bgzf = None
+        if detect_compression(fasta_path) == "bgzf":
+            self._bgzf = BgzfRandomReader(fasta_path, load_gzi(fasta_path))
+        else:
+            self._file = open(fasta_path, "rb")
+            if os.fstat(self._file.fileno()).st_size:
+                self._mmap = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+
+    #lire la fenêtre [start, start + length) d'une séquence (positions 0-based)
+    def fetch(self, entry, start, length):
+        start = max(0, min(start, entry.length))
+        end = max(start, min(start + length, entry.length))
+        if end == start:
+            return ""
+        first, last = byte_position(entry, start), byte_position(entry, end - 1) + 1
+        if self._bgzf is not None:
+            raw = self._bgzf.read(first, last - first)
+        else:
+            raw = self._mmap[first:last]
+        return raw.replace(b"\r", b"").replace(b"\n", b"").decode("ascii", "replace")
+
+    def close(self):
+        if self._mmap is not None:
+            self._mmap.close()
+        if self._file is not None:
+            self._file.close()
+        if self._bgzf is not None:
+            self._bgzf.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+#lire une seule fenêtre (positions 0-based)
+def fetch_window(fasta_path, entry, start, length):
+    with FastaReader(fasta_path) as reader:
+        return reader.fetch(entry, start, length)
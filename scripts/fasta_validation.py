@@ -0,0 +1,361 @@
+#validation et normalisation en flux d'un FASTA nucléotidique avant le lancement du pipeline
+#le fichier est lu par blocs et vérifié en une seule passe : alphabet IUPAC, longueur des lignes,
+#identifiants en double, records vides, suites de N ; longueur et GC de chaque record sont
+#calculés en même temps (table de correspondance numpy sur les octets, voir sequence_stats)
+#la sortie est réécrite en majuscules, sans espaces, en lignes de FASTA_LINE_WIDTH bases
+import os
+from dataclasses import dataclass
+from typing import Tuple
+
+import numpy as np
+
+from scripts.sequence_stats import NUCLEOTIDE_CODES, percent
+
+# nom de la séquence insérée par l'utilisateur, attendu par le pipeline (une seule séquence)
+INPUT_SEQUENCE_ID = "input_sequence"
+FASTA_LINE_WIDTH = 60
+READ_CHUNK_SIZE = 1024 * 1024
+# au-delà de cette longueur, une suite de N est signalée (régions non séquencées, assemblage)
+N_RUN_WARNING = int(os.environ.get('FASTA_N_RUN_WARNING', 10000))
+
+# codes de NUCLEOTIDE_CODES
+N_CODE = 4
+INVALID_CODE = 6
+# majuscules et ARN -> ADN (U -> T) en une seule opération bytes.translate
+NORMALIZE = bytes.maketrans(b"acgtunrykmswbdhvU", b"ACGTTNRYKMSWBDHVT")
+WHITESPACE = b" \t\r\n\x0b\x0c"
+
+
+@dataclass(frozen=True)
+class FastaRecordSummary:
+    id: str
+    length: int
+    # bases A/C/G/T et G/C (le GC est calculé sur les bases A/C/G/T)
+    acgt_count: int
+    gc_count: int
+    gc_percent: float
+    n_count: int
+    # autres codes IUPAC (R, Y, K, M, S, W, B, D, H, V)
+    ambiguous_count: int
+    longest_n_run: int
+
+
+@dataclass(frozen=True)
+class FastaReport:
+    records: Tuple[FastaRecordSummary, ...]
+    errors: Tuple[str, ...]
+    warnings: Tuple[str, ...]
+
+    @property
+    def ok(self):
+        return not self.errors
+
+    @property
+    def total_length(self):
+        return sum(record.length for record in self.records)
+
+    #GC global pondéré par la longueur des records
+    @property
+    def gc_percent(self):
+        gc = sum(record.gc_count for record in self.records)
+        acgt = sum(record.acgt_count for record in self.records)
+        return round(float(percent(gc, acgt)), 2)
+
+    #résumé sérialisable (métadonnées de la séquence en base)
+    def summary(self):
+        return {
+            "record_count": len(self.records),
+            "total_length": self.total_length,
+            "gc_content": self.gc_percent,
+            "records": [{"id": record.id, "length": record.length, "gc_content": record.gc_percent,
+                         "n_count": record.n_count, "longest_n_run": record.longest_n_run}
+                        for record in self.records[:100]],
+            "warnings": list(self.warnings)
+        }
+
+
+class _Record:
+    def __init__(self, record_id):
+        self.id = record_id
+        self.length = 0
+        self.counts = np.zeros(INVALID_CODE + 1, dtype=np.int64)
+        self.n_run = 0
+        self.longest_n_run = 0
+        self.invalid_chars = set()
+        # longueur des lignes du record (None tant qu'aucune ligne complète), dernière ligne courte vue
+        self.line_width = None
+        self.short_line = False
+        self.irregular_lines = False
+
+    def summary(self):
+        acgt = int(self.counts[:N_CODE].sum())
+        gc = int(self.counts[1] + self.counts[2])
+        return FastaRecordSummary(
+            id=self.id,
+            length=self.length,
+            acgt_count=acgt,
+            gc_count=gc,
+            gc_percent=round(float(percent(gc, acgt)), 2),
+            n_count=int(self.counts[N_CODE]),
+            ambiguous_count=int(self.counts[5]),
+            longest_n_run=self.longest_n_run
+        )
+
+
+#validateur en flux : feed() avec des blocs d'octets (ou de texte), puis close() renvoie le rapport
+#output: fichier binaire ouvert pour la sortie normalisée (None = validation seule)
+#header: nom de l'unique record écrit en sortie (tous les records sont réunis, comme l'attend le
+#pipeline) ; None = chaque record est écrit sous son propre identifiant
+#strict: les corrections (espaces, lignes irrégulières, records vides, en-tête absent) deviennent des erreurs
+class FastaValidator:
+    def __init__(self, output=None, header=INPUT_SEQUENCE_ID, line_width=FASTA_LINE_WIDTH,
+                 n_run_warning=N_RUN_WARNING, strict=False):
+        self.output = output
+        self.header = header
+        self.line_width = line_width
+        self.n_run_warning = n_run_warning
+        self.strict = strict
+        self.records = []
+        self.errors = []
+        self.warnings = []
+        self._ids = set()
+        self._record = None
+        self._pending = b""
+        self._at_line_start = True
+        self._line_carry = 0
+        # le bloc précédent se termine par \r, non compté dans _line_carry (fin de ligne CRLF coupée en deux)
+        self._line_cr = False
+        self._whitespace = False
+        self._out_started = False
+        self._out_record = None
+        self._out_carry = b""
+
+    def _repair(self, message):
+        (self.errors if self.strict else self.warnings).append(message)
+
+    def feed(self, chunk):
+        if isinstance(chunk, str):
+            chunk = chunk.encode("utf-8")
+        data = self._pending + chunk if self._pending else chunk
+        self._pending = b""
+        position = 0
+        while position < len(data):
+            if self._at_line_start and data[position] == 0x3E:  # ">"
+                end = data.find(b"\n", position)
+                if end < 0:
+                    # en-tête coupé entre deux blocs
+                    self._pending = data[position:]
+                    return
+                self._start_record(data[position + 1:end].strip())
+                position = end + 1
+                continue
+            # contenu jusqu'au prochain en-tête (les lignes de séquence ne sont pas découpées une à une)
+            end = data.find(b"\n>", position)
+            end = len(data) if end < 0 else end + 1
+            self._sequence(data[position:end])
+            position = end
+
+    def close(self):
+        if self._pending:
+            self._start_record(self._pending[1:].strip())
+            self._pending = b""
+        self._close_record()
+        if self._whitespace:
+            self._repair("Spaces or tabs inside sequence lines were removed.")
+        if self.output is not None and self._out_started:
+            self.output.write(self._out_carry + b"\n" if self._out_carry else b"")
+        if not self.records:
+            self.errors.append("No sequence data found.")
+        if self.header is not None and len(self.records) > 1:
+            self.warnings.append(f"{len(self.records)} records were joined into a single sequence "
+                                 f"({self.header}): gene prediction runs on one sequence.")
+        return FastaReport(tuple(self.records), tuple(self.errors), tuple(self.warnings))
+
+    def _start_record(self, header_line):
+        self._close_record()
+        record_id = header_line.split()[0].decode("utf-8", "replace") if header_line.split() else ""
+        if not record_id:
+            record_id = f"record{len(self.records) + 1}"
+            self._repair(f"A record has no identifier (named {record_id}).")
+        if record_id in self._ids:
+            self.errors.append(f"Duplicate sequence identifier: {record_id}.")
+        self._ids.add(record_id)
+        self._record = _Record(record_id)
+        self._at_line_start = True
+        self._line_carry = 0
+        self._line_cr = False
+
+    def _close_record(self):
+        record = self._record
+        if record is None:
+            return
+        self._record = None
+        if self._line_carry:
+            self._check_lines(np.array([self._line_carry], dtype=np.int64), record)
+            self._line_carry = 0
+        self._line_cr = False
+        if record.length == 0:
+            self._repair(f"Record {record.id} is empty and was skipped.")
+            return
+        if record.invalid_chars:
+            shown = ", ".join(repr(chr(c)) if 32 <= c < 127 else f"0x{c:02x}" for c in sorted(record.invalid_chars)[:5])
+            self.errors.append(f"Record {record.id}: {int(record.counts[INVALID_CODE])} invalid character(s) "
+                               f"({shown}); only IUPAC nucleotide codes are allowed.")
+        elif record.counts[:N_CODE].sum() == 0:
+            self.errors.append(f"Record {record.id} contains no A, C, G or T.")
+        if record.longest_n_run >= self.n_run_warning:
+            self.warnings.append(f"Record {record.id} contains a run of {record.longest_n_run:,} N.")
+        if record.irregular_lines:
+            self._repair(f"Record {record.id} has irregular line lengths and was rewrapped at {self.line_width} bases.")
+        self.records.append(record.summary())
+
+    #lignes d'un record : toutes de même longueur, sauf la dernière qui peut être plus courte
+    def _check_lines(self, lengths, record):
+        lengths = lengths[lengths > 0]
+        if not len(lengths) or record.irregular_lines:
+            return
+        if record.line_width is None:
+            record.line_width = int(lengths[0])
+        width = record.line_width
+        if (record.short_line or (lengths > width).any() or (lengths[:-1] < width).any()):
+            record.irregular_lines = True
+        record.short_line = bool(lengths[-1] < width)
+
+    def _sequence(self, segment):
+        if not segment:
+            return
+        if self._record is None:
+            if not segment.strip(WHITESPACE):
+                return
+            self._repair("No FASTA header found: the sequence was given a header.")
+            self._start_record((self.header or INPUT_SEQUENCE_ID).encode())
+        record = self._record
+        raw = np.frombuffer(segment, dtype=np.uint8)
+
+        # longueur des lignes complètes du segment (sans \r), la ligne en cours est reportée au bloc suivant
+        # un \r en fin de bloc n'est compté que si le bloc suivant ne commence pas par \n
+        carry = self._line_carry + (self._line_cr and not segment.startswith(b"\n"))
+        newlines = np.flatnonzero(raw == 10)
+        if len(newlines):
+            starts = np.concatenate(([0], newlines[:-1] + 1))
+            carriage = np.zeros(len(newlines), dtype=np.int64)
+            carriage[newlines > 0] = raw[newlines[newlines > 0] - 1] == 13
+            lengths = newlines - starts - carriage
+            lengths[0] += carry
+            self._check_lines(lengths, record)
+            carry = len(segment) - int(newlines[-1]) - 1
+        else:
+            carry += len(segment)
+        self._line_cr = segment.endswith(b"\r")
+        self._line_carry = carry - self._line_cr
+        self._at_line_start = segment.endswith(b"\n")
+
+        residues = segment.translate(NORMALIZE, WHITESPACE)
+        if len(residues) + len(newlines) + segment.count(b"\r") != len(segment):
+            self._whitespace = True
+        if not residues:
+            return
+        codes = NUCLEOTIDE_CODES[np.frombuffer(residues, dtype=np.uint8)]
+        record.counts += np.bincount(codes, minlength=INVALID_CODE + 1)
+        record.length += len(residues)
+        if record.counts[INVALID_CODE] and len(record.invalid_chars) < 5:
+            invalid = np.frombuffer(residues, dtype=np.uint8)[codes == INVALID_CODE]
+            record.invalid_chars.update(int(c) for c in np.unique(invalid)[:5])
+        self._n_runs(codes == N_CODE, record)
+        self._write(residues, record)
+
+    #plus longue suite de N, y compris à cheval sur deux blocs
+    def _n_runs(self, is_n, record):
+        if not is_n.any():
+            record.n_run = 0
+            return
+        edges = np.diff(np.concatenate(([0], is_n.view(np.int8), [0])))
+        starts, ends = np.flatnonzero(edges == 1), np.flatnonzero(edges == -1)
+        runs = ends - starts
+        if starts[0] == 0:
+            runs[0] += record.n_run
+        record.longest_n_run = max(record.longest_n_run, int(runs.max()))
+        record.n_run = int(runs[-1]) if ends[-1] == len(is_n) else 0
+
+    def _write(self, residues, record):
+        if self.output is None:
+            return
+        if self.header is not None:
+            if not self._out_started:
+                self.output.write(f">{self.header}\n".encode())
+        elif self._out_record is not record:
+            if self._out_carry:
+                self.output.write(self._out_carry + b"\n")
+                self._out_carry = b""
+            self.output.write(f">{record.id}\n".encode())
+            self._out_record = record
+        self._out_started = True
+        data = self._out_carry + residues
+        width = self.line_width
+        full = len(data) - len(data) % width
+        # lignes complètes : matrice (lignes, largeur + 1) dont la dernière colonne est le retour à la ligne
+        lines = np.empty((full // width, width + 1), dtype=np.uint8)
+        lines[:, :width] = np.frombuffer(data, dtype=np.uint8, count=full).reshape(-1, width)
+        lines[:, width] = 10
+        self.output.write(lines.tobytes())
+        self._out_carry = data[full:]
+
+
+#sortie qui met à jour une empreinte avec les octets écrits (empreinte du FASTA normalisé)
+class _DigestWriter:
+    def __init__(self, f, digest):
+        self.f = f
+        self.digest = digest
+
+    def write(self, data):
+        self.digest.update(data)
+        return self.f.write(data)
+
+
+#valider source et écrire la version normalisée dans output_path
+#source: octets, texte collé, fichier ouvert en binaire ou itérable de blocs (ex: flux décompressé)
+#digest: objet hashlib mis à jour avec la sortie normalisée (identifie la séquence quel que soit son format)
+#le fichier de sortie n'est remplacé que si la validation réussit : une étape du pipeline ne démarre
+#jamais sur une entrée refusée
+def validate_fasta(source, output_path=None, chunk_size=READ_CHUNK_SIZE, digest=None, **options):
+    tmp_path = f"{output_path}.{os.getpid()}.tmp" if output_path else None
+    output = open(tmp_path, "wb") if tmp_path else None
+    try:
+        validator = FastaValidator(_DigestWriter(output, digest) if output and digest else output, **options)
+        if isinstance(source, (bytes, str)):
+            validator.feed(source)
+        else:
+            chunks = iter(lambda: source.read(chunk_size), b"") if hasattr(source, "read") else source
+            for chunk in chunks:
+                validator.feed(chunk)
+        report = validator.close()
+    except BaseException:
+        # source illisible (ex: fichier compressé tronqué) : pas de fichier temporaire laissé sur le disque
+        if output is not None:
+            output.close()
+            os.remove(tmp_path)
+        raise
+    if output is not None:
+        output.close()
+    if tmp_path:
+        if report.ok:
+            os.replace(tmp_path, output_path)
+        else:
+            os.remove(tmp_path)
+    return report
+
+
+#séquence (sans en-tête ni retours à la ligne) d'un FASTA normalisé par validate_fasta
+#max_length: nombre maximal de bases lues (None = toute la séquence)
+def read_normalized_sequence(fasta_path, max_length=None):
+    parts = []
+    length = 0
+    with open(fasta_path, "rb") as f:
+        for line in f:
+            if line.startswith(b">"):
+                continue
+            parts.append(line.rstrip(b"\n"))
+            length += len(parts[-1])
+            if max_length is not None and length >= max_length:
+                break
+    return b"".join(parts)[:max_length].decode("ascii")
@@ -0,0 +1,54 @@
+#empreintes (sha256) utilisées pour rendre les écritures idempotentes et identifier les résultats
+import os
+import json
+import hashlib
+
+#empreinte d'une structure de données (dict, list..) indépendante de l'ordre des clés
+def fingerprint_data(data):
+    payload = json.dumps(data, sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+#empreinte rapide d'un ensemble de fichiers basée sur (chemin, taille, date de modification)
+#les fichiers absents sont pris en compte pour que leur apparition change l'empreinte
+def fingerprint_files(*paths):
+    signature = []
+    for path in paths:
+        try:
+            stat = os.stat(path)
+            signature.append((str(path), stat.st_size, stat.st_mtime_ns))
+        except OSError:
+            signature.append((str(path), None, None))
+    return fingerprint_data(signature)
+
+#version d'un fichier de données (taille, date de modification en ns), enregistrée avec les fichiers qui en
+#sont dérivés (index .fai/.gzi, tableaux pLDDT, trace CA) : une date plus récente ne suffit pas, une copie
+#(copy2, copytree) garde la date d'origine et un fichier remplacé peut être plus ancien que son index
+def file_stamp(path):
+    stat = os.stat(path)
+    return {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns}
+
+def stamp_path(derived_path):
+    return f"{derived_path}.stamp"
+
+#enregistrer à côté de derived_path la version de source_path (stamp: file_stamp lu avant le calcul)
+def write_stamp(derived_path, source_path, stamp=None):
+    with open(stamp_path(derived_path), "w", encoding="utf-8") as f:
+        json.dump(stamp or file_stamp(source_path), f)
+
+#derived_path existe et a été calculé à partir de la version actuelle de source_path
+def is_stamped(derived_path, source_path):
+    try:
+        if not os.path.exists(derived_path):
+            return False
+        with open(stamp_path(derived_path), "r", encoding="utf-8") as f:
+            return json.load(f) == file_stamp(source_path)
+    except (OSError, ValueError):
+        return False
+
+#empreinte du contenu d'un fichier (lecture par blocs)
+def fingerprint_file_content(path, chunk_size=1024 * 1024):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
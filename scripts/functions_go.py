@@ -7,14 +7,29 @@
 import requests
 import pandas as pd
 
-from llm_gemini_resume import run_llm_resume
+try:
+    from llm_gemini_resume import run_llm_resume
+except ImportError:
+    # importé depuis le package scripts (et non lancé comme script)
+    from scripts.llm_gemini_resume import run_llm_resume
+
+try:
+    from tracing import count_request, span
+    from metrics import external_call, stage
+except ImportError:
+    from scripts.tracing import count_request, span
+    from scripts.metrics import external_call, stage
 
 def search_go_info(go_id):
     #récupèrer le nom et la description du chaque GO Term défini à l'aide de l'API QuickGO
     url = f"https://www.ebi.ac.uk/QuickGO/services/ontology/go/terms/{go_id}"
     headers = {"Accept": "application/json"}
     
-    response = requests.get(url, headers=headers)
+    count_request()
+    with external_call("quickgo") as call:
+        response = requests.get(url, headers=headers)
+        if response.status_code != 200:
+            call["status"] = f"http_{response.status_code}"
     
     if response.status_code == 200:  # Si la requête réussit
         data = response.json()  # Convertir la réponse JSON en dictionnaire Python
@@ -26,38 +41,55 @@ def search_go_info(go_id):
     
     return "Name not found", "Description not found"
 
-# charger le fichier final_annotations.csv
-final_annotations_csv = "C:\\Users\\MSI\\Documents\\PFE\\DNA_project\\data\\final_annotations.csv"
-df = pd.read_csv(final_annotations_csv)
-
-# vérifier si les colonnes nécessaires existent déjà, sinon les ajouter
-if "Top GO Term Name" not in df.columns:
-    df["Top GO Term Name"] = ""
-if "Top GO Term Description" not in df.columns:
-    df["Top GO Term Description"] = ""
-if "All GO Terms" not in df.columns:
-    df["All GO Terms"] = ""
-
-# parcourir chaque ligne pour ajouter les noms et descriptions des termes GO
-for index, row in df.iterrows():
-    top_go_term = row["Top GO Term"].strip()
-    go_name, go_description = search_go_info(top_go_term)
+#ajouter le nom et la description simplifiée de chaque terme GO au tableau des annotations
+#go_lookup et summarize peuvent être remplacés (ex: QuickGO et LLM simulés dans benchmarks/)
+def add_go_functions(df, go_lookup=search_go_info, summarize=run_llm_resume):
+    # vérifier si les colonnes nécessaires existent déjà, sinon les ajouter
+    if "Top GO Term Name" not in df.columns:
+        df["Top GO Term Name"] = ""
+    if "Top GO Term Description" not in df.columns:
+        df["Top GO Term Description"] = ""
+    if "All GO Terms" not in df.columns:
+        df["All GO Terms"] = ""
+
+    # parcourir chaque ligne pour ajouter les noms et descriptions des termes GO
+    for index, row in df.iterrows():
+        top_go_term = row["Top GO Term"].strip()
+        with span("quickgo", kind="external", tool="QuickGO"):
+            go_name, go_description = go_lookup(top_go_term)
     
-    df.at[index, "Top GO Term Name"] = go_name
-    df.at[index, "Top GO Term Description"] = run_llm_resume(go_description)
+        df.at[index, "Top GO Term Name"] = go_name
+        with span("llm_resume", kind="external", tool="Gemini"):
+            df.at[index, "Top GO Term Description"] = summarize(go_description)
 
-    # traiter les termes GO filtrés
-    filtered_go_terms = eval(row["All GO Terms"]) if isinstance(row["All GO Terms"], str) else []
-    filtered_info = []
+        # traiter les termes GO filtrés
+        filtered_go_terms = eval(row["All GO Terms"]) if isinstance(row["All GO Terms"], str) else []
+        filtered_info = []
     
-    for go_entry in filtered_go_terms:
-        go_id = go_entry[0]  # Le premier élément est l'ID GO
-        go_name, go_description = search_go_info(go_id)
-        filtered_info.append((go_id, go_entry[1], go_name, go_description))
+        for go_entry in filtered_go_terms:
+            go_id = go_entry[0]  # Le premier élément est l'ID GO
+            with span("quickgo", kind="external", tool="QuickGO"):
+                go_name, go_description = go_lookup(go_id)
+            filtered_info.append((go_id, go_entry[1], go_name, go_description))
+
+        df.at[index, "All GO Terms"] = str(filtered_info)
+
+    return df
+
+def main():
+    # charger le fichier final_annotations.csv
+    final_annotations_csv = "C:\\Users\\MSI\\Documents\\PFE\\DNA_project\\data\\final_annotations.csv"
+    df = pd.read_csv(final_annotations_csv)
+
+    with span("add_go_functions"):
+        df = add_go_functions(df)
 
-    df.at[index, "All GO Terms"] = str(filtered_info)
+    # sauvegarder les modifications dans le même fichier CSV
+    with span("write_annotations"):
+        df.to_csv(final_annotations_csv, index=False)
 
-# sauvegarder les modifications dans le même fichier CSV
-df.to_csv(final_annotations_csv, index=False)
+    print("**Attirbution des fonctions terminée avec succès")
 
-print("**Attirbution des fonctions terminée avec succès")
+if __name__ == "__main__":
+    with stage("function_extraction"):
+        main()
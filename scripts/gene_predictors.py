@@ -0,0 +1,223 @@
+#prédicteurs de gènes interchangeables utilisés par predict_genes.py : chacun lit un FASTA non compressé
+#et écrit un GFF au format AUGUSTUS (commentaires "# start gene", protéine, "# end gene")
+#le prédicteur est choisi par GENE_PREDICTOR (wsl sous Windows, native ailleurs par défaut) :
+#   native : augustus trouvé dans le PATH (workers Linux)
+#   local  : installation d'AUGUSTUS dans un répertoire, sans conteneur (AUGUSTUS_HOME : bin/augustus et config/)
+#   wsl    : augustus installé dans WSL, lancé depuis Windows (chemins C:\ convertis en /mnt/c/)
+#   fake   : GFF déterministe écrit sans AUGUSTUS (tests, démonstrations, précalcul sans outils externes)
+#
+#la sortie standard d'AUGUSTUS est écrite au fur et à mesure dans un fichier temporaire (aucun tampon PIPE
+#en mémoire), renommé en GFF final seulement si AUGUSTUS réussit ; seule la fin de stderr est conservée
+#un échec (démarrage impossible, code de retour, délai dépassé) lève GenePredictionError
+#les prédicteurs n'ont pas d'état partagé : plusieurs prédictions peuvent tourner en parallèle
+import collections
+import os
+import re
+import shlex
+import shutil
+import signal
+import subprocess
+import threading
+from dataclasses import dataclass
+from typing import Optional, Tuple
+
+try:
+    from compressed_io import open_text
+except ImportError:
+    # importé depuis le package scripts (et non lancé comme script)
+    from scripts.compressed_io import open_text
+
+GENE_PREDICTOR = os.environ.get('GENE_PREDICTOR', "wsl" if os.name == "nt" else "native")
+AUGUSTUS_SPECIES = os.environ.get('AUGUSTUS_SPECIES', "human")
+# options supplémentaires passées à augustus, ex: "--strand=forward --genemodel=complete"
+AUGUSTUS_ARGS = os.environ.get('AUGUSTUS_ARGS', "")
+# délai maximal d'une prédiction en secondes (0 = sans limite)
+AUGUSTUS_TIMEOUT = float(os.environ.get('AUGUSTUS_TIMEOUT', 4 * 3600))
+AUGUSTUS_HOME = os.environ.get('AUGUSTUS_HOME', "")
+# nombre de lignes de stderr gardées pour le message d'erreur
+STDERR_TAIL_LINES = 40
+# prédicteur fake : un gène toutes les FAKE_GENE_SPACING paires de bases
+FAKE_GENE_SPACING = 5000
+
+
+class GenePredictionError(Exception):
+
+    def __init__(self, message, predictor=None, returncode=None, stderr="", timed_out=False):
+        super().__init__(message)
+        self.predictor = predictor
+        self.returncode = returncode
+        self.stderr = stderr
+        self.timed_out = timed_out
+
+    def __str__(self):
+        message = super().__str__()
+        return f"{message}\n{self.stderr}" if self.stderr else message
+
+
+@dataclass(frozen=True)
+class PredictorConfig:
+    species: str = AUGUSTUS_SPECIES
+    extra_args: Tuple[str, ...] = tuple(shlex.split(AUGUSTUS_ARGS))
+    # secondes, None = sans limite
+    timeout: Optional[float] = AUGUSTUS_TIMEOUT or None
+
+
+#arrêter le processus et ses enfants (groupe de processus sous Linux, voir start_new_session)
+def _kill(process):
+    if os.name == "posix":
+        try:
+            os.killpg(process.pid, signal.SIGKILL)
+        except OSError:
+            pass
+    process.kill()
+    process.wait()
+
+
+#lire un flux (stderr) ligne par ligne en ne gardant que les dernières lignes
+def _drain(stream, tail):
+    for line in iter(stream.readline, b""):
+        tail.append(line.decode("utf-8", "replace").rstrip())
+    stream.close()
+
+
+#augustus du PATH
+class AugustusPredictor:
+    name = "native"
+
+    def __init__(self, config=None, executable="augustus"):
+        self.config = config or PredictorConfig()
+        self.executable = executable
+
+    def input_path(self, input_fasta):
+        return input_fasta
+
+    def command(self, input_fasta):
+        return [self.executable, f"--species={self.config.species}", *self.config.extra_args,
+                self.input_path(input_fasta)]
+
+    # environnement du processus (None = celui du processus courant)
+    def environment(self):
+        return None
+
+    #lancer augustus sur input_fasta et écrire le GFF dans output_gff
+    def predict(self, input_fasta, output_gff):
+        tmp_path = f"{output_gff}.{os.getpid()}.{threading.get_ident()}.tmp"
+        stderr_tail = collections.deque(maxlen=STDERR_TAIL_LINES)
+        try:
+            with open(tmp_path, "wb") as output:
+                try:
+                    process = subprocess.Popen(self.command(input_fasta), stdout=output, stderr=subprocess.PIPE,
+                                               env=self.environment(), start_new_session=os.name == "posix")
+                except OSError as e:
+                    raise GenePredictionError(f"Could not start AUGUSTUS ({self.name}): {e}", self.name) from e
+                reader = threading.Thread(target=_drain, args=(process.stderr, stderr_tail), daemon=True)
+                reader.start()
+                try:
+                    returncode = process.wait(timeout=self.config.timeout)
+                except subprocess.TimeoutExpired:
+                    _kill(process)
+                    reader.join(timeout=5)
+                    raise GenePredictionError(f"AUGUSTUS ({self.name}) timed out after {self.config.timeout:g} s",
+                                              self.name, stderr="\n".join(stderr_tail), timed_out=True)
+                reader.join()
+
+            if returncode != 0:
+                raise GenePredictionError(f"AUGUSTUS ({self.name}) exited with code {returncode}", self.name,
+                                          returncode, "\n".join(stderr_tail))
+            os.replace(tmp_path, output_gff)
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+        return output_gff
+
+
+#installation locale d'AUGUSTUS (sources compilées, conda...) : bin/augustus et config/ dans home
+class LocalAugustusPredictor(AugustusPredictor):
+    name = "local"
+
+    def __init__(self, config=None, home=None):
+        self.home = home or AUGUSTUS_HOME
+        if not self.home:
+            raise GenePredictionError("The local gene predictor needs AUGUSTUS_HOME (AUGUSTUS install directory)",
+                                      self.name)
+        super().__init__(config, os.path.join(self.home, "bin", "augustus"))
+
+    def environment(self):
+        return {**os.environ, "AUGUSTUS_CONFIG_PATH": os.path.join(self.home, "config")}
+
+
+#chemin Windows vers le chemin du même fichier dans WSL (C:\dir\file -> /mnt/c/dir/file)
+def to_wsl_path(path):
+    match = re.match(r"^([A-Za-z]):[\\/]", path)
+    if match:
+        path = f"/mnt/{match.group(1).lower()}/{path[3:]}"
+    return path.replace("\\", "/")
+
+
+#augustus installé dans WSL, lancé depuis Windows
+class WslAugustusPredictor(AugustusPredictor):
+    name = "wsl"
+
+    def command(self, input_fasta):
+        return ["wsl", *super().command(input_fasta)]
+
+    def input_path(self, input_fasta):
+        return to_wsl_path(input_fasta)
+
+
+#prédicteur sans AUGUSTUS : un gène d'un exon tous les FAKE_GENE_SPACING pb de chaque séquence,
+#protéine déterministe de la longueur du CDS ; gff_path: sortie AUGUSTUS enregistrée à recopier telle quelle
+class FakeGenePredictor:
+    name = "fake"
+
+    def __init__(self, config=None, gff_path=None, spacing=FAKE_GENE_SPACING):
+        self.config = config or PredictorConfig()
+        self.gff_path = gff_path
+        self.spacing = spacing
+
+    def predict(self, input_fasta, output_gff):
+        if self.gff_path:
+            shutil.copyfile(self.gff_path, output_gff)
+            return output_gff
+
+        # longueur de chaque séquence, sans garder les séquences en mémoire
+        lengths = []
+        with open_text(input_fasta, "r") as f:
+            for line in f:
+                if line.startswith(">"):
+                    lengths.append([line[1:].split()[0] if line[1:].split() else "", 0])
+                elif lengths:
+                    lengths[-1][1] += len(line.strip())
+
+        gene_number = 0
+        with open(output_gff, "w") as f:
+            f.write(f"# This output was generated by the fake gene predictor (species {self.config.species}).\n")
+            for name, length in lengths:
+                for start in range(1, length - self.spacing // 2, self.spacing):
+                    gene_number += 1
+                    gene_id = f"g{gene_number}"
+                    end = min(start + 299, length)
+                    attributes = f'transcript_id "{gene_id}.t1"; gene_id "{gene_id}";'
+                    f.write(f"# start gene {gene_id}\n")
+                    f.write(f"{name}\tfake\tgene\t{start}\t{end}\t1\t+\t.\t{gene_id}\n")
+                    f.write(f"{name}\tfake\tCDS\t{start}\t{end}\t.\t+\t0\t{attributes}\n")
+                    f.write(f"# protein sequence = [M{'A' * max((end - start + 1) // 3 - 2, 0)}]\n")
+                    f.write("# Evidence for and against this transcript:\n")
+                    f.write(f"# end gene {gene_id}\n")
+        return output_gff
+
+
+PREDICTORS = {
+    "native": AugustusPredictor,
+    "local": LocalAugustusPredictor,
+    "wsl": WslAugustusPredictor,
+    "fake": FakeGenePredictor
+}
+
+
+#prédicteur configuré (name: clé de PREDICTORS, GENE_PREDICTOR par défaut)
+def get_predictor(name=None, config=None):
+    name = name or GENE_PREDICTOR
+    if name not in PREDICTORS:
+        raise GenePredictionError(f"Unknown gene predictor '{name}' (choose from {', '.join(PREDICTORS)})", name)
+    return PREDICTORS[name](config)
@@ -3,6 +3,14 @@ import subprocess
 import os
 import re
 
+try:
+    from tracing import count_request
+    from metrics import external_call
+except ImportError:
+    # importé depuis le package scripts (et non lancé comme script)
+    from scripts.tracing import count_request
+    from scripts.metrics import external_call
+
 
 #exécuter script du LLM pour avoir la simplification de la description
 def run_llm_resume(description):
@@ -23,7 +31,9 @@ def run_llm_resume(description):
     
     try:
         print("**Exécution du résumé LLM via WSL en cours")
-        result = subprocess.run(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True, check=True)
+        count_request()
+        with external_call("llm"):
+            result = subprocess.run(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True, check=True)
         print("**Résumé LLM exécuté avec succès")
         return result.stdout.strip()
     except subprocess.CalledProcessError as e:
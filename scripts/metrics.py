@@ -0,0 +1,343 @@
+#métriques d'exploitation au format Prometheus (compteurs, histogrammes, jauges)
+#désactivées par défaut : sans METRICS_ENABLED=1 chaque métrique est un objet vide dont les
+#méthodes ne font rien, le coût pour le pipeline est un simple appel de fonction
+#les scripts du pipeline (sous-processus) écrivent leurs valeurs en JSON dans GENEVISION_METRICS_FILE
+#en sortant ; l'application les ajoute à son registre et les expose par HTTP (METRICS_PORT) et/ou
+#dans un fichier texte pour le textfile collector de node_exporter (METRICS_TEXTFILE)
+#ce module ne dépend pas du package scripts, il est aussi importé par les scripts lancés directement
+import atexit
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager, nullcontext
+
+from dotenv import load_dotenv
+
+# charger .env avant de lire la configuration : ce module est importé avant scripts.database
+load_dotenv()
+
+METRICS_ENABLED = os.environ.get('METRICS_ENABLED', '0') == '1'
+# port du point de collecte HTTP local (/metrics), 0 = pas de serveur
+METRICS_PORT = int(os.environ.get('METRICS_PORT', 0))
+METRICS_ADDR = os.environ.get('METRICS_ADDR', '127.0.0.1')
+# fichier .prom réécrit toutes les METRICS_TEXTFILE_INTERVAL secondes, vide = pas d'export fichier
+METRICS_TEXTFILE = os.environ.get('METRICS_TEXTFILE', '')
+METRICS_TEXTFILE_INTERVAL = int(os.environ.get('METRICS_TEXTFILE_INTERVAL', 15))
+METRICS_FILE_ENV = "GENEVISION_METRICS_FILE"
+
+# bornes des histogrammes de durée (secondes) : des requêtes MongoDB aux étapes de plusieurs minutes
+DEFAULT_BUCKETS = (0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1, 5, 10, 30, 60, 300, 1800)
+
+
+def _label_key(label_names, labels):
+    return tuple(str(labels.get(name, "")) for name in label_names)
+
+
+def _format_labels(label_names, key, extra=()):
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(label_names, key)]
+    pairs += [f'{name}="{value}"' for name, value in extra]
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _escape(value):
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+class Counter:
+    type = "counter"
+
+    def __init__(self, name, documentation, label_names=()):
+        self.name = name
+        self.documentation = documentation
+        self.label_names = tuple(label_names)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount=1, **labels):
+        key = _label_key(self.label_names, labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def samples(self):
+        with self._lock:
+            return [[list(key), value] for key, value in self._values.items()]
+
+    def merge(self, samples):
+        with self._lock:
+            for key, value in samples:
+                key = tuple(key)
+                self._values[key] = self._values.get(key, 0) + value
+
+    def render(self):
+        return [f"{self.name}{_format_labels(self.label_names, tuple(key))} {value}" for key, value in self.samples()]
+
+
+class Gauge(Counter):
+    type = "gauge"
+
+    def set(self, value, **labels):
+        with self._lock:
+            self._values[_label_key(self.label_names, labels)] = value
+
+    def dec(self, amount=1, **labels):
+        self.inc(-amount, **labels)
+
+    def merge(self, samples):
+        with self._lock:
+            for key, value in samples:
+                self._values[tuple(key)] = value
+
+
+class Histogram:
+    type = "histogram"
+
+    def __init__(self, name, documentation, label_names=(), buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.label_names = tuple(label_names)
+        self.buckets = tuple(buckets)
+        # clé -> [nombre par borne..., somme, nombre total]
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value, **labels):
+        key = _label_key(self.label_names, labels)
+        with self._lock:
+            state = self._values.setdefault(key, [0] * len(self.buckets) + [0.0, 0])
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    state[i] += 1
+            state[-2] += value
+            state[-1] += 1
+
+    #mesurer la durée d'un bloc : with STAGE_SECONDS.time(stage="gene_prediction"):
+    @contextmanager
+    def time(self, **labels):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started, **labels)
+
+    def samples(self):
+        with self._lock:
+            return [[list(key), list(state)] for key, state in self._values.items()]
+
+    def merge(self, samples):
+        with self._lock:
+            for key, state in samples:
+                current = self._values.setdefault(tuple(key), [0] * len(self.buckets) + [0.0, 0])
+                for i, value in enumerate(state):
+                    current[i] += value
+
+    def render(self):
+        lines = []
+        for key, state in self.samples():
+            key = tuple(key)
+            for bound, count in zip(self.buckets, state):
+                lines.append(f"{self.name}_bucket{_format_labels(self.label_names, key, [('le', f'{bound:g}')])} {count}")
+            lines.append(f"{self.name}_bucket{_format_labels(self.label_names, key, [('le', '+Inf')])} {state[-1]}")
+            lines.append(f"{self.name}_sum{_format_labels(self.label_names, key)} {state[-2]}")
+            lines.append(f"{self.name}_count{_format_labels(self.label_names, key)} {state[-1]}")
+        return lines
+
+
+#métrique désactivée : mêmes méthodes, aucun effet
+class NoopMetric:
+    def inc(self, amount=1, **labels):
+        pass
+
+    def dec(self, amount=1, **labels):
+        pass
+
+    def set(self, value, **labels):
+        pass
+
+    def observe(self, value, **labels):
+        pass
+
+    def time(self, **labels):
+        return nullcontext()
+
+
+NOOP = NoopMetric()
+_registry = {}
+
+
+def _register(metric):
+    if not METRICS_ENABLED:
+        return NOOP
+    return _registry.setdefault(metric.name, metric)
+
+
+def counter(name, documentation, label_names=()):
+    return _register(Counter(name, documentation, label_names))
+
+
+def gauge(name, documentation, label_names=()):
+    return _register(Gauge(name, documentation, label_names))
+
+
+def histogram(name, documentation, label_names=(), buckets=DEFAULT_BUCKETS):
+    return _register(Histogram(name, documentation, label_names, buckets))
+
+
+# métriques du pipeline (les noms suivent les conventions Prometheus : _total, _seconds)
+ANALYSIS_RESULTS = counter("genevision_analysis_results_total",
+                           "Analysis results saved, by stage (final_summary = completed analyses)", ("stage",))
+STAGE_SECONDS = histogram("genevision_stage_duration_seconds", "Duration of pipeline stages", ("stage",))
+STAGE_FAILURES = counter("genevision_stage_failures_total", "Pipeline stages that ended with an error", ("stage",))
+STAGES_IN_PROGRESS = gauge("genevision_stages_in_progress", "Pipeline stages currently running")
+EXTERNAL_REQUESTS = counter("genevision_external_requests_total",
+                            "Calls to external tools and services, by outcome", ("service", "status"))
+EXTERNAL_SECONDS = histogram("genevision_external_request_duration_seconds",
+                             "Duration of calls to external tools and services", ("service",))
+CACHE_REQUESTS = counter("genevision_cache_requests_total", "Cache lookups, by result (hit/miss)", ("cache", "result"))
+REPORT_QUEUE_DEPTH = gauge("genevision_report_queue_depth", "Reports waiting for or being rendered")
+MONGODB_SECONDS = histogram("genevision_mongodb_operation_duration_seconds",
+                            "Duration of MongoDB commands", ("command",))
+MONGODB_FAILURES = counter("genevision_mongodb_operation_failures_total", "Failed MongoDB commands", ("command",))
+
+
+#appel à un outil ou service externe : durée, puis résultat "ok" ou "error" (exception levée)
+#le résultat peut être précisé dans le bloc : with external_call("quickgo") as call: call["status"] = "http_404"
+@contextmanager
+def external_call(service):
+    call = {"status": "ok"}
+    started = time.perf_counter()
+    try:
+        yield call
+    except BaseException:
+        call["status"] = "error"
+        raise
+    finally:
+        EXTERNAL_SECONDS.observe(time.perf_counter() - started, service=service)
+        EXTERNAL_REQUESTS.inc(service=service, status=call["status"])
+
+
+#étape du pipeline : durée, étapes en cours et échecs (exception ou exit(1))
+@contextmanager
+def stage(name):
+    STAGES_IN_PROGRESS.inc()
+    try:
+        with STAGE_SECONDS.time(stage=name):
+            yield
+    except BaseException:
+        STAGE_FAILURES.inc(stage=name)
+        raise
+    finally:
+        STAGES_IN_PROGRESS.dec()
+
+
+#texte au format d'exposition Prometheus
+def render():
+    lines = []
+    for metric in list(_registry.values()):
+        lines.append(f"# HELP {metric.name} {metric.documentation}")
+        lines.append(f"# TYPE {metric.name} {metric.type}")
+        lines.extend(metric.render())
+    return "\n".join(lines) + "\n"
+
+
+def snapshot():
+    return {name: {"type": metric.type, "samples": metric.samples()} for name, metric in _registry.items()}
+
+
+#écrire les valeurs du processus dans GENEVISION_METRICS_FILE (scripts lancés en sous-processus)
+def write_snapshot(path=None):
+    path = path or os.environ.get(METRICS_FILE_ENV)
+    if not path or not METRICS_ENABLED:
+        return None
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(snapshot(), f)
+    return path
+
+
+if METRICS_ENABLED and os.environ.get(METRICS_FILE_ENV):
+    atexit.register(write_snapshot)
+
+
+#environnement d'un sous-processus dont les métriques doivent être relues dans metrics_path
+def metrics_env(metrics_path, env=None):
+    env = dict(env if env is not None else os.environ)
+    if METRICS_ENABLED:
+        if os.path.exists(metrics_path):
+            os.remove(metrics_path)
+        env[METRICS_FILE_ENV] = metrics_path
+    return env
+
+
+#ajouter au registre les valeurs écrites par un sous-processus (compteurs et histogrammes additionnés)
+def merge_snapshot(metrics_path):
+    if not METRICS_ENABLED or not os.path.exists(metrics_path):
+        return
+    try:
+        with open(metrics_path, "r", encoding="utf-8") as f:
+            values = json.load(f)
+    except (OSError, ValueError):
+        return
+    for name, entry in values.items():
+        metric = _registry.get(name)
+        if metric is not None and metric.type == entry["type"]:
+            metric.merge(entry["samples"])
+
+
+#écrire le fichier texte de façon atomique (le collecteur ne lit jamais un fichier à moitié écrit)
+def write_textfile(path=METRICS_TEXTFILE):
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        f.write(render())
+    os.replace(tmp_path, path)
+
+
+def _textfile_loop(path, interval):
+    while True:
+        try:
+            write_textfile(path)
+        except OSError:
+            pass
+        time.sleep(interval)
+
+
+def start_http_server(port, addr=METRICS_ADDR):
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+    class MetricsHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.split("?")[0] not in ("/", "/metrics"):
+                self.send_error(404)
+                return
+            body = render().encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass  # pas de ligne de log à chaque collecte
+
+    server = ThreadingHTTPServer((addr, port), MetricsHandler)
+    threading.Thread(target=server.serve_forever, name="metrics-http", daemon=True).start()
+    return server
+
+
+_exporters_started = False
+_exporters_lock = threading.Lock()
+
+
+#démarrer les exports configurés, une seule fois par processus (streamlit réexécute app.py à chaque interaction)
+def start_exporters():
+    global _exporters_started
+    if not METRICS_ENABLED:
+        return
+    with _exporters_lock:
+        if _exporters_started:
+            return
+        _exporters_started = True
+        if METRICS_PORT:
+            start_http_server(METRICS_PORT)
+        if METRICS_TEXTFILE:
+            threading.Thread(target=_textfile_loop, args=(METRICS_TEXTFILE, METRICS_TEXTFILE_INTERVAL),
+                             name="metrics-textfile", daemon=True).start()
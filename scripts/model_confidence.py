@@ -0,0 +1,97 @@
+#confiance par résidu des modèles 3D (pLDDT, et PAE quand le prédicteur la fournit)
+#extraite une seule fois au moment de la prédiction et enregistrée en float16 à côté du modèle
+#(<modèle>.plddt.npy, <modèle>.pae.npy) : l'affichage et le rapport ne reparsent pas le texte PDB
+#ce module est aussi importé par protein_model.py lancé comme script (fingerprints importé sans le package)
+import os
+
+import numpy as np
+
+try:
+    from fingerprints import is_stamped, write_stamp
+except ImportError:
+    # importé depuis le package scripts (et non lancé comme script)
+    from scripts.fingerprints import is_stamped, write_stamp
+
+# bandes de confiance pLDDT (AlphaFold/ESMFold) : (borne inférieure, libellé)
+CONFIDENCE_BANDS = ((90, "Very high"), (70, "Confident"), (50, "Low"), (0, "Very low"))
+
+
+def plddt_path(pdb_path):
+    return f"{os.path.splitext(str(pdb_path))[0]}.plddt.npy"
+
+
+def pae_path(pdb_path):
+    return f"{os.path.splitext(str(pdb_path))[0]}.pae.npy"
+
+
+#ESMFold écrit le pLDDT entre 0 et 1 dans les B-factors, AlphaFold entre 0 et 100 : on ramène tout sur 0-100
+def scale_plddt(values):
+    values = np.asarray(values, dtype=np.float32)
+    if values.size and values.max() <= 1.0:
+        values = values * 100
+    return values
+
+
+#pLDDT de chaque résidu = B-factor de son carbone alpha (dans l'ordre du fichier)
+def extract_plddt(pdb_text):
+    bfactors = []
+    for line in pdb_text.splitlines():
+        if line.startswith("ATOM") and line[12:16].strip() == "CA":
+            try:
+                bfactors.append(float(line[60:66]))
+            except ValueError:
+                bfactors.append(0.0)
+    return scale_plddt(bfactors).astype(np.float16)
+
+
+#enregistrer les tableaux de confiance d'un modèle (pae : matrice N x N en Å, optionnelle)
+#(appelé une fois le modèle écrit : les tableaux sont associés à cette version du fichier)
+def save_confidence_arrays(pdb_path, pdb_text, pae=None):
+    np.save(plddt_path(pdb_path), extract_plddt(pdb_text))
+    write_stamp(plddt_path(pdb_path), pdb_path)
+    if pae is not None:
+        np.save(pae_path(pdb_path), np.asarray(pae, dtype=np.float16))
+        write_stamp(pae_path(pdb_path), pdb_path)
+
+
+#tableau à jour s'il a été calculé pour cette version du modèle (taille et date enregistrées dans <tableau>.stamp)
+def is_fresh(array_path, pdb_path):
+    return is_stamped(array_path, pdb_path)
+
+
+#pLDDT d'un modèle ; les modèles produits avant l'extraction sont traités une fois puis enregistrés
+def load_plddt(pdb_path):
+    if is_fresh(plddt_path(pdb_path), pdb_path):
+        return np.load(plddt_path(pdb_path))
+    with open(pdb_path, "r") as f:
+        plddt = extract_plddt(f.read())
+    try:
+        np.save(plddt_path(pdb_path), plddt)
+        write_stamp(plddt_path(pdb_path), pdb_path)
+    except OSError:
+        pass
+    return plddt
+
+
+#PAE d'un modèle (None si le prédicteur ne l'a pas fournie)
+def load_pae(pdb_path):
+    if is_fresh(pae_path(pdb_path), pdb_path):
+        return np.load(pae_path(pdb_path))
+    return None
+
+
+#répartition des résidus par bande de confiance : [{"band", "residues", "percent"}, ...]
+def confidence_bands(plddt):
+    plddt = np.asarray(plddt, dtype=np.float32)
+    bands = []
+    upper = np.inf
+    for lower, label in CONFIDENCE_BANDS:
+        count = int(np.count_nonzero((plddt >= lower) & (plddt < upper)))
+        bands.append({
+            "band": label,
+            "range": f"{lower}-{100 if upper == np.inf else int(upper)}",
+            "residues": count,
+            "percent": round(count * 100.0 / len(plddt), 1) if len(plddt) else 0.0
+        })
+        upper = lower
+    return bands
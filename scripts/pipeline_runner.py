@@ -0,0 +1,33 @@
+#exécution des scripts des étapes du pipeline dans un sous-processus, partagée par le dashboard et par
+#le précalcul de l'exemple (scripts/precompute_example.py) : les deux lancent exactement la même commande
+import os
+import subprocess
+
+SCRIPTS_DIR = "C:\\Users\\MSI\\Documents\\PFE\\DNA_project\\scripts\\"
+DATA_DIR = "C:\\Users\\MSI\\Documents\\PFE\\DNA_project\\data"
+
+# étape -> script (les scripts lisent et écrivent leurs fichiers dans DATA_DIR)
+STEP_SCRIPTS = {
+    1: "predict_genes.py",
+    2: "annotations_go.py",
+    3: "functions_go.py",
+    4: "protein_model.py"
+}
+
+
+#commande d'une étape (protein_model.py reçoit le FASTA des protéines et le répertoire des modèles)
+def step_command(step, data_dir=DATA_DIR):
+    script_path = os.path.join(SCRIPTS_DIR, STEP_SCRIPTS[step])
+    if STEP_SCRIPTS[step] == "protein_model.py":
+        protein_fasta_path = os.path.join(data_dir, "protein_sequences.fasta")
+        output_dir = os.path.join(data_dir, "pdb_models")
+        # S'assurer que le répertoire de sortie existe
+        os.makedirs(output_dir, exist_ok=True)
+        return f'python "{script_path}" "{protein_fasta_path}" --output_dir "{output_dir}"'
+    return f'python "{script_path}"'
+
+
+#lancer le script d'une étape, renvoie le subprocess.CompletedProcess (stdout/stderr en texte)
+#env: environnement du sous-processus (traces et métriques, voir tracing.trace_env et metrics.metrics_env)
+def run_step_script(step, env=None, data_dir=DATA_DIR):
+    return subprocess.run(step_command(step, data_dir), shell=True, capture_output=True, text=True, env=env)
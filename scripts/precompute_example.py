@@ -0,0 +1,151 @@
+#précalcul de l'exemple du dashboard ("Try an example") au déploiement : le pipeline complet est exécuté
+#une seule fois sur data/example_sequence.txt et chaque étape est enregistrée dans le stockage partagé
+#des résultats (voir scripts/artifact_store.py). L'empreinte de l'analyse étant la même pour tous les
+#users, le dashboard restaure ensuite les résultats de l'exemple au lieu de relancer les outils externes
+#
+#usage (depuis la racine du projet, après chaque déploiement qui modifie un script d'étape) :
+#   python -m scripts.precompute_example
+#   python -m scripts.precompute_example --force
+#les étapes déjà enregistrées pour la configuration actuelle ne sont pas recalculées (sauf --force)
+#les étapes s'exécutent dans le répertoire de travail de l'application (DATA_DIR) : ne pas lancer
+#pendant qu'une analyse est en cours ; le script se termine avec le code 1 si une étape échoue
+import argparse
+import json
+import os
+import sys
+import time
+from datetime import datetime
+
+from scripts.artifact_store import (ARTIFACT_DIR, STEP_ARTIFACTS, analysis_fingerprint, pin_artifacts, pipeline_config,
+                                    restore_step, restorable_step, shareable_config, snapshot_step,
+                                    unpin_artifacts)
+from scripts.pipeline_runner import DATA_DIR, run_step_script
+from scripts.uploads import receive_text
+
+EXAMPLE_SEQUENCE = os.path.join(DATA_DIR, "example_sequence.txt")
+# description du dernier précalcul (empreinte, configuration, résumé des résultats)
+EXAMPLE_MANIFEST = os.path.join(ARTIFACT_DIR, "example.json")
+
+
+class PrecomputeError(Exception):
+    pass
+
+
+#supprimer une analyse désépinglée si aucune séquence ne la référence ; la base n'est chargée qu'ici
+#(False si elle est injoignable : l'analyse reste sur disque jusqu'à la suppression de sa dernière séquence)
+def release_artifacts(analysis_key, artifact_root=ARTIFACT_DIR):
+    try:
+        from scripts.database import delete_unused_artifacts
+        return delete_unused_artifacts(analysis_key, artifact_root)
+    except Exception as e:
+        print(f"**Base de données indisponible, {analysis_key} non supprimé : {e}")
+        return False
+
+
+#résumé des fichiers de résultats (nombre de gènes, protéines, annotations, modèles 3D)
+def results_summary(data_dir=DATA_DIR):
+    def count_records(name):
+        path = os.path.join(data_dir, name)
+        if not os.path.exists(path):
+            return None
+        with open(path, "r", encoding="utf-8") as f:
+            return sum(1 for line in f if line.startswith(">"))
+
+    annotations_path = os.path.join(data_dir, "final_annotations.csv")
+    models_dir = os.path.join(data_dir, "pdb_models")
+    annotations = None
+    if os.path.exists(annotations_path):
+        with open(annotations_path, "r", encoding="utf-8") as f:
+            annotations = max(0, sum(1 for _ in f) - 1)
+    return {
+        "genes": count_records("predicted_genes.fasta"),
+        "proteins": count_records("protein_sequences.fasta"),
+        "annotations": annotations,
+        "structures": len([f for f in os.listdir(models_dir) if f.endswith(".pdb")]) if os.path.isdir(models_dir) else None
+    }
+
+
+#exécuter (ou restaurer) chaque étape du pipeline sur l'exemple et l'enregistrer dans le stockage partagé
+#l'analyse est épinglée : elle reste disponible quand les séquences des users qui l'utilisent sont supprimées
+#(le précalcul précédent, fait avec une autre configuration, est désépinglé puis supprimé s'il n'est plus utilisé)
+#runner(step, data_dir): lance l'étape et renvoie un objet avec returncode et stderr (run_step_script par défaut)
+#release(analysis_key, artifact_root): supprime une analyse désépinglée qu'aucune séquence ne référence
+#(database.delete_unused_artifacts par défaut)
+#renvoie la description du précalcul, lève PrecomputeError si l'exemple est invalide, si le prédicteur de gènes
+#configuré est fake ou si une étape échoue
+def precompute_example(force=False, example_path=EXAMPLE_SEQUENCE, data_dir=DATA_DIR, runner=None,
+                       artifact_root=ARTIFACT_DIR, log=print, release=None):
+    runner = runner or (lambda step, data_dir: run_step_script(step, data_dir=data_dir))
+    release = release or release_artifacts
+
+    with open(example_path, "r") as f:
+        upload = receive_text(f.read(), os.path.join(data_dir, "input_sequences.fasta"))
+    if not upload.report.ok:
+        raise PrecomputeError(f"Invalid example sequence: {' '.join(upload.report.errors)}")
+
+    config = pipeline_config()
+    if not shareable_config(config):
+        raise PrecomputeError(f"The {config['predictor']['name']} gene predictor cannot be used to precompute the "
+                              "example (set GENE_PREDICTOR to native, local or wsl)")
+    analysis_key = analysis_fingerprint(upload.content_hash, config)
+    cached = 0 if force else restorable_step(analysis_key, artifact_root)
+    steps = []
+    for step in sorted(STEP_ARTIFACTS):
+        started = time.perf_counter()
+        if step <= cached:
+            # entrée des étapes suivantes
+            restore_step(analysis_key, step, data_dir, artifact_root)
+            status = "cached"
+        else:
+            result = runner(step, data_dir)
+            if result.returncode != 0:
+                raise PrecomputeError(f"Step {step} failed: {result.stderr}")
+            snapshot_step(analysis_key, step, data_dir, artifact_root)
+            status = "computed"
+        elapsed = time.perf_counter() - started
+        steps.append({"step": step, "status": status, "seconds": round(elapsed, 3)})
+        log(f"**Étape {step} : {status} ({elapsed:.1f} s)")
+    pin_artifacts(analysis_key, artifact_root)
+
+    manifest_path = os.path.join(artifact_root, os.path.basename(EXAMPLE_MANIFEST))
+    try:
+        with open(manifest_path, "r", encoding="utf-8") as f:
+            previous_key = json.load(f).get("analysis_key")
+    except (OSError, ValueError):
+        previous_key = None
+    if previous_key and previous_key != analysis_key:
+        unpin_artifacts(previous_key, artifact_root)
+        if release(previous_key, artifact_root):
+            log(f"**Précalcul précédent supprimé : {previous_key}")
+        else:
+            log(f"**Précalcul précédent désépinglé : {previous_key} (supprimé avec sa dernière séquence)")
+
+    manifest = {
+        "analysis_key": analysis_key,
+        "content_hash": upload.content_hash,
+        "pipeline": config,
+        "steps": steps,
+        "results": results_summary(data_dir),
+        "created": datetime.now().isoformat(timespec="seconds")
+    }
+    with open(manifest_path, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2)
+    return manifest
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Précalcul des résultats de l'exemple du dashboard")
+    parser.add_argument("--force", action="store_true", help="Recalculer toutes les étapes")
+    parser.add_argument("--example", type=str, default=EXAMPLE_SEQUENCE, help="Séquence d'exemple")
+    args = parser.parse_args()
+
+    try:
+        manifest = precompute_example(force=args.force, example_path=args.example)
+    except PrecomputeError as e:
+        print(f"**Erreur : {e}")
+        sys.exit(1)
+    print(f"**Exemple précalculé : {manifest['analysis_key']} {manifest['results']}")
+
+
+if __name__ == "__main__":
+    main()
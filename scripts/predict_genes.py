@@ -3,32 +3,52 @@
 #et un autre fichier FASTA qui contient la traduction proteique des genes predits (protein_sequences.fasta)
 #et un fichier GFF qui contient les informations des genes predits (output_augustus.gff)
 
+import os
 import re
+import sys
 from Bio import SeqIO
-import subprocess
 
-#exécuter outil augustus installé sur WSL via windows
-def run_augustus(input_fasta, augustus_output, species="human"):
+try:
+    from tracing import count_request, span
+    from metrics import external_call, stage
+    from compressed_io import convert_file, detect_compression, open_text
+    from fasta_index import FastaReader, load_fasta_index
+    from gene_predictors import GenePredictionError, PredictorConfig, get_predictor
+except ImportError:
+    # importé depuis le package scripts (et non lancé comme script)
+    from scripts.tracing import count_request, span
+    from scripts.metrics import external_call, stage
+    from scripts.compressed_io import convert_file, detect_compression, open_text
+    from scripts.fasta_index import FastaReader, load_fasta_index
+    from scripts.gene_predictors import GenePredictionError, PredictorConfig, get_predictor
+
+# répertoire des fichiers d'entrée et de sortie (chemin Windows du poste de développement par défaut)
+DATA_DIR = os.environ.get('GENEVISION_DATA_DIR', "C:\\Users\\MSI\\Documents\\PFE\\DNA_project\\data")
+
+#exécuter augustus avec le prédicteur configuré (GENE_PREDICTOR : native, local, wsl ou fake, voir gene_predictors.py)
+#species: espèce AUGUSTUS (AUGUSTUS_SPECIES par défaut) ; predictor: prédicteur déjà construit
+#lève GenePredictionError en cas d'échec
+#augustus ne lit que des FASTA non compressés : une entrée compressée (gzip, bgzip, zstd) est
+#décompressée dans un fichier temporaire à côté de la sortie, supprimé après l'exécution
+def run_augustus(input_fasta, augustus_output, species=None, predictor=None):
     
-
-    input_fasta_wsl = input_fasta.replace("C:\\", "/mnt/c/").replace("\\", "/")
-    output_gff_wsl = augustus_output.replace("C:\\", "/mnt/c/").replace("\\", "/")
-
-    cmd = [
-        "wsl",
-        "augustus",
-        f"--species={species}",
-        input_fasta_wsl,
-        f"--outfile={output_gff_wsl}"
-    ]
+    predictor = predictor or get_predictor(config=PredictorConfig(species=species) if species else None)
+    plain_input = None
+    if detect_compression(input_fasta) is not None:
+        plain_input = f"{augustus_output}.input.fasta"
+        with span("decompress_input"):
+            convert_file(input_fasta, plain_input)
+        input_fasta = plain_input
 
     try:
-        print("**Exécution de AUGUSTUS en cours")
-        subprocess.run(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True, check=True)
+        print(f"**Exécution de AUGUSTUS en cours ({predictor.name})")
+        with span("augustus", kind="external", tool="AUGUSTUS", predictor=predictor.name), external_call("augustus"):
+            count_request()
+            predictor.predict(input_fasta, augustus_output)
         print("**AUGUSTUS exécuté avec succès")
-    except subprocess.CalledProcessError as e:
-        print(f"**Erreur lors de l'exécution d'AUGUSTUS : {e}")
-        exit(1)
+    finally:
+        if plain_input and os.path.exists(plain_input):
+            os.remove(plain_input)
 
 # extraire les coordonnées des gènes et les séquences protéiques prédits par augustus
 def extract_prediction(gff_file):
@@ -38,7 +58,7 @@ def extract_prediction(gff_file):
     current_gene = None
     protein_seq = ""
 
-    with open(gff_file, "r") as file:
+    with open_text(gff_file, "r") as file:
         for line in file:
             # détecter début d'un gène
             if line.startswith("# start gene"):
@@ -72,32 +92,46 @@ def extract_prediction(gff_file):
     return genes, proteins
 
 # extraire les séquences des gènes à partir du fichier input_seq.fasta inséré par l'utilisateur
+# les exons sont lus dans le fichier via son index .fai (fichier non compressé ou bgzip) sans charger
+# le génome ; un fichier non indexable (gzip, lignes irrégulières) est lu en entier avec Biopython
 def extract_gene_sequences(fasta_file, genes):
     
-    sequences = SeqIO.to_dict(SeqIO.parse(fasta_file, "fasta"))
-    gene_sequences = {}
-
-    for gene_id, coords in genes.items():
-        seq_id = list(sequences.keys())[0] # on suppose une seule séquence
-        seq = sequences[seq_id].seq
-        gene_seq = "".join(str(seq[start-1:end]) for start, end in sorted(coords))
-
-        # ajouter les informations de start et stop codon
-        start_codon = min(start for start, end in coords)
-        stop_codon = max(end for start, end in coords)
-
-        gene_sequences[gene_id] = {
-            "sequence": gene_seq,
-            "start_codon": start_codon,
-            "stop_codon": stop_codon
-        }
-
-    return gene_sequences
+    try:
+        entry = load_fasta_index(fasta_file)[0] # on suppose une seule séquence
+    except (ValueError, IndexError):
+        entry = None
+
+    if entry is not None:
+        with FastaReader(fasta_file) as reader:
+            return {gene_id: gene_record(coords, lambda start, end: reader.fetch(entry, start - 1, end - start + 1))
+                    for gene_id, coords in genes.items()}
+
+    with open_text(fasta_file, "r") as handle:
+        sequences = SeqIO.to_dict(SeqIO.parse(handle, "fasta"))
+    seq_id = list(sequences.keys())[0] # on suppose une seule séquence
+    seq = sequences[seq_id].seq
+    return {gene_id: gene_record(coords, lambda start, end: str(seq[start-1:end]))
+            for gene_id, coords in genes.items()}
+
+# séquence d'un gène (exons concaténés) et positions des codons start et stop
+# fetch(start, end): séquence entre deux positions 1-based incluses
+def gene_record(coords, fetch):
+    gene_seq = "".join(fetch(start, end) for start, end in sorted(coords))
+
+    # ajouter les informations de start et stop codon
+    start_codon = min(start for start, end in coords)
+    stop_codon = max(end for start, end in coords)
+
+    return {
+        "sequence": gene_seq,
+        "start_codon": start_codon,
+        "stop_codon": stop_codon
+    }
 
 #ecrire les séquences ADN des gènes dans un fichier FASTA
 def write_fasta(file_path, sequences):
     
-    with open(file_path, "w") as f:
+    with open_text(file_path, "w") as f:
         for gene, data in sequences.items():
             header = f">{gene} [organism=Homo sapiens] [start_codon={data['start_codon']}] [stop_codon={data['stop_codon']}]"
             f.write(f"{header}\n{data['sequence']}\n")
@@ -105,31 +139,39 @@ def write_fasta(file_path, sequences):
 #écrire les séquences protéiques dans un fichier FASTA
 def write_protein_fasta(file_path, proteins):
 
-    with open(file_path, "w") as f:
+    with open_text(file_path, "w") as f:
         for gene, protein_seq in proteins.items():
             f.write(f">{gene}\n{protein_seq}\n")
 
 def main():
     
-    input_fasta = "C:\\Users\\MSI\\Documents\\PFE\\DNA_project\\data\\input_sequences.fasta"
-    augustus_output = "C:\\Users\\MSI\\Documents\\PFE\\DNA_project\\data\\augustus_output.gff"
-    predicted_genes_fasta = "C:\\Users\\MSI\\Documents\\PFE\\DNA_project\\data\\predicted_genes.fasta"
-    protein_sequences_fasta = "C:\\Users\\MSI\\Documents\\PFE\\DNA_project\\data\\protein_sequences.fasta"
+    input_fasta = os.path.join(DATA_DIR, "input_sequences.fasta")
+    augustus_output = os.path.join(DATA_DIR, "augustus_output.gff")
+    predicted_genes_fasta = os.path.join(DATA_DIR, "predicted_genes.fasta")
+    protein_sequences_fasta = os.path.join(DATA_DIR, "protein_sequences.fasta")
 
-    # E1: lancer augustus
-    run_augustus(input_fasta, augustus_output)
+    # E1: lancer augustus (un échec arrête le script avec le code 1, l'appelant lit le message sur stderr)
+    try:
+        run_augustus(input_fasta, augustus_output)
+    except GenePredictionError as e:
+        print(f"**Erreur lors de l'exécution d'AUGUSTUS : {e}", file=sys.stderr)
+        sys.exit(1)
 
     # E2: extraire les informations de augustus
-    genes, proteins = extract_prediction(augustus_output)
+    with span("extract_prediction"):
+        genes, proteins = extract_prediction(augustus_output)
 
     # E3: extraire les séquences ADN correspondantes
-    gene_sequences = extract_gene_sequences(input_fasta, genes)
+    with span("extract_gene_sequences"):
+        gene_sequences = extract_gene_sequences(input_fasta, genes)
 
     # E4: écrire les résultats dans les fichiers fasta de sortie
-    write_fasta(predicted_genes_fasta, gene_sequences)
-    write_protein_fasta(protein_sequences_fasta, proteins)
+    with span("write_fasta"):
+        write_fasta(predicted_genes_fasta, gene_sequences)
+        write_protein_fasta(protein_sequences_fasta, proteins)
 
     print(f"**Prédiction terminée avec succès")
 
 if __name__ == "__main__":
-    main()
+    with stage("gene_prediction"):
+        main()
@@ -0,0 +1,62 @@
+#photos de profil : l'image envoyée est recadrée au carré, convertie en RGB et rendue en JPEG dans
+#chaque taille affichée ; les fichiers sont stockés dans GridFS et référencés par l'empreinte (sha256)
+#de leur contenu, le document user ne garde que cette empreinte (photo_hash)
+import base64
+import hashlib
+import io
+
+from PIL import Image
+
+from scripts.database import save_profile_photo
+
+# tailles enregistrées (pixels) : le double de la taille affichée pour les écrans haute densité
+# small : barre latérale (60 px), large : page Account Settings (160 px)
+PROFILE_PHOTO_SIZES = {"small": 120, "large": 320}
+JPEG_QUALITY = 90
+
+
+#image carrée RGB (transparence sur fond blanc, recadrage centré)
+def square_rgb(image):
+    if image.mode == 'RGBA':
+        background = Image.new('RGB', image.size, (255, 255, 255))
+        background.paste(image, mask=image.split()[3])
+        image = background
+    elif image.mode != 'RGB':
+        image = image.convert('RGB')
+
+    width, height = image.size
+    if width != height:
+        side = min(width, height)
+        left = (width - side) // 2
+        top = (height - side) // 2
+        image = image.crop((left, top, left + side, top + side))
+    return image
+
+
+#rendre toutes les tailles d'une photo : (empreinte, {taille: octets JPEG})
+#source: fichier envoyé (file-like) ou octets de l'image
+#l'empreinte est calculée sur les JPEG produits : une même image donne toujours la même empreinte
+def render_profile_photo(source):
+    if isinstance(source, (bytes, bytearray)):
+        source = io.BytesIO(source)
+    image = square_rgb(Image.open(source))
+
+    renditions = {}
+    digest = hashlib.sha256()
+    for size, pixels in PROFILE_PHOTO_SIZES.items():
+        buffered = io.BytesIO()
+        image.resize((pixels, pixels), Image.LANCZOS).save(buffered, format="JPEG", quality=JPEG_QUALITY)
+        renditions[size] = buffered.getvalue()
+        digest.update(renditions[size])
+    return digest.hexdigest(), renditions
+
+
+#enregistrer une nouvelle photo de profil pour user_id, renvoie l'empreinte ou None
+def store_profile_photo(user_id, source):
+    photo_hash, renditions = render_profile_photo(source)
+    return photo_hash if save_profile_photo(user_id, photo_hash, renditions) else None
+
+
+#convertir l'ancienne photo (JPEG en base64 dans le document user) au stockage par tailles
+def migrate_legacy_profile_photo(user_id, legacy_photo):
+    return store_profile_photo(user_id, base64.b64decode(legacy_photo))
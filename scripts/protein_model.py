@@ -4,6 +4,11 @@ import argparse
 from pathlib import Path
 from typing import Dict, List, Optional, Union
 
+from model_confidence import save_confidence_arrays
+from tracing import count_request, span
+from metrics import external_call, stage
+from compressed_io import open_text
+
 #analyser le contenu dy fichier .fasta et extraire les sequences
 #dict:clé= identifiant de seq et valeur=sequence
 def parse_fasta(fasta_content: str) -> Dict[str, str]:
@@ -32,7 +37,7 @@ def parse_fasta(fasta_content: str) -> Dict[str, str]:
 
 #lire et traiter contenu du fichier .fasta
 def read_fasta_file(file_path: Union[str, Path]) -> Dict[str, str]:
-    with open(file_path, 'r', encoding='utf-8') as f:
+    with open_text(file_path, 'r') as f:
         fasta_content = f.read()
     return parse_fasta(fasta_content)
 
@@ -43,12 +48,16 @@ def predict_structure(sequence: str, max_retries: int = 3, wait_time: int = 5) -
     
     for attempt in range(max_retries):
         try:
-            response = requests.post(
-                api_url,
-                headers=headers,
-                data=sequence,
-                timeout=300
-            )
+            count_request()
+            with external_call("esmfold") as call:
+                response = requests.post(
+                    api_url,
+                    headers=headers,
+                    data=sequence,
+                    timeout=300
+                )
+                if response.status_code != 200:
+                    call["status"] = f"http_{response.status_code}"
             
             if response.status_code == 200:
                 return response.text
@@ -69,11 +78,13 @@ def predict_structure(sequence: str, max_retries: int = 3, wait_time: int = 5) -
     print(f"Échec après {max_retries} tentatives.")
     return None
 
-#save le contenu PDB dans un fichier
-def save_pdb(pdb_content: str, output_path: Union[str, Path]) -> None:
+#save le contenu PDB dans un fichier, avec le pLDDT par résidu (B-factors) en float16 à côté
+#l'API ESMatlas ne renvoie que le PDB : la PAE n'est enregistrée que si le prédicteur la fournit
+def save_pdb(pdb_content: str, output_path: Union[str, Path], pae=None) -> None:
     with open(output_path, 'w', encoding='utf-8') as f:
         f.write(pdb_content)
     print(f" Structure PDB sauvegardée : {output_path}")
+    save_confidence_arrays(output_path, pdb_content, pae)
 
 #traiter une séquence individuelle(seq longue)
 def process_sequence(sequence: str, seq_id: str, output_dir: Union[str, Path], max_length: int = 400) -> Optional[str]:
@@ -99,11 +110,13 @@ def process_sequence(sequence: str, seq_id: str, output_dir: Union[str, Path], m
             return None
 
     # Pour les séquences de taille acceptable, on utilise l'API ESMatlas
-    pdb_content = predict_structure(sequence)
+    with span("esmfold", kind="external", tool="ESMFold"):
+        pdb_content = predict_structure(sequence)
 
     #save result
     if pdb_content:
-        save_pdb(pdb_content, output_path)
+        with span("save_pdb"):
+            save_pdb(pdb_content, output_path)
         return str(output_path)
     else:
         print(f" Échec de la prédiction pour {seq_id}")
@@ -138,4 +151,5 @@ def main():
     print(f"\n Résumé : {len(pdbs)} structure(s) PDB générée(s).")
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    with stage("protein_modeling"):
+        main()
\ No newline at end of file
@@ -1,28 +1,90 @@
+import os
+import json
+import time
 import datetime
+from html import escape
+from string import Template
+from dataclasses import dataclass
+from typing import Tuple
 from reportlab.lib.pagesizes import A4
 from reportlab.lib import colors
 from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
 from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, ListFlowable, ListItem, Table, TableStyle, PageBreak, Preformatted
 from reportlab.lib.units import inch
 from reportlab.lib.enums import TA_CENTER
+from reportlab.graphics.shapes import Drawing
+from reportlab.graphics.charts.lineplots import LinePlot
 
-from Bio import SeqIO
-from io import StringIO
+# version de la mise en page du rapport, à incrémenter quand le contenu du PDF change
+# (les rapports déjà rendus avec une autre version ne sont plus réutilisés)
+REPORT_TEMPLATE_VERSION = 3
 
-#generer un rapport pdf based sur les results prédites
+# taille maximale (en caractères de séquence) de chaque section de l'annexe, 0 = pas de limite
+REPORT_ANNEX_MAX_CHARS = int(os.environ.get('REPORT_ANNEX_MAX_CHARS', 100000))
+# "truncate" : l'annexe est coupée à la limite
+# "attach"   : l'annexe est coupée et le contenu complet est écrit dans un FASTA à côté du rapport
+# (même règle pour les trois formats : PDF, HTML, et JSON qui ne contient que les statistiques des sections)
+REPORT_ANNEX_MODE = os.environ.get('REPORT_ANNEX_MODE', 'truncate')
+# modèle du rapport HTML (variables $nom remplacées par les sections rendues)
+REPORT_HTML_TEMPLATE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "assets", "report_template.html")
+# nombre de lignes par bloc Preformatted de l'annexe (environ une page)
+ANNEX_LINES_PER_BLOCK = 60
+# nombre de flowables gardés en avance dans la liste (keepWithNext regarde les suivants)
+FLOWABLE_LOOKAHEAD = 16
+
+
+@dataclass(frozen=True)
+class ReportBuildInfo:
+    path: str
+    page_count: int
+    build_seconds: float
+    file_size: int
+    # fichiers FASTA écrits à côté du rapport (mode "attach")
+    attachments: Tuple[str, ...] = ()
+    # sections de l'annexe coupées à la limite
+    truncated_sections: Tuple[str, ...] = ()
+
+
+#liste de flowables alimentée à la demande par un générateur : reportlab ne consomme la liste
+#que par le début (len, [0], del [0], insertions en tête), seuls quelques flowables sont donc en mémoire
+class FlowableStream(list):
+
+    def __init__(self, flowables):
+        super().__init__()
+        self._source = iter(flowables)
+        self._fill()
+
+    def _fill(self):
+        while self._source is not None and list.__len__(self) < FLOWABLE_LOOKAHEAD:
+            try:
+                self.append(next(self._source))
+            except StopIteration:
+                self._source = None
+
+    def __len__(self):
+        self._fill()
+        return list.__len__(self)
+
+    def __getitem__(self, index):
+        self._fill()
+        return list.__getitem__(self, index)
+
+    def __delitem__(self, index):
+        list.__delitem__(self, index)
+        self._fill()
+
+
+#generer un rapport pdf based sur les results prédites (renvoie le chemin du fichier)
 def generate_genevision_report(analysis_results, output_path=None):
+    return build_genevision_report(analysis_results, output_path).path
+
+#construire le rapport et renvoyer les informations de construction (pages, durée, taille, annexes)
+def build_genevision_report(analysis_results, output_path=None, annex_max_chars=None, annex_mode=None):
 
     # initialisation du style et de page du rapport
     output_path = setup_output_path(output_path)
     styles = create_styles()
-    elements = []
-    
-    # contenu du pdf
-    add_title_and_metadata(elements, styles, analysis_results) #titre et info (username,date..)
-    add_general_information(elements, styles, analysis_results) #data des résultats finales
-    add_sequence_data(elements, styles, analysis_results) #les séequences
-    add_results_summary(elements, styles, analysis_results) #tableau de summary
-    add_sequence_content_annexes(elements, styles, analysis_results) # annexe
+    annex = new_annex(output_path, annex_max_chars, annex_mode)
     
     # numérotation des pages
     doc = SimpleDocTemplate(
@@ -34,7 +96,8 @@ def generate_genevision_report(analysis_results, output_path=None):
         bottomMargin=72
     )
     
-    # fonction de numérotation 
+    # fonction de numérotation (la dernière page numérotée donne le nombre de pages)
+    pages = {'count': 0}
     def add_page_number(canvas, doc):
         canvas.saveState()
         canvas.setFont('Helvetica', 9)
@@ -42,9 +105,51 @@ def generate_genevision_report(analysis_results, output_path=None):
         text = f"Page {page_num}"
         canvas.drawRightString(A4[0] - 72, 72 * 0.5, text)
         canvas.restoreState()
+        pages['count'] = page_num
 
-    doc.build(elements, onFirstPage=add_page_number, onLaterPages=add_page_number) # build the doc with page numbers
-    return output_path
+    started = time.perf_counter()
+    flowables = FlowableStream(iter_report_flowables(styles, analysis_results, annex))
+    doc.build(flowables, onFirstPage=add_page_number, onLaterPages=add_page_number) # build the doc with page numbers
+    
+    return ReportBuildInfo(
+        path=output_path,
+        page_count=pages['count'],
+        build_seconds=round(time.perf_counter() - started, 3),
+        file_size=os.path.getsize(output_path),
+        attachments=tuple(annex['attachments']),
+        truncated_sections=tuple(annex['truncated'])
+    )
+
+#état de l'annexe pendant la construction d'un rapport (limite, mode, sections coupées, fichiers joints)
+def new_annex(output_path, annex_max_chars=None, annex_mode=None):
+    return {
+        'max_chars': REPORT_ANNEX_MAX_CHARS if annex_max_chars is None else annex_max_chars,
+        'mode': annex_mode or REPORT_ANNEX_MODE,
+        'output_path': output_path,
+        'attachments': [],
+        'truncated': []
+    }
+
+#enregistrer une section coupée à la limite (et son FASTA complet en mode "attach"), renvoie la note affichée
+def truncate_annex_section(annex, key, content):
+    annex['truncated'].append(key)
+    note = f"Content truncated after {annex['max_chars']:,} characters."
+    if annex['mode'] == 'attach':
+        attachment = write_annex_attachment(annex['output_path'], key, content)
+        annex['attachments'].append(attachment)
+        note += f" Full content available in the attached file {os.path.basename(attachment)}."
+    return note
+
+#contenu du pdf, produit section par section pendant la construction
+def iter_report_flowables(styles, analysis_results, annex):
+    elements = []
+    add_title_and_metadata(elements, styles, analysis_results) #titre et info (username,date..)
+    add_general_information(elements, styles, analysis_results) #data des résultats finales
+    add_sequence_data(elements, styles, analysis_results) #les séequences
+    add_results_summary(elements, styles, analysis_results) #tableau de summary
+    add_structure_confidence(elements, styles, analysis_results) #confiance des modèles 3D (pLDDT)
+    yield from elements
+    yield from iter_sequence_content_annexes(styles, analysis_results, annex) # annexe
 
 #création du default filename
 def setup_output_path(output_path):
@@ -161,7 +266,10 @@ def add_sequence_data(elements, styles, analysis_results):
     field_labels = {
         'gene_count': 'Number of predicted genes',
         'protein_count': 'Number of protein sequences',
-        'sequence_length': 'Total input sequence length'
+        'sequence_length': 'Total input sequence length',
+        'input_gc_content': 'Input sequence GC content',
+        'gc_content': 'GC content of predicted genes',
+        'gc3_content': 'GC3 content of predicted genes'
     }
     
     seq_stats_items = []
@@ -172,6 +280,8 @@ def add_sequence_data(elements, styles, analysis_results):
             # add appropriate units
             if field == 'sequence_length':
                 value = f"{value} bp"
+            elif field in ('input_gc_content', 'gc_content', 'gc3_content'):
+                value = f"{value:.2f}%"
                 
             seq_stats_items.append(ListItem(Paragraph(f"{label}: {value}", styles['Normal'])))
     
@@ -220,31 +330,55 @@ def add_results_summary(elements, styles, analysis_results):
         elements.append(table)
         elements.append(Spacer(1, 0.2*inch))
 
-#page annexe
-def add_sequence_content_annexes(elements, styles, analysis_results):
+#section confiance des modèles 3D : courbe pLDDT par résidu et bandes de confiance
+def add_structure_confidence(elements, styles, analysis_results):
+    models = analysis_results.get('structure_confidence', [])
+    if not models:
+        return
+    
+    elements.append(Paragraph('4. Protein Model Confidence', styles['CustomHeading1']))
+    
+    for model in models:
+        elements.append(Paragraph(
+            f"{model['protein_id']} - mean pLDDT: {model['mean_plddt']}", styles['CustomHeading2']))
+        elements.append(create_plddt_plot(model['plddt']))
+        
+        table_data = [['Confidence band', 'pLDDT', 'Residues', 'Residues (%)']]
+        for band in model['bands']:
+            table_data.append([band['band'], band['range'], band['residues'], f"{band['percent']}%"])
+        table = Table(table_data, colWidths=[120, 80, 80, 90])
+        table.setStyle(create_table_style())
+        elements.append(table)
+        elements.append(Spacer(1, 0.2*inch))
+
+#courbe du pLDDT par résidu (axe y de 0 à 100)
+def create_plddt_plot(plddt, width=450, height=150):
+    drawing = Drawing(width, height)
+    plot = LinePlot()
+    plot.x = 40
+    plot.y = 25
+    plot.width = width - 50
+    plot.height = height - 40
+    plot.data = [list(enumerate(plddt, start=1))]
+    plot.lines[0].strokeColor = colors.HexColor('#1f77b4')
+    plot.xValueAxis.valueMin = 1
+    plot.xValueAxis.valueMax = max(len(plddt), 2)
+    plot.yValueAxis.valueMin = 0
+    plot.yValueAxis.valueMax = 100
+    plot.yValueAxis.valueStep = 25
+    drawing.add(plot)
+    return drawing
+
+#page annexe, produite bloc par bloc (une section peut contenir un génome entier)
+def iter_sequence_content_annexes(styles, analysis_results, annex):
     # check if there's content to display
     if not (analysis_results.get('sequence_contents') or
             analysis_results.get('go_annotations_content')):
         return
    
     # add a page break to start the appendix
-    elements.append(PageBreak())
-    elements.append(Paragraph('Appendix - Sequence Contents', styles['AnnexTitle']))
-   
-    # function to format sequences in 60-character lines (pour être de même format de input sequence)
-    def format_sequence_content(content, width=60):
-
-        # analyser contenu des fichiers .fasta
-        formatted_content = ""
-        for record in SeqIO.parse(StringIO(content), "fasta"):
-            formatted_content += f">{record.id}\n"
-            # chaque 60 caracteres dans une ligne
-            seq_str = str(record.seq)
-            chunks = [seq_str[i:i+width] for i in range(0, len(seq_str), width)]
-            formatted_content += "\n".join(chunks) + "\n\n"
-            
-        return formatted_content
-       
+    yield PageBreak()
+    yield Paragraph('Appendix - Sequence Contents', styles['AnnexTitle'])
    
     # 1. display sequences
     sequence_contents = analysis_results.get('sequence_contents', {})
@@ -258,21 +392,84 @@ def add_sequence_content_annexes(elements, styles, analysis_results):
         else:
             section_title = f"A5. {key.replace('_', ' ').title()}"
        
-        elements.append(Paragraph(section_title, styles['AnnexHeading']))
+        yield Paragraph(section_title, styles['AnnexHeading'])
        
-        # add formatted sequence content
+        # add formatted sequence content (60 characters per line, same format as the input sequence)
         if content:
-            if key == 'input_sequence':
-                # display full input sequence without truncation
-                elements.append(Preformatted(content, styles['CodeBlock']))
-            elif key in ['predicted_genes', 'protein_sequences']:
-                # format these sequences with 60 characters per line
-                formatted_content = format_sequence_content(content)
-                elements.append(Preformatted(formatted_content, styles['CodeBlock']))
+            lines = FastaAnnexLines(content, annex['max_chars'])
+            block = []
+            for line in lines:
+                block.append(line)
+                if len(block) == ANNEX_LINES_PER_BLOCK:
+                    yield Preformatted("\n".join(block), styles['CodeBlock'])
+                    block = []
+            if block:
+                yield Preformatted("\n".join(block), styles['CodeBlock'])
+            
+            if lines.truncated:
+                yield Paragraph(f"<i>{truncate_annex_section(annex, key, content)}</i>", styles['Normal'])
         else:
-            elements.append(Paragraph("Content not available", styles['Normal']))
+            yield Paragraph("Content not available", styles['Normal'])
        
-        elements.append(Spacer(1, 0.3*inch))
+        yield Spacer(1, 0.3*inch)
+
+#lignes FASTA formatées (60 caractères par ligne) lues au fil du contenu, sans le parser en entier
+#s'arrête après max_chars caractères de séquence (truncated passe alors à True)
+class FastaAnnexLines:
+
+    def __init__(self, content, max_chars=0, width=60):
+        self.truncated = False
+        self._lines = self._generate(content, max_chars, width)
+
+    def __iter__(self):
+        return self._lines
+
+    def _generate(self, content, max_chars, width):
+        emitted = 0
+        pending = ""
+        first_record = True
+        position = 0
+        while position < len(content):
+            end = content.find("\n", position)
+            end = len(content) if end == -1 else end
+            line = content[position:end].strip()
+            position = end + 1
+            if not line:
+                continue
+            if line.startswith(">"):
+                if pending:
+                    yield pending
+                    pending = ""
+                if not first_record:
+                    yield ""
+                first_record = False
+                yield f">{line[1:].split()[0]}" if line[1:].split() else ">"
+                continue
+            pending += line
+            while len(pending) >= width:
+                if max_chars and emitted + width > max_chars:
+                    yield from self._truncate(pending, max_chars - emitted)
+                    return
+                yield pending[:width]
+                emitted += width
+                pending = pending[width:]
+        if pending:
+            if max_chars and emitted + len(pending) > max_chars:
+                yield from self._truncate(pending, max_chars - emitted)
+                return
+            yield pending
+
+    def _truncate(self, pending, remaining):
+        self.truncated = True
+        if remaining > 0:
+            yield pending[:remaining]
+
+#écrire le contenu complet d'une section de l'annexe dans un FASTA à côté du rapport
+def write_annex_attachment(output_path, key, content):
+    attachment = f"{os.path.splitext(output_path)[0]}_{key}.fasta"
+    with open(attachment, "w") as f:
+        f.write(content)
+    return attachment
 
 #create style du table
 def create_table_style():
@@ -297,5 +494,258 @@ def create_table_style():
         ('LEADING', (5, 1), (5, -1), 12),
     ])
 
+# formats légers : résumé JSON et rapport HTML (graphiques SVG intégrés), rendus en quelques
+# millisecondes à partir des mêmes données que le PDF
+
+#résumé sérialisable du rapport (sans le contenu des séquences)
+def build_report_summary(analysis_results):
+    return {
+        'template_version': REPORT_TEMPLATE_VERSION,
+        'metadata': analysis_results.get('metadata', {}),
+        'tools': analysis_results.get('tools', {}),
+        'sequence_data': analysis_results.get('sequence_data', {}),
+        'sequence_files': {
+            key: fasta_content_stats(content)
+            for key, content in analysis_results.get('sequence_contents', {}).items()
+        },
+        'genes': analysis_results.get('genes', []),
+        'structure_confidence': [
+            {
+                'protein_id': model['protein_id'],
+                'mean_plddt': model['mean_plddt'],
+                'bands': model['bands'],
+                'plddt': [round(value, 1) for value in model['plddt']]
+            }
+            for model in analysis_results.get('structure_confidence', [])
+        ]
+    }
+
+#nombre de records et de caractères de séquence d'un contenu FASTA
+def fasta_content_stats(content):
+    records = 0
+    residues = 0
+    for line in (content or "").splitlines():
+        if line.startswith(">"):
+            records += 1
+        else:
+            residues += len(line.strip())
+    return {'records': records, 'residues': residues}
+
+#écrire le résumé JSON ; les séquences n'y sont pas recopiées, les sections qui dépassent la limite de
+#l'annexe sont signalées (et jointes en mode "attach") comme dans le PDF
+def build_json_report(analysis_results, output_path, annex_max_chars=None, annex_mode=None):
+    started = time.perf_counter()
+    annex = new_annex(output_path, annex_max_chars, annex_mode)
+    summary = build_report_summary(analysis_results)
+    for key, content in analysis_results.get('sequence_contents', {}).items():
+        if annex['max_chars'] and summary['sequence_files'][key]['residues'] > annex['max_chars']:
+            truncate_annex_section(annex, key, content)
+    summary['annex'] = {
+        'max_chars': annex['max_chars'],
+        'mode': annex['mode'],
+        'truncated_sections': annex['truncated'],
+        'attachments': [os.path.basename(attachment) for attachment in annex['attachments']]
+    }
+    with open(output_path, "w", encoding="utf-8") as f:
+        json.dump(summary, f, indent=2, default=str)
+    return ReportBuildInfo(
+        path=output_path,
+        page_count=None,
+        build_seconds=round(time.perf_counter() - started, 3),
+        file_size=os.path.getsize(output_path),
+        attachments=tuple(annex['attachments']),
+        truncated_sections=tuple(annex['truncated'])
+    )
+
+#écrire le rapport HTML à partir du modèle assets/report_template.html
+def build_html_report(analysis_results, output_path, annex_max_chars=None, annex_mode=None):
+    started = time.perf_counter()
+    annex = new_annex(output_path, annex_max_chars, annex_mode)
+    metadata = analysis_results.get('metadata', {})
+    
+    with open(REPORT_HTML_TEMPLATE, "r", encoding="utf-8") as f:
+        template = Template(f.read())
+    
+    html_content = template.safe_substitute(
+        report_filename=escape(os.path.splitext(str(metadata.get('report_filename', 'genevision_report')))[0] + ".html"),
+        date=escape(str(metadata.get('date', datetime.datetime.now().strftime('%B %d, %Y')))),
+        user=escape(str(metadata.get('user', 'Unknown'))),
+        general_information=html_general_information(analysis_results),
+        sequence_data=html_sequence_data(analysis_results),
+        results_summary=html_results_summary(analysis_results),
+        structure_confidence=html_structure_confidence(analysis_results),
+        annexes=html_annexes(analysis_results, annex)
+    )
+    with open(output_path, "w", encoding="utf-8") as f:
+        f.write(html_content)
+    
+    return ReportBuildInfo(
+        path=output_path,
+        page_count=None,
+        build_seconds=round(time.perf_counter() - started, 3),
+        file_size=os.path.getsize(output_path),
+        attachments=tuple(annex['attachments']),
+        truncated_sections=tuple(annex['truncated'])
+    )
+
+def html_list(items):
+    if not items:
+        return ""
+    return "<ul>" + "".join(f"<li>{item}</li>" for item in items) + "</ul>"
+
+def html_general_information(analysis_results):
+    sequence_contents = analysis_results.get('sequence_contents', {})
+    file_types = {
+        'input_sequence': 'Analyzed sequence',
+        'predicted_genes': 'Predicted genes',
+        'protein_sequences': 'Protein sequences'
+    }
+    parts = [
+        f"<p><b>{label}:</b> Available in appendix</p>"
+        for key, label in file_types.items() if key in sequence_contents
+    ]
+    
+    tools = analysis_results.get('tools', {})
+    tool_mapping = {
+        'gene_prediction': 'Gene prediction',
+        'functional_annotation': 'Functional annotation',
+        'structural_modeling': 'Structural modeling'
+    }
+    parts.append("<p><b>Tools used:</b></p>")
+    parts.append(html_list([f"{label}: {escape(str(tools[key]))}" for key, label in tool_mapping.items() if key in tools]))
+    return "\n".join(parts)
+
+def html_sequence_data(analysis_results):
+    sequence_data = analysis_results.get('sequence_data', {})
+    field_labels = {
+        'gene_count': 'Number of predicted genes',
+        'protein_count': 'Number of protein sequences',
+        'sequence_length': 'Total input sequence length',
+        'input_gc_content': 'Input sequence GC content',
+        'gc_content': 'GC content of predicted genes',
+        'gc3_content': 'GC3 content of predicted genes'
+    }
+    items = []
+    for field, label in field_labels.items():
+        if field in sequence_data:
+            value = sequence_data[field]
+            if field == 'sequence_length':
+                value = f"{value} bp"
+            elif field in ('input_gc_content', 'gc_content', 'gc3_content'):
+                value = f"{value:.2f}%"
+            items.append(f"{label}: {value}")
+    return html_list(items)
+
+def html_results_summary(analysis_results):
+    genes = analysis_results.get('genes', [])
+    if not genes:
+        return "<p class='note'>No annotated genes.</p>"
+    
+    rows = []
+    for i, gene in enumerate(genes):
+        cells = [
+            gene.get('id', f'Gene-{i+1}'),
+            gene.get('position', 'N/A'),
+            gene.get('score', 'N/A'),
+            gene.get('Top GO Term', 'N/A'),
+            gene.get('function', 'N/A'),
+            gene.get('Top GO Term Description') or 'N/A'
+        ]
+        rows.append("<tr>" + "".join(f"<td>{escape(str(cell))}</td>" for cell in cells) + "</tr>")
+    table = ("<table><tr><th>Gene ID</th><th>Position</th><th>Score</th><th>GO Term</th>"
+             "<th>Function</th><th>Description</th></tr>" + "".join(rows) + "</table>")
+    
+    # scores de confiance des annotations (entre 0 et 1)
+    scores = []
+    for i, gene in enumerate(genes):
+        try:
+            scores.append((str(gene.get('id', f'Gene-{i+1}')), float(gene.get('score'))))
+        except (TypeError, ValueError):
+            pass
+    chart = svg_bar_chart(scores, y_max=1.0) if scores else ""
+    return table + ("<h3>Annotation confidence score per gene</h3>" + chart if chart else "")
+
+def html_structure_confidence(analysis_results):
+    models = analysis_results.get('structure_confidence', [])
+    if not models:
+        return ""
+    parts = ["<h2>4. Protein Model Confidence</h2>"]
+    for model in models:
+        parts.append(f"<h3>{escape(str(model['protein_id']))} - mean pLDDT: {model['mean_plddt']}</h3>")
+        parts.append(svg_line_chart(model['plddt'], y_max=100))
+        rows = "".join(
+            f"<tr><td>{band['band']}</td><td>{band['range']}</td><td>{band['residues']}</td><td>{band['percent']}%</td></tr>"
+            for band in model['bands']
+        )
+        parts.append("<table><tr><th>Confidence band</th><th>pLDDT</th><th>Residues</th><th>Residues (%)</th></tr>"
+                     + rows + "</table>")
+    return "\n".join(parts)
+
+def html_annexes(analysis_results, annex):
+    sequence_contents = analysis_results.get('sequence_contents', {})
+    if not sequence_contents:
+        return ""
+    titles = {
+        'input_sequence': "A1. Input Sequence",
+        'predicted_genes': "A2. Predicted Genes",
+        'protein_sequences': "A3. Protein Sequences"
+    }
+    parts = ["<h2>Appendix - Sequence Contents</h2>"]
+    for key, content in sequence_contents.items():
+        title = titles.get(key, f"A5. {key.replace('_', ' ').title()}")
+        if not content:
+            parts.append(f"<h3>{title}</h3><p>Content not available</p>")
+            continue
+        lines = FastaAnnexLines(content, annex['max_chars'])
+        body = escape("\n".join(lines))
+        note = f"<p class='note'>{escape(truncate_annex_section(annex, key, content))}</p>" if lines.truncated else ""
+        parts.append(f"<details><summary><b>{title}</b></summary><pre>{body}</pre>{note}</details>")
+    return "\n".join(parts)
+
+#courbe SVG (ex: pLDDT par résidu), valeurs entre 0 et y_max
+def svg_line_chart(values, y_max=100, width=640, height=160, margin=30):
+    if not values:
+        return ""
+    plot_width = width - 2 * margin
+    plot_height = height - 2 * margin
+    step = plot_width / max(len(values) - 1, 1)
+    points = " ".join(
+        f"{margin + i * step:.1f},{margin + plot_height * (1 - min(max(value, 0), y_max) / y_max):.1f}"
+        for i, value in enumerate(values)
+    )
+    return (
+        f'<svg width="{width}" height="{height}" xmlns="http://www.w3.org/2000/svg">'
+        f'<rect x="{margin}" y="{margin}" width="{plot_width}" height="{plot_height}" fill="none" stroke="#adb5bd"/>'
+        f'<polyline points="{points}" fill="none" stroke="#1f77b4" stroke-width="1.5"/>'
+        f'<text x="{margin - 4}" y="{margin + 4}" font-size="10" text-anchor="end">{y_max:g}</text>'
+        f'<text x="{margin - 4}" y="{margin + plot_height}" font-size="10" text-anchor="end">0</text>'
+        f'<text x="{margin}" y="{height - 8}" font-size="10">1</text>'
+        f'<text x="{margin + plot_width}" y="{height - 8}" font-size="10" text-anchor="end">{len(values)}</text>'
+        '</svg>'
+    )
+
+#histogramme SVG : items = [(libellé, valeur)], valeurs entre 0 et y_max
+def svg_bar_chart(items, y_max=1.0, width=640, height=180, margin=30):
+    plot_width = width - 2 * margin
+    plot_height = height - 2 * margin
+    bar_width = plot_width / len(items)
+    bars = []
+    for i, (label, value) in enumerate(items):
+        bar_height = plot_height * min(max(value, 0), y_max) / y_max
+        x = margin + i * bar_width
+        bars.append(
+            f'<rect x="{x + bar_width * 0.1:.1f}" y="{margin + plot_height - bar_height:.1f}" '
+            f'width="{bar_width * 0.8:.1f}" height="{bar_height:.1f}" fill="#4CAF50">'
+            f'<title>{escape(label)}: {value:g}</title></rect>'
+        )
+    return (
+        f'<svg width="{width}" height="{height}" xmlns="http://www.w3.org/2000/svg">'
+        f'<line x1="{margin}" y1="{margin + plot_height}" x2="{margin + plot_width}" y2="{margin + plot_height}" stroke="#adb5bd"/>'
+        + "".join(bars) +
+        f'<text x="{margin - 4}" y="{margin + 4}" font-size="10" text-anchor="end">{y_max:g}</text>'
+        f'<text x="{margin - 4}" y="{margin + plot_height}" font-size="10" text-anchor="end">0</text>'
+        '</svg>'
+    )
+
 if __name__ == "__main__":
     pass
\ No newline at end of file
@@ -0,0 +1,151 @@
+#cache des rapports (PDF, HTML, JSON) : un rapport est rendu une seule fois par
+#(sequence_id, empreinte de l'analyse, version du modèle de rapport, format),
+#puis le fichier enregistré est servi directement aux demandes suivantes (page des résultats,
+#historique et export groupé utilisent la même empreinte, voir report_fingerprint)
+#le PDF est rendu dans un thread de fond, HTML et JSON (quelques millisecondes) directement
+import os
+import uuid
+import hashlib
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+
+from scripts.rapport_results import REPORT_TEMPLATE_VERSION, build_genevision_report, build_html_report, build_json_report
+from scripts.database import get_report_by_fingerprint, get_sequence, get_sequence_results, save_report_artifact
+from scripts.fingerprints import fingerprint_data
+from scripts.metrics import CACHE_REQUESTS, REPORT_QUEUE_DEPTH
+
+REPORT_CACHE_DIR = os.environ.get('REPORT_CACHE_DIR', "C:\\Users\\MSI\\Documents\\PFE\\DNA_project\\reports\\cache")
+# nombre de rapports rendus en parallèle
+REPORT_WORKERS = int(os.environ.get('REPORT_WORKERS', 1))
+
+_executor = ThreadPoolExecutor(max_workers=REPORT_WORKERS, thread_name_prefix="report")
+# rendus en cours, pour ne pas lancer deux fois le même rapport
+_pending = {}
+_pending_lock = threading.RLock()
+
+# format -> (type de l'entrée reports, extension, fonction de rendu)
+REPORT_FORMATS = {
+    "pdf": ("standard_pdf", "pdf", build_genevision_report),
+    "html": ("standard_html", "html", build_html_report),
+    "json": ("standard_json", "json", build_json_report)
+}
+
+
+#chemin du fichier d'un rapport dans le cache
+def report_cache_path(seq_id, fingerprint, fmt="pdf"):
+    key = hashlib.sha256(f"{seq_id}|{fingerprint}|{REPORT_TEMPLATE_VERSION}".encode("utf-8")).hexdigest()
+    return os.path.join(REPORT_CACHE_DIR, f"genevision_report_{seq_id}_{key[:16]}.{REPORT_FORMATS[fmt][1]}")
+
+
+#rapport déjà rendu (contenu de l'entrée reports) si son fichier existe encore, sinon None
+def get_cached_report(seq_id, fingerprint, fmt="pdf"):
+    report = get_report_by_fingerprint(seq_id, fingerprint, REPORT_TEMPLATE_VERSION, REPORT_FORMATS[fmt][0])
+    if not report:
+        return None
+    content = report.get("content", {})
+    if not content.get("report_path") or not os.path.exists(content["report_path"]):
+        return None
+    return content
+
+
+#empreinte sous laquelle les rapports d'une séquence sont mis en cache : empreinte de l'analyse
+#(analysis_key, séquence + configuration du pipeline) si la séquence en a une, sinon empreinte du premier
+#résultat d'analyse enregistré ; None si la séquence n'a ni l'une ni l'autre
+def report_fingerprint(seq_id, results=None):
+    seq = get_sequence(seq_id, {"analysis_key": 1})
+    if seq and seq.get("analysis_key"):
+        return seq["analysis_key"]
+    results = results if results is not None else get_sequence_results(seq_id)
+    if not results:
+        return None
+    return results[0].get("fingerprint") or fingerprint_data(results[0].get("data", {}))
+
+
+#données du rapport d'une séquence enregistrée (premier résultat d'analyse) et leur empreinte
+#renvoie (None, None) si la séquence n'a pas encore de résultat
+def load_report_source(seq_id):
+    results = get_sequence_results(seq_id)
+    if not results:
+        return None, None
+    return results[0].get("data", {}), report_fingerprint(seq_id, results)
+
+
+#chemin temporaire unique où rendre un rapport (renommé ensuite par store_rendered_report)
+#un rapport à moitié écrit n'est donc jamais servi
+def report_tmp_path(seq_id, fingerprint, fmt="pdf"):
+    os.makedirs(REPORT_CACHE_DIR, exist_ok=True)
+    base = os.path.splitext(report_cache_path(seq_id, fingerprint, fmt))[0]
+    return f"{base}.{uuid.uuid4().hex[:8]}.tmp.{REPORT_FORMATS[fmt][1]}"
+
+
+#déplacer un rapport rendu (et ses annexes) à sa place dans le cache et l'enregistrer en base
+#info: ReportBuildInfo renvoyé par la fonction de rendu du format pour un chemin de report_tmp_path
+def store_rendered_report(seq_id, fingerprint, info, fmt="pdf"):
+    report_path = report_cache_path(seq_id, fingerprint, fmt)
+    tmp_base = os.path.splitext(info.path)[0]
+    os.replace(info.path, report_path)
+    attachments = []
+    for attachment in info.attachments:
+        final = os.path.splitext(report_path)[0] + attachment[len(tmp_base):]
+        os.replace(attachment, final)
+        attachments.append(final)
+
+    content = {
+        "report_path": os.path.normpath(report_path),
+        "page_count": info.page_count,
+        "file_size": info.file_size,
+        "build_seconds": info.build_seconds,
+        "attachments": attachments,
+        "truncated_sections": list(info.truncated_sections)
+    }
+    save_report_artifact(seq_id, fingerprint, REPORT_TEMPLATE_VERSION, content, REPORT_FORMATS[fmt][0])
+    return content
+
+
+#rendre le rapport dans le format demandé
+def render_report(seq_id, fingerprint, analysis_data, fmt="pdf"):
+    build = REPORT_FORMATS[fmt][2]
+    info = build(analysis_data, report_tmp_path(seq_id, fingerprint, fmt))
+    return store_rendered_report(seq_id, fingerprint, info, fmt)
+
+
+#demander un rapport : renvoie un Future dont le résultat est le contenu de l'entrée reports
+#(déjà terminé si le rapport est en cache). data_fn n'est appelée que si le rapport doit être rendu
+#fmt: "pdf" (défaut), "html" ou "json"
+def submit_report(seq_id, fingerprint, data_fn, fmt="pdf"):
+    key = (seq_id, fingerprint, REPORT_TEMPLATE_VERSION, fmt)
+    with _pending_lock:
+        if key in _pending:
+            return _pending[key]
+
+    cached = get_cached_report(seq_id, fingerprint, fmt)
+    CACHE_REQUESTS.inc(cache=f"report_{fmt}", result="hit" if cached else "miss")
+    if cached:
+        future = Future()
+        future.set_result(cached)
+        return future
+
+    analysis_data = data_fn()
+    if fmt != "pdf":
+        # formats légers : rendus tout de suite, sans passer par le thread de fond
+        future = Future()
+        try:
+            future.set_result(render_report(seq_id, fingerprint, analysis_data, fmt))
+        except Exception as e:
+            future.set_exception(e)
+        return future
+
+    with _pending_lock:
+        if key not in _pending:
+            future = _executor.submit(render_report, seq_id, fingerprint, analysis_data)
+            _pending[key] = future
+            REPORT_QUEUE_DEPTH.set(len(_pending))
+            # une fois rendu, le rapport est servi depuis la base de données
+            future.add_done_callback(lambda _: _forget(key))
+        return _pending[key]
+
+
+def _forget(key):
+    with _pending_lock:
+        _pending.pop(key, None)
+        REPORT_QUEUE_DEPTH.set(len(_pending))
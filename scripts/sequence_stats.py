@@ -0,0 +1,179 @@
+#statistiques de composition des séquences calculées avec numpy en une seule passe vectorisée
+#(GC, GC3, N, profils GC par fenêtre glissante, usage des codons, composition en acides aminés)
+#les séquences sont converties une seule fois en tableau uint8 (concaténation + offsets)
+from dataclasses import dataclass
+from itertools import product
+from typing import Tuple
+
+import numpy as np
+
+# codes des nucléotides : A=0, C=1, G=2, T/U=3, N=4, autre code IUPAC=5, caractère invalide=6
+NUCLEOTIDE_CODES = np.full(256, 6, dtype=np.uint8)
+for letters, code in (("Aa", 0), ("Cc", 1), ("Gg", 2), ("TtUu", 3), ("Nn", 4), ("RYKMSWBDHVrykmswbdhv", 5)):
+    for letter in letters:
+        NUCLEOTIDE_CODES[ord(letter)] = code
+
+CODONS = tuple("".join(codon) for codon in product("ACGT", repeat=3))
+
+AMINO_ACIDS = "ACDEFGHIKLMNPQRSTVWY"
+# index des acides aminés, 20 = autre (X, *, ...)
+AMINO_ACID_CODES = np.full(256, len(AMINO_ACIDS), dtype=np.uint8)
+for index, letter in enumerate(AMINO_ACIDS):
+    AMINO_ACID_CODES[ord(letter)] = index
+    AMINO_ACID_CODES[ord(letter.lower())] = index
+
+
+@dataclass(frozen=True)
+class NucleotideStats:
+    ids: Tuple[str, ...]
+    lengths: np.ndarray
+    acgt_counts: np.ndarray
+    gc_counts: np.ndarray
+    n_counts: np.ndarray
+    gc3_counts: np.ndarray
+    gc3_sites: np.ndarray
+    # matrice (nombre de séquences, 64) dans l'ordre de CODONS
+    codon_counts: np.ndarray
+    # somme cumulée de G/C sur la concaténation, pour les profils par fenêtre
+    gc_cumsum: np.ndarray
+    offsets: np.ndarray
+
+    # GC de chaque séquence (%), calculé sur les bases A/C/G/T
+    @property
+    def gc_percent(self):
+        return percent(self.gc_counts, self.acgt_counts)
+
+    # GC global pondéré par la longueur (et non moyenne des pourcentages par gène)
+    @property
+    def overall_gc(self):
+        return float(percent(self.gc_counts.sum(), self.acgt_counts.sum()))
+
+    @property
+    def overall_gc3(self):
+        return float(percent(self.gc3_counts.sum(), self.gc3_sites.sum()))
+
+    @property
+    def overall_n(self):
+        return float(percent(self.n_counts.sum(), self.lengths.sum()))
+
+    #usage des codons de l'ensemble des séquences {codon: nombre}
+    def codon_usage(self):
+        totals = self.codon_counts.sum(axis=0)
+        return {codon: int(count) for codon, count in zip(CODONS, totals)}
+
+    #profil GC (%) d'une séquence par fenêtre glissante : (positions de début, GC %)
+    def gc_profile(self, index, window=100, step=None):
+        step = step or max(1, window // 2)
+        start, end = int(self.offsets[index]), int(self.offsets[index + 1])
+        window = min(window, end - start)
+        if window <= 0:
+            return np.empty(0, dtype=np.int64), np.empty(0)
+        starts = np.arange(start, end - window + 1, step)
+        gc = self.gc_cumsum[starts + window] - self.gc_cumsum[starts]
+        return starts - start, gc * 100.0 / window
+
+    #résumé sérialisable (base de données, rapport)
+    def summary(self):
+        return {
+            "sequence_count": len(self.ids),
+            "total_length": int(self.lengths.sum()),
+            "gc_content": round(self.overall_gc, 2),
+            "gc3_content": round(self.overall_gc3, 2),
+            "n_content": round(self.overall_n, 2),
+            "min_length": int(self.lengths.min()) if len(self.lengths) else 0,
+            "max_length": int(self.lengths.max()) if len(self.lengths) else 0
+        }
+
+
+@dataclass(frozen=True)
+class ProteinStats:
+    ids: Tuple[str, ...]
+    lengths: np.ndarray
+    # matrice (nombre de protéines, 21) dans l'ordre de AMINO_ACIDS + autre
+    composition: np.ndarray
+
+    #composition globale en acides aminés {acide aminé: %}
+    def composition_percent(self):
+        totals = self.composition.sum(axis=0)
+        values = percent(totals, totals.sum())
+        return {aa: round(float(value), 2) for aa, value in zip(AMINO_ACIDS + "X", values)}
+
+
+#division sûre en pourcentage (0 si dénominateur nul)
+def percent(numerator, denominator):
+    numerator = np.asarray(numerator, dtype=np.float64)
+    denominator = np.asarray(denominator, dtype=np.float64)
+    return np.divide(numerator * 100.0, denominator, out=np.zeros_like(numerator), where=denominator > 0)
+
+
+#concaténer les séquences en un seul tableau d'octets + offsets de début de chaque séquence
+def encode_sequences(sequences):
+    sequences = list(sequences)
+    lengths = np.fromiter((len(seq) for seq in sequences), dtype=np.int64, count=len(sequences))
+    offsets = np.zeros(len(sequences) + 1, dtype=np.int64)
+    np.cumsum(lengths, out=offsets[1:])
+    raw = np.frombuffer("".join(sequences).encode("ascii", "replace"), dtype=np.uint8)
+    return raw, offsets
+
+
+#somme d'un masque booléen par séquence (via somme cumulée, fonctionne aussi pour les séquences vides)
+def counts_per_sequence(mask, offsets):
+    cumsum = np.zeros(len(mask) + 1, dtype=np.int64)
+    np.cumsum(mask, out=cumsum[1:])
+    return cumsum[offsets[1:]] - cumsum[offsets[:-1]], cumsum
+
+
+#statistiques nucléotidiques de toutes les séquences : records = [(id, séquence), ...]
+def nucleotide_stats(records):
+    records = list(records)
+    ids = tuple(record_id for record_id, _ in records)
+    raw, offsets = encode_sequences(seq for _, seq in records)
+    codes = NUCLEOTIDE_CODES[raw]
+    lengths = np.diff(offsets)
+
+    is_acgt = codes < 4
+    is_gc = (codes == 1) | (codes == 2)
+    acgt_counts, _ = counts_per_sequence(is_acgt, offsets)
+    gc_counts, gc_cumsum = counts_per_sequence(is_gc, offsets)
+    n_counts, _ = counts_per_sequence(codes == 4, offsets)
+
+    # position de chaque base dans sa propre séquence (phase du codon)
+    sequence_index = np.repeat(np.arange(len(ids)), lengths)
+    position = np.arange(len(codes)) - offsets[:-1][sequence_index]
+    third = position % 3 == 2
+    gc3_counts, _ = counts_per_sequence(is_gc & third, offsets)
+    gc3_sites, _ = counts_per_sequence(is_acgt & third, offsets)
+
+    # codons en phase complets (3 bases A/C/G/T) : index = 16*b1 + 4*b2 + b3
+    codon_starts = np.flatnonzero((position % 3 == 0) & (position + 2 < lengths[sequence_index]))
+    b1, b2, b3 = codes[codon_starts], codes[codon_starts + 1], codes[codon_starts + 2]
+    valid = (b1 < 4) & (b2 < 4) & (b3 < 4)
+    codon_index = 16 * b1[valid].astype(np.int64) + 4 * b2[valid] + b3[valid]
+    codon_owner = sequence_index[codon_starts[valid]]
+    codon_counts = np.bincount(codon_owner * 64 + codon_index, minlength=len(ids) * 64).reshape(len(ids), 64)
+
+    return NucleotideStats(
+        ids=ids,
+        lengths=lengths,
+        acgt_counts=acgt_counts,
+        gc_counts=gc_counts,
+        n_counts=n_counts,
+        gc3_counts=gc3_counts,
+        gc3_sites=gc3_sites,
+        codon_counts=codon_counts,
+        gc_cumsum=gc_cumsum,
+        offsets=offsets
+    )
+
+
+#composition en acides aminés de toutes les protéines : records = [(id, séquence), ...]
+def protein_stats(records):
+    records = list(records)
+    ids = tuple(record_id for record_id, _ in records)
+    raw, offsets = encode_sequences(seq for _, seq in records)
+    lengths = np.diff(offsets)
+    codes = AMINO_ACID_CODES[raw].astype(np.int64)
+    owner = np.repeat(np.arange(len(ids)), lengths)
+    width = len(AMINO_ACIDS) + 1
+    composition = np.bincount(owner * width + codes, minlength=len(ids) * width).reshape(len(ids), width)
+    return ProteinStats(ids=ids, lengths=lengths, composition=composition)
@@ -0,0 +1,146 @@
+#pré-traitement des modèles PDB : chaque fichier est parsé une seule fois en un résumé compact
+#(résidus, chaînes, pLDDT moyen depuis les B-factors, boîte englobante) enregistré à côté du fichier
+#(<modèle>.summary.json), et une version allégée du modèle est servie au visualiseur 3D
+import os
+import json
+
+from scripts.fingerprints import fingerprint_files, is_stamped, write_stamp
+from scripts.model_confidence import scale_plddt
+from scripts.metrics import CACHE_REQUESTS
+
+# au-delà de ce nombre d'atomes, le visualiseur reçoit la trace des carbones alpha
+CA_TRACE_ATOM_THRESHOLD = 10000
+
+# seuils pLDDT (AlphaFold/ESMFold) des catégories de qualité
+QUALITY_THRESHOLDS = ((70, "High"), (50, "Medium"), (0, "Low"))
+
+# enregistrements PDB conservés dans le modèle envoyé au visualiseur
+VIEWER_RECORDS = ("ATOM", "HETATM", "TER", "END")
+
+
+#chemins des fichiers dérivés d'un modèle (résumé et trace CA)
+def summary_path(pdb_path):
+    return f"{os.path.splitext(pdb_path)[0]}.summary.json"
+
+
+def ca_trace_path(pdb_path):
+    return f"{os.path.splitext(pdb_path)[0]}.ca.pdb"
+
+
+#modèles PDB d'un répertoire (sans les traces CA dérivées)
+def list_model_files(models_dir):
+    return sorted(f for f in os.listdir(models_dir) if f.endswith(".pdb") and not f.endswith(".ca.pdb"))
+
+
+#catégorie de qualité à partir du pLDDT moyen (None si le modèle n'a pas de B-factors)
+def quality_category(mean_plddt):
+    if mean_plddt is None:
+        return "Unknown"
+    return next(label for threshold, label in QUALITY_THRESHOLDS if mean_plddt >= threshold)
+
+
+#parser le texte PDB en une seule passe (colonnes fixes du format PDB)
+def summarize_pdb(pdb_text):
+    residues = set()
+    chains = []
+    ca_bfactors = []
+    atom_count = 0
+    box_min = [float("inf")] * 3
+    box_max = [float("-inf")] * 3
+
+    for line in pdb_text.splitlines():
+        record = line[:6].strip()
+        if record not in ("ATOM", "HETATM"):
+            continue
+        atom_count += 1
+        chain = line[21:22].strip() or "A"
+        if chain not in chains:
+            chains.append(chain)
+        try:
+            coords = (float(line[30:38]), float(line[38:46]), float(line[46:54]))
+        except ValueError:
+            continue
+        for axis, value in enumerate(coords):
+            box_min[axis] = min(box_min[axis], value)
+            box_max[axis] = max(box_max[axis], value)
+        if record != "ATOM":
+            continue
+        residues.add((chain, line[22:27]))
+        if line[12:16].strip() == "CA":
+            try:
+                ca_bfactors.append(float(line[60:66]))
+            except ValueError:
+                pass
+
+    mean_plddt = round(float(scale_plddt(ca_bfactors).mean()), 2) if ca_bfactors else None
+
+    return {
+        "residue_count": len(residues),
+        "atom_count": atom_count,
+        "chains": chains,
+        "mean_plddt": mean_plddt,
+        "quality": quality_category(mean_plddt),
+        "bounding_box": {
+            "min": [round(value, 3) for value in box_min] if atom_count else None,
+            "max": [round(value, 3) for value in box_max] if atom_count else None
+        }
+    }
+
+
+#résumé d'un fichier PDB, relu depuis <modèle>.summary.json s'il correspond encore au fichier
+def load_structure_summary(pdb_path):
+    signature = fingerprint_files(pdb_path)
+    try:
+        with open(summary_path(pdb_path), "r") as f:
+            cached = json.load(f)
+        if cached.get("signature") == signature:
+            CACHE_REQUESTS.inc(cache="structure_summary", result="hit")
+            return cached["summary"]
+    except (OSError, ValueError, KeyError):
+        pass
+    CACHE_REQUESTS.inc(cache="structure_summary", result="miss")
+
+    with open(pdb_path, "r") as f:
+        summary = summarize_pdb(f.read())
+    try:
+        with open(summary_path(pdb_path), "w") as f:
+            json.dump({"signature": signature, "summary": summary}, f)
+    except OSError:
+        pass  # répertoire en lecture seule : le résumé n'est pas persisté
+    return summary
+
+
+#modèle sans les enregistrements inutiles à l'affichage (REMARK, JRNL, ...)
+def strip_pdb(pdb_text, ca_only=False):
+    lines = []
+    for line in pdb_text.splitlines():
+        record = line[:6].strip()
+        if record not in VIEWER_RECORDS:
+            continue
+        if ca_only and record in ("ATOM", "HETATM") and line[12:16].strip() != "CA":
+            continue
+        lines.append(line)
+    return "\n".join(lines) + "\n"
+
+
+#modèle à envoyer au visualiseur : (texte PDB, True si trace CA)
+#les gros modèles sont réduits à la trace CA, enregistrée à côté du fichier pour les affichages suivants
+def viewer_model(pdb_path, summary):
+    if summary["atom_count"] <= CA_TRACE_ATOM_THRESHOLD:
+        with open(pdb_path, "r") as f:
+            return strip_pdb(f.read()), False
+
+    trace_path = ca_trace_path(pdb_path)
+    if is_stamped(trace_path, pdb_path):
+        with open(trace_path, "r") as f:
+            return f.read(), True
+
+    with open(pdb_path, "r") as f:
+        trace = strip_pdb(f.read(), ca_only=True)
+    try:
+        with open(trace_path, "w") as f:
+            f.write(trace)
+        write_stamp(trace_path, pdb_path)
+    except OSError:
+        pass
+    return trace, True
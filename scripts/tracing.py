@@ -0,0 +1,222 @@
+#traçage léger des étapes du pipeline : des spans imbriqués autour de chaque étape et de chaque appel
+#externe (AUGUSTUS, DeepGOPlus, QuickGO, LLM, ESMFold) mesurent le temps réel, le temps CPU,
+#le pic de mémoire (RSS), les octets lus/écrits et le nombre de requêtes
+#les scripts du pipeline sont lancés comme sous-processus : quand la variable GENEVISION_TRACE_FILE
+#est définie, la trace est écrite en JSON dans ce fichier à la fin du script et relue par l'application
+#ce module ne dépend pas du package scripts, il est aussi importé par les scripts lancés directement
+import atexit
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+try:
+    import resource
+except ImportError:
+    resource = None  # Windows : pic mémoire lu avec psutil s'il est installé
+
+try:
+    import psutil
+except ImportError:
+    psutil = None
+
+TRACE_FILE_ENV = "GENEVISION_TRACE_FILE"
+
+
+#pic de mémoire résidente du processus depuis son démarrage (Mo), None si non mesurable
+def peak_rss_mb():
+    if resource is not None:
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # ru_maxrss est en Ko sous Linux, en octets sous macOS
+        return round(peak / (1024 * 1024 if os.uname().sysname == "Darwin" else 1024), 1)
+    if psutil is not None:
+        memory = psutil.Process().memory_info()
+        return round(getattr(memory, "peak_wset", memory.rss) / (1024 * 1024), 1)
+    return None
+
+
+#octets lus et écrits par le processus depuis son démarrage : (lus, écrits), (0, 0) si non mesurable
+def io_bytes():
+    if psutil is not None:
+        try:
+            counters = psutil.Process().io_counters()
+            return counters.read_bytes, counters.write_bytes
+        except (AttributeError, psutil.Error):
+            pass
+    try:
+        with open("/proc/self/io", "r") as f:
+            values = dict(line.split(":", 1) for line in f if ":" in line)
+        return int(values["rchar"]), int(values["wchar"])
+    except (OSError, KeyError, ValueError):
+        return 0, 0
+
+
+class Span:
+    def __init__(self, name, kind="stage", attributes=None):
+        self.name = name
+        self.kind = kind
+        self.attributes = dict(attributes or {})
+        self.calls = 0
+        self.wall_seconds = 0.0
+        self.cpu_seconds = 0.0
+        self.peak_rss_mb = None
+        self.read_bytes = 0
+        self.write_bytes = 0
+        self.requests = 0
+        self.children = []
+
+    #span enfant du même nom (les appels répétés, ex: une requête QuickGO par terme GO, sont cumulés)
+    def child(self, name, kind, attributes):
+        for span in self.children:
+            if span.name == name:
+                return span
+        span = Span(name, kind, attributes)
+        self.children.append(span)
+        return span
+
+    def to_dict(self):
+        return {
+            "name": self.name,
+            "kind": self.kind,
+            "attributes": self.attributes,
+            "calls": self.calls,
+            "wall_seconds": round(self.wall_seconds, 4),
+            "cpu_seconds": round(self.cpu_seconds, 4),
+            "peak_rss_mb": self.peak_rss_mb,
+            "read_bytes": self.read_bytes,
+            "write_bytes": self.write_bytes,
+            "requests": self.requests,
+            "children": [span.to_dict() for span in self.children]
+        }
+
+
+class Tracer:
+    def __init__(self):
+        self.root = Span("process", "process")
+        self._local = threading.local()
+        self._lock = threading.Lock()
+
+    def _stack(self):
+        if not hasattr(self._local, "stack"):
+            self._local.stack = [self.root]
+        return self._local.stack
+
+    @contextmanager
+    def span(self, name, kind="stage", **attributes):
+        stack = self._stack()
+        with self._lock:
+            span = stack[-1].child(name, kind, attributes)
+        stack.append(span)
+        wall_start = time.perf_counter()
+        cpu_start = time.thread_time()
+        read_start, write_start = io_bytes()
+        try:
+            yield span
+        finally:
+            read_end, write_end = io_bytes()
+            with self._lock:
+                span.calls += 1
+                span.wall_seconds += time.perf_counter() - wall_start
+                span.cpu_seconds += time.thread_time() - cpu_start
+                span.read_bytes += read_end - read_start
+                span.write_bytes += write_end - write_start
+                span.peak_rss_mb = peak_rss_mb()
+            stack.pop()
+
+    #compter une requête (HTTP, appel d'outil externe) sur le span courant et ses parents
+    def count_request(self, count=1):
+        with self._lock:
+            for span in self._stack():
+                span.requests += count
+
+    #trace complète : totaux du processus et spans de premier niveau
+    def to_dict(self):
+        read_total, write_total = io_bytes()
+        return {
+            "process": {
+                "cpu_seconds": round(time.process_time(), 4),
+                "peak_rss_mb": peak_rss_mb(),
+                "read_bytes": read_total,
+                "write_bytes": write_total,
+                "requests": self.root.requests
+            },
+            "spans": [span.to_dict() for span in self.root.children]
+        }
+
+
+tracer = Tracer()
+
+
+def span(name, kind="stage", **attributes):
+    return tracer.span(name, kind, **attributes)
+
+
+def count_request(count=1):
+    tracer.count_request(count)
+
+
+#écrire la trace dans le fichier indiqué par GENEVISION_TRACE_FILE (rien si la variable n'est pas définie)
+def write_trace(path=None):
+    path = path or os.environ.get(TRACE_FILE_ENV)
+    if not path:
+        return None
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(tracer.to_dict(), f, indent=2)
+    return path
+
+
+# un script lancé avec GENEVISION_TRACE_FILE écrit sa trace en sortant, même après exit(1)
+if os.environ.get(TRACE_FILE_ENV):
+    atexit.register(write_trace)
+
+
+#environnement d'un sous-processus qui doit écrire sa trace dans trace_path
+def trace_env(trace_path):
+    if os.path.exists(trace_path):
+        os.remove(trace_path)
+    return {**os.environ, TRACE_FILE_ENV: trace_path}
+
+
+#trace d'une étape lancée en sous-processus : totaux du script, temps réel mesuré par l'application
+#(démarrage de Python et imports compris) et spans écrits par le script
+def stage_trace(name, trace_path, wall_seconds):
+    trace = {"process": {}, "spans": []}
+    if os.path.exists(trace_path):
+        try:
+            with open(trace_path, "r", encoding="utf-8") as f:
+                trace = json.load(f)
+        except (OSError, ValueError):
+            pass
+    return {
+        "name": name,
+        "kind": "stage",
+        "wall_seconds": round(wall_seconds, 4),
+        **{key: trace.get("process", {}).get(key) for key in ("cpu_seconds", "peak_rss_mb", "read_bytes", "write_bytes", "requests")},
+        "children": trace.get("spans", [])
+    }
+
+
+#lignes d'un tableau de temps par étape : l'étape puis ses spans indentés
+def trace_rows(traces):
+    rows = []
+
+    def add(span, depth):
+        rows.append({
+            "Span": ("    " * depth) + ("↳ " if depth else "") + span["name"],
+            "Kind": span.get("kind", "stage"),
+            "Calls": span.get("calls", 1),
+            "Wall (s)": span.get("wall_seconds"),
+            "CPU (s)": span.get("cpu_seconds"),
+            "Peak RSS (MB)": span.get("peak_rss_mb"),
+            "Read (MB)": round((span.get("read_bytes") or 0) / (1024 * 1024), 2),
+            "Written (MB)": round((span.get("write_bytes") or 0) / (1024 * 1024), 2),
+            "Requests": span.get("requests") or 0
+        })
+        for child in span.get("children", []):
+            add(child, depth + 1)
+
+    for trace in traces:
+        add(trace, 0)
+    return rows
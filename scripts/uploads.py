@@ -0,0 +1,73 @@
+#réception des séquences en flux : le fichier envoyé est lu par blocs, décompressé à la volée
+#s'il est compressé (gzip, bgzip ou zstd, reconnus à leur signature et non à l'extension), validé et
+#normalisé (voir fasta_validation) puis écrit sur disque sans jamais être chargé en entier
+#l'empreinte sha256 du FASTA normalisé est calculée pendant l'écriture : un même génome envoyé
+#compressé ou non, avec d'autres retours à la ligne ou en minuscules, a la même empreinte
+#
+#les génomes de plusieurs centaines de Mo peuvent aussi être déposés dans UPLOAD_DIR (scp, rsync,
+#copie reprenable) puis importés depuis l'application sans passer par le navigateur
+import hashlib
+import os
+from dataclasses import dataclass
+from typing import Optional
+
+from scripts.compressed_io import decompress_chunks, sniff_compression
+from scripts.fasta_validation import FastaReport, validate_fasta
+
+UPLOAD_CHUNK_SIZE = 4 * 1024 * 1024
+UPLOAD_DIR = os.environ.get('UPLOAD_DIR', "C:\\Users\\MSI\\Documents\\PFE\\DNA_project\\data\\uploads")
+UPLOAD_EXTENSIONS = tuple(f"{name}{suffix}" for suffix in ("", ".gz", ".bgz", ".zst") for name in (".fasta", ".fa", ".fna"))
+
+
+@dataclass(frozen=True)
+class UploadResult:
+    report: FastaReport
+    # empreinte du FASTA normalisé, None si l'entrée est refusée
+    content_hash: Optional[str]
+    # octets reçus (compressés le cas échéant)
+    received_bytes: int
+    compressed: bool
+
+
+#recevoir stream (fichier ouvert en binaire, UploadedFile de streamlit) dans output_path
+#on_progress: appelé avec le nombre d'octets lus après chaque bloc (barre de progression)
+def receive_upload(stream, output_path, chunk_size=UPLOAD_CHUNK_SIZE, on_progress=None, **options):
+    received = 0
+    first_chunk = stream.read(chunk_size)
+    compression = sniff_compression(first_chunk)
+
+    def raw_chunks():
+        nonlocal received
+        chunk = first_chunk
+        while chunk:
+            received += len(chunk)
+            if on_progress:
+                on_progress(received)
+            yield chunk
+            chunk = stream.read(chunk_size)
+
+    digest = hashlib.sha256()
+    try:
+        report = validate_fasta(decompress_chunks(raw_chunks(), compression), output_path, digest=digest, **options)
+    except ValueError as e:
+        report = FastaReport((), (f"Could not decompress the file: {e}.",), ())
+    return UploadResult(report, digest.hexdigest() if report.ok else None, received, compression is not None)
+
+
+#recevoir une séquence collée (texte) : même validation et même empreinte qu'un fichier
+def receive_text(text, output_path, **options):
+    digest = hashlib.sha256()
+    report = validate_fasta(text, output_path, digest=digest, **options)
+    return UploadResult(report, digest.hexdigest() if report.ok else None, len(text.encode("utf-8")), False)
+
+
+#fichiers FASTA (éventuellement compressés) déposés dans UPLOAD_DIR : [(nom, taille en octets)]
+def list_upload_dir(upload_dir=UPLOAD_DIR):
+    if not os.path.isdir(upload_dir):
+        return []
+    files = []
+    for name in sorted(os.listdir(upload_dir)):
+        path = os.path.join(upload_dir, name)
+        if os.path.isfile(path) and name.lower().endswith(UPLOAD_EXTENSIONS):
+            files.append((name, os.path.getsize(path)))
+    return files